@@ -0,0 +1,31 @@
+# Gunicorn configuration for serving the ASGI application with uvicorn workers:
+#
+#     web: gunicorn --config gunicorn.asgi.conf.py resume_righter.asgi
+#
+# Everything not overridden below is inherited from gunicorn.conf.py.
+
+import os
+import runpy
+
+globals().update({
+    name: value
+    for name, value in runpy.run_path(os.path.join(os.path.dirname(__file__), "gunicorn.conf.py")).items()
+    if not name.startswith("__")
+})
+
+# Each uvicorn worker runs a single event loop. Requests waiting on OpenAI only hold a
+# coroutine, not a thread, so one worker can keep hundreds of generations in flight;
+# the ceiling is set by OPENAI_MAX_CONCURRENT_REQUESTS instead of `threads`.
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Route the API through the async views.
+raw_env = ["ASYNC_VIEWS=true"]
+
+# `threads` only applies to the gthread worker.
+threads = 1
+
+# For uvicorn workers this is a heartbeat timeout only, long generations are not killed by it.
+timeout = 30
+
+# Connections held open between requests by each worker.
+keepalive = 5
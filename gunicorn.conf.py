@@ -48,6 +48,15 @@ timeout = 20
 # https://devcenter.heroku.com/articles/dyno-shutdown-behavior
 graceful_timeout = 20
 
+# Start the background generation workers in each worker process once it has loaded
+# the app, rather than on the first submission, so queued jobs don't wait for one.
+# Threads don't survive the fork, so this can't be done in the master.
+def post_worker_init(worker):
+    from resume_app.services.job_service import start_worker_pool
+
+    start_worker_pool()
+
+
 # Enable logging of incoming requests to stdout.
 accesslog = "-"
 
@@ -64,6 +73,15 @@ else:
     # We don't enable this in development, since it's incompatible with `reload = True`.
     preload_app = True
 
+    # `preload_app` only imports the WSGI/ASGI module; the URLconf, the views and the
+    # libraries behind them would otherwise be imported by each worker on its first
+    # request. This hook runs in the master after the app is loaded and before any
+    # worker is forked, so the workers inherit them already imported.
+    def when_ready(server):
+        from resume_app.startup import warm_up
+
+        warm_up()
+
     # Use `SO_REUSEPORT` on the listening socket, which allows for more even request
     # distribution between workers. See: https://lwn.net/Articles/542629/
     # We don't enable this in development, since it makes it harder to notice when
@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from resume_app.models import GenerationJob, ResumeSession
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "created_at", "started_at", "finished_at")
+    list_filter = ("status",)
+    exclude = ("result_text",)
+    readonly_fields = ("status", "error", "created_at", "started_at", "finished_at")
+
+
+@admin.register(ResumeSession)
+class ResumeSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "updated_at")
+    exclude = ("resume_data", "job_posting_data", "considerations_data")
+    readonly_fields = ("created_at", "updated_at")
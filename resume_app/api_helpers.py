@@ -0,0 +1,200 @@
+import json
+import os
+from typing import Iterable, List, Optional, Tuple, Union
+
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from resume_app.services.extraction_service import FILE_TYPE_MAP, ExtractionLimitError
+from resume_app.services.rendering_service import OUTPUT_FORMATS
+from resume_app.services.session_service import load_session, save_session_inputs
+
+# Request parsing and response building shared by the API views in views.py and
+# their async counterparts in async_views.py. Helpers that touch the database
+# are sync; the async views call them through sync_to_async.
+
+# An SSE comment, which EventSource and the client ignore.
+SERVER_SENT_HEARTBEAT = ": heartbeat\n\n"
+
+
+def resume_file_type(uploaded_file) -> Optional[str]:
+    """
+    :return: The type of an uploaded resume ('pdf', 'docx', 'txt') from its extension,
+             or None if it isn't supported.
+    """
+    return FILE_TYPE_MAP.get(os.path.splitext(uploaded_file.name)[1].lower())
+
+
+def unsupported_file_type_response(uploaded_file) -> JsonResponse:
+    file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+    return JsonResponse({"error": f"Unsupported file type: {file_extension}"}, status=400)
+
+
+def extraction_limit_response(error: ExtractionLimitError) -> JsonResponse:
+    return JsonResponse({"error": str(error)}, status=413)
+
+
+def validation_response_data(result: dict, data_key: str, session_id: Optional[str], session_field: str) -> dict:
+    """
+    Build the response body of a single field validation, keeping a valid input
+    in the resume session.
+    :param result: The validate_* result.
+    :param data_key: The response field the validated data is sent back in.
+    :param session_id: The session named by the request, if any.
+    :param session_field: The save_session_inputs argument the validated data is saved as.
+    :return: The response body.
+    """
+    response_data = {
+        "valid": result["is_valid"],
+        data_key: result["validated_data"],
+    }
+    if result["is_valid"]:
+        session = save_session_inputs(session_id, **{session_field: result["validated_data"]})
+        response_data["session_id"] = str(session.id)
+    return response_data
+
+
+def save_validated_inputs(session_id: Optional[str], results: dict, text: Optional[str]) -> dict:
+    """
+    Keep the inputs that passed validate_inputs in the resume session rather than
+    sending them back.
+    :return: The response body, which only says which fields passed.
+    """
+    valid_inputs = {}
+    response_data = {}
+    if "resume" in results:
+        response_data["resume"] = {"valid": results["resume"]["is_valid"]}
+        if results["resume"]["is_valid"]:
+            valid_inputs["resume_text"] = results["resume"]["validated_data"]
+    if "job_posting" in results:
+        response_data["job_posting"] = {"valid": results["job_posting"]["is_valid"]}
+        if results["job_posting"]["is_valid"]:
+            valid_inputs["job_posting_text"] = results["job_posting"]["validated_data"]
+    if "special_considerations" in results:
+        response_data["special_considerations"] = {"valid": results["special_considerations"]["is_valid"]}
+        if results["special_considerations"]["is_valid"]:
+            valid_inputs["considerations"] = text
+    elif "resume" in results and "job_posting" in results:
+        # A full submission without considerations clears earlier ones.
+        valid_inputs["considerations"] = ""
+
+    session = save_session_inputs(session_id, **valid_inputs)
+    response_data["session_id"] = str(session.id)
+    return response_data
+
+
+def generation_inputs(data: dict) -> Union[Tuple[str, str, str], JsonResponse]:
+    """
+    Read the generation inputs from a request body, either from the resume session
+    named by "session_id" or from the texts themselves.
+    :return: (resume_text, job_posting_text, considerations), or the error response
+             if the session is unknown or expired or an input is missing.
+    """
+    session_id = data.get("session_id")
+    if session_id:
+        session = load_session(session_id)
+        if session is None:
+            return JsonResponse({"error": "Session not found or expired."}, status=404)
+        inputs = session.resume_text, session.job_posting_text, session.considerations
+    else:
+        inputs = data.get("resume_text"), data.get("job_posting_text"), data.get("considerations")
+    if not inputs[0] or not inputs[1]:
+        return JsonResponse({"error": "Missing required input."}, status=400)
+    return inputs
+
+
+def batch_postings(request) -> List[str]:
+    """
+    :return: The job posting URLs of a batch request, blank ones left out.
+    """
+    return [url.strip() for url in request.POST.getlist("url") if url.strip()]
+
+
+def batch_request_error(uploaded_file, urls: List[str], max_postings: int) -> Optional[JsonResponse]:
+    """
+    :return: The error response for a batch request missing its resume or postings,
+             with too many postings or an unsupported resume file, or None.
+    """
+    if not uploaded_file:
+        return JsonResponse({"error": "No file uploaded"}, status=400)
+    if not urls:
+        return JsonResponse({"error": "No URL provided."}, status=400)
+    if len(urls) > max_postings:
+        return JsonResponse({"error": f"At most {max_postings} job postings per batch."}, status=400)
+    if not resume_file_type(uploaded_file):
+        return unsupported_file_type_response(uploaded_file)
+    return None
+
+
+def batch_validation_error(results: dict, text: Optional[str]) -> Optional[JsonResponse]:
+    """
+    :return: The error response if the batch's resume or considerations failed
+             validate_inputs, or None.
+    """
+    if not results["resume"]["is_valid"]:
+        return JsonResponse({"error": "The uploaded file doesn't look like a resume."}, status=400)
+    if text and not results["special_considerations"]["is_valid"]:
+        return JsonResponse({"error": "The special considerations were rejected."}, status=400)
+    return None
+
+
+def batch_archive_response(archive) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(archive, content_type="application/zip")
+    response["Content-Disposition"] = 'attachment; filename="Rewritten_Resumes.zip"'
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def rendered_resume_response(content: bytes, output_format: str) -> HttpResponse:
+    """
+    Serve a rendered resume, inline for formats the browser can display.
+    """
+    output = OUTPUT_FORMATS[output_format]
+    disposition = "inline" if output.inline else "attachment"
+    response = HttpResponse(content, content_type=output.content_type)
+    response["Content-Disposition"] = f'{disposition}; filename="Rewritten_Resume.{output.extension}"'
+    return response
+
+
+def generated_resume_response(content: bytes, output_format: str, handle: str) -> HttpResponse:
+    """
+    Serve a freshly generated resume, pointing at where it can be downloaded again.
+    """
+    response = rendered_resume_response(content, output_format)
+    response["X-Generated-Resume-Url"] = reverse("generated_resume_download", args=[handle])
+    return response
+
+
+def unsupported_format_response(output_format: str) -> JsonResponse:
+    return JsonResponse({
+        "error": f"Unsupported format: {output_format}. Use one of: {', '.join(OUTPUT_FORMATS)}."
+    }, status=400)
+
+
+def generated_resume_urls(handle: str) -> dict:
+    download_url = reverse("generated_resume_download", args=[handle])
+    return {output_format: f"{download_url}?format={output_format}" for output_format in OUTPUT_FORMATS}
+
+
+def server_sent_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def generation_done_event(handle: str) -> str:
+    return server_sent_event("done", {
+        "handle": handle,
+        "download_url": reverse("generated_resume_download", args=[handle]),
+        "format_urls": generated_resume_urls(handle),
+    })
+
+
+def generation_error_event(error: Exception) -> str:
+    return server_sent_event("error", {"error": f"Failed to generate resume: {str(error)}"})
+
+
+def event_stream_response(events: Iterable[str]) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop proxies from buffering the stream until it completes.
+    response["X-Accel-Buffering"] = "no"
+    return response
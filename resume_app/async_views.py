@@ -0,0 +1,241 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from resume_app.api_helpers import (
+    SERVER_SENT_HEARTBEAT,
+    batch_archive_response,
+    batch_postings,
+    batch_request_error,
+    batch_validation_error,
+    event_stream_response,
+    extraction_limit_response,
+    generated_resume_response,
+    generation_done_event,
+    generation_error_event,
+    generation_inputs,
+    resume_file_type,
+    save_validated_inputs,
+    server_sent_event,
+    unsupported_file_type_response,
+    unsupported_format_response,
+    validation_response_data,
+)
+from resume_app.services.async_openai_service import (
+    agenerate_rewritten_text,
+    astream_rewritten_resume,
+    avalidate_inputs,
+    avalidate_job_posting,
+    avalidate_resume,
+    avalidate_special_considerations,
+)
+from resume_app.services.batch_service import stream_batch_archive
+from resume_app.services.extraction_service import ExtractionLimitError
+from resume_app.services.metrics_service import request_id_var
+from resume_app.services.rendering_service import OUTPUT_FORMATS
+from resume_app.services.result_service import get_rendered_resume, store_generated_resume
+from resume_app.services.stream_service import aiterate_with_heartbeats
+from resume_app.upload_handlers import rejected_upload_response, resume_upload_handler
+
+# Async counterparts of the API views in views.py. They are routed in place of
+# the sync views when ASYNC_VIEWS is enabled, which is what the uvicorn worker
+# config (gunicorn.asgi.conf.py) does. Request parsing and responses come from
+# api_helpers; only the waits on OpenAI and the database differ.
+
+
+@resume_upload_handler
+async def validate_resume_api(request):
+    if request.method == "POST":
+        rejected = rejected_upload_response(request)
+        if rejected:
+            return rejected
+        uploaded_file = request.FILES.get("resume_file")
+        if not uploaded_file:
+            return JsonResponse({"error": "No file uploaded"}, status=400)
+
+        file_type = resume_file_type(uploaded_file)
+        if not file_type:
+            return unsupported_file_type_response(uploaded_file)
+
+        try:
+            result = await avalidate_resume(uploaded_file, file_type)
+        except ExtractionLimitError as e:
+            return extraction_limit_response(e)
+        return JsonResponse(await sync_to_async(validation_response_data)(
+            result, "extracted_text", request.POST.get("session_id"), "resume_text",
+        ))
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+async def validate_job_posting_api(request):
+    if request.method == "POST":
+        data = json.loads(request.body)
+        url = data.get("url")
+        if not url:
+            return JsonResponse({"error": "No URL provided."}, status=400)
+
+        result = await avalidate_job_posting(url)
+        return JsonResponse(await sync_to_async(validation_response_data)(
+            result, "job_posting_text", data.get("session_id"), "job_posting_text",
+        ))
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+async def validate_special_considerations_api(request):
+    if request.method == "POST":
+        data = json.loads(request.body)
+        text = data.get("text")
+        if not text:
+            return JsonResponse({"error": "No text provided."}, status=400)
+
+        result = await avalidate_special_considerations(text)
+        return JsonResponse(await sync_to_async(validation_response_data)(
+            result, "validated_data", data.get("session_id"), "considerations",
+        ))
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+@resume_upload_handler
+async def validate_inputs_api(request):
+    if request.method == "POST":
+        rejected = rejected_upload_response(request)
+        if rejected:
+            return rejected
+        uploaded_file = request.FILES.get("resume_file")
+        url = request.POST.get("url")
+        text = request.POST.get("text")
+        if not uploaded_file and not url and not text:
+            return JsonResponse({"error": "No input provided."}, status=400)
+
+        file_type = None
+        if uploaded_file:
+            file_type = resume_file_type(uploaded_file)
+            if not file_type:
+                return unsupported_file_type_response(uploaded_file)
+
+        try:
+            results = await avalidate_inputs(uploaded_file, file_type, url, text)
+        except ExtractionLimitError as e:
+            return extraction_limit_response(e)
+
+        return JsonResponse(await sync_to_async(save_validated_inputs)(request.POST.get("session_id"), results, text))
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+async def generate_resume_api(request):
+    if request.method == "POST":
+        inputs = await sync_to_async(generation_inputs)(json.loads(request.body))
+        if isinstance(inputs, HttpResponse):
+            return inputs
+        resume_text, job_posting_text, considerations = inputs
+
+        output_format = request.GET.get("format", "docx")
+        if output_format not in OUTPUT_FORMATS:
+            return unsupported_format_response(output_format)
+
+        try:
+            rewritten_text = await agenerate_rewritten_text(resume_text, job_posting_text, considerations)
+            handle = await sync_to_async(store_generated_resume)(rewritten_text)
+
+            # Rendering is CPU bound, keep it off the event loop.
+            content = await sync_to_async(get_rendered_resume, thread_sensitive=False)(
+                handle, output_format, lambda: rewritten_text,
+            )
+            return generated_resume_response(content, output_format, handle)
+        except Exception as e:
+            return JsonResponse({"error": f"Failed to generate resume: {str(e)}"}, status=500)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+async def generate_resume_stream_api(request):
+    if request.method == "POST":
+        inputs = await sync_to_async(generation_inputs)(json.loads(request.body))
+        if isinstance(inputs, HttpResponse):
+            return inputs
+        resume_text, job_posting_text, considerations = inputs
+
+        request_id = getattr(request, "request_id", "-")
+
+        async def event_stream():
+            request_id_var.set(request_id)
+            yield server_sent_event("start", {})
+            chunks = []
+            try:
+                async for chunk in aiterate_with_heartbeats(
+                        astream_rewritten_resume(resume_text, job_posting_text, considerations),
+                        settings.STREAM_HEARTBEAT_INTERVAL,
+                ):
+                    if chunk is None:
+                        yield SERVER_SENT_HEARTBEAT
+                        continue
+                    chunks.append(chunk)
+                    yield server_sent_event("chunk", chunk)
+
+                handle = await sync_to_async(store_generated_resume)("".join(chunks).strip())
+                yield generation_done_event(handle)
+            except Exception as e:
+                yield generation_error_event(e)
+
+        return event_stream_response(event_stream())
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+async def _iterate_in_thread(generator):
+    """
+    Consume a blocking generator from the event loop, one item at a time in a
+    worker thread. Django would otherwise read a sync streaming body to the end
+    before sending any of it.
+    """
+    next_item = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            item = await next_item(generator, None)
+            if item is None:
+                return
+            yield item
+    finally:
+        await sync_to_async(generator.close, thread_sensitive=False)()
+
+
+@resume_upload_handler
+async def batch_generate_resume_api(request):
+    if request.method == "POST":
+        rejected = rejected_upload_response(request)
+        if rejected:
+            return rejected
+        uploaded_file = request.FILES.get("resume_file")
+        urls = batch_postings(request)
+        text = request.POST.get("text")
+        error = batch_request_error(uploaded_file, urls, settings.BATCH_MAX_POSTINGS)
+        if error:
+            return error
+
+        try:
+            results = await avalidate_inputs(uploaded_file, resume_file_type(uploaded_file), None, text)
+        except ExtractionLimitError as e:
+            return extraction_limit_response(e)
+        error = batch_validation_error(results, text)
+        if error:
+            return error
+
+        resume_text = results["resume"]["validated_data"]
+        considerations = text or ""
+        request_id = getattr(request, "request_id", "-")
+
+        async def archive_stream():
+            request_id_var.set(request_id)
+            # The archive is written by the thread pool in batch_service.
+            async for chunk in _iterate_in_thread(stream_batch_archive(resume_text, urls, considerations)):
+                yield chunk
+
+        return batch_archive_response(archive_stream())
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
@@ -0,0 +1,135 @@
+import json
+import random
+from dataclasses import dataclass
+from typing import List
+
+FIRST_NAMES = ["Alex", "Jordan", "Priya", "Sam", "Taylor", "Wei", "Maria", "Chris", "Fatima", "Noah"]
+LAST_NAMES = ["Nguyen", "Garcia", "Smith", "Okafor", "Kowalski", "Chen", "Patel", "Johnson", "Silva", "Haddad"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Health", "Stark Industries", "Wayne Logistics",
+             "Hooli", "Vandelay Imports", "Soylent Foods", "Cyberdyne Systems"]
+ROLES = ["Software Engineer", "Senior Software Engineer", "Data Analyst", "Product Manager",
+         "DevOps Engineer", "Engineering Manager", "QA Engineer", "Backend Developer"]
+ACHIEVEMENTS = [
+    "Led the migration of the billing platform to Django, cutting page load times by {n}%.",
+    "Designed REST APIs consumed by {n} partner integrations and three mobile clients.",
+    "Mentored {n} engineers and introduced code review guidelines adopted team-wide.",
+    "Automated deployments with GitHub Actions, reducing release time by {n}%.",
+    "Built dashboards in SQL and Python that saved the operations team {n} hours a week.",
+    "Reduced cloud spend by {n}% by right-sizing instances and adding autoscaling.",
+    "Shipped a search feature used by {n}k customers within the first month.",
+    "Cut the support ticket backlog by {n}% by fixing the top recurring defects.",
+]
+SKILLS = ["Python", "Django", "PostgreSQL", "AWS", "Docker", "Kubernetes", "React", "TypeScript", "SQL",
+          "Terraform", "Redis", "Celery", "GraphQL", "CI/CD", "Linux"]
+
+
+@dataclass
+class CorpusDocument:
+    name: str
+    file_type: str
+    content: bytes
+    text: str
+
+
+def resume_text(seed: int, jobs: int = 4) -> str:
+    """
+    A plausible resume, different for every seed and identical for the same seed.
+    """
+    rng = random.Random(seed)
+    lines = [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        f"{rng.choice(ROLES)} | candidate{seed}@example.com | (555) 010-{seed % 10000:04d}",
+        "",
+        "Summary",
+        "Engineer with a track record of shipping reliable web products and leading small teams.",
+        "",
+        "Experience",
+    ]
+    for index in range(jobs):
+        end_year = 2024 - index * 3
+        lines.extend([
+            "",
+            f"{rng.choice(ROLES)}, {rng.choice(COMPANIES)}",
+            f"{end_year - 3} - {end_year if index else 'Present'}",
+        ])
+        lines.extend(f"- {achievement.format(n=rng.randint(5, 60))}"
+                     for achievement in rng.sample(ACHIEVEMENTS, 4))
+    lines.extend([
+        "",
+        "Education",
+        "B.S. Computer Science, State University",
+        "",
+        "Skills",
+        ", ".join(rng.sample(SKILLS, 8)),
+    ])
+    return "\n".join(lines)
+
+
+def rewritten_resume_text(length: int) -> str:
+    """
+    Model-style rewritten resume text of roughly `length` characters.
+    """
+    rng = random.Random(length)
+    sections = []
+    index = 0
+    while sum(len(section) for section in sections) < length:
+        bullets = "\n".join(f"- {achievement.format(n=rng.randint(5, 60))}"
+                            for achievement in rng.sample(ACHIEVEMENTS, 4))
+        sections.append(f"**Company: {COMPANIES[index % len(COMPANIES)]}**\n{rng.choice(ROLES)}\n{bullets}\n")
+        index += 1
+    return "\n".join(sections)[:length]
+
+
+def job_posting_html(posting_id: int) -> str:
+    """
+    A job posting page with the usual navigation chrome and an embedded JSON-LD JobPosting.
+    """
+    rng = random.Random(posting_id)
+    title = rng.choice(ROLES)
+    company = rng.choice(COMPANIES)
+    description = "<p>We are hiring a {title} to join our platform team.</p><ul>{items}</ul>".format(
+        title=title,
+        items="".join(f"<li>Experience with {skill}.</li>" for skill in rng.sample(SKILLS, 6)),
+    )
+    json_ld = json.dumps({
+        "@context": "https://schema.org",
+        "@type": "JobPosting",
+        "title": title,
+        "description": description,
+        "hiringOrganization": {"@type": "Organization", "name": company},
+    })
+    return (
+        f"<!DOCTYPE html><html><head><title>{title} at {company}</title>"
+        f'<script type="application/ld+json">{json_ld}</script></head><body>'
+        "<nav><a href='/'>Home</a><a href='/jobs'>Jobs</a></nav>"
+        f"<main><h1>{title}</h1>{description}<p>Apply by emailing jobs@example.com.</p></main>"
+        "<footer>Copyright Example Careers</footer></body></html>"
+    )
+
+
+def _pdf_bytes(text: str) -> bytes:
+    import fitz
+
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_textbox(fitz.Rect(54, 54, 558, 738), text, fontsize=9)
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+def build_corpus(size: int) -> List[CorpusDocument]:
+    """
+    Build `size` resumes of each file type the app accepts: PDF, DOCX and TXT.
+    """
+    from resume_app.services.rendering_service import render_resume_docx
+
+    documents = []
+    for seed in range(size):
+        text = resume_text(seed)
+        documents.extend([
+            CorpusDocument(f"resume_{seed}.pdf", "pdf", _pdf_bytes(text), text),
+            CorpusDocument(f"resume_{seed}.docx", "docx", render_resume_docx(text), text),
+            CorpusDocument(f"resume_{seed}.txt", "txt", text.encode("utf-8"), text),
+        ])
+    return documents
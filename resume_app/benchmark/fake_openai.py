@@ -0,0 +1,176 @@
+import json
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Tuple
+
+from resume_app.benchmark.corpus import job_posting_html, rewritten_resume_text
+
+BATCH_FIELD_REGEX = re.compile(r"^\[(\w+)\]$", re.MULTILINE)
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class FakeOpenAIConfig:
+    """
+    How the stand-in behaves. Every completion takes `latency` seconds before its
+    first token, then produces tokens at `tokens_per_second`.
+    """
+    latency: float = 0.3
+    tokens_per_second: float = 80.0
+    completion_tokens: int = 600
+    error_rate: float = 0.0
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    A local, OpenAI compatible chat completions endpoint for benchmarks. It also
+    serves job posting pages under /jobs/<id>, so URL validation needs no network.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: FakeOpenAIConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._error_budget = 0.0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def should_fail(self) -> bool:
+        """
+        Fail an even share of requests, error_rate of them, so runs are repeatable.
+        """
+        with self._lock:
+            self._error_budget += self.config.error_rate
+            if self._error_budget >= 1:
+                self._error_budget -= 1
+                return True
+            return False
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True)
+        thread.start()
+        return thread
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeOpenAIServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        match = re.match(r"^/jobs/(\d+)", self.path)
+        if not match:
+            self._send_json(404, {"error": {"message": "Not found."}})
+            return
+        self.server.count("job_posting")
+        body = job_posting_html(int(match.group(1))).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        # Read the body first so an error reply leaves the connection usable.
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found."}})
+            return
+        request = json.loads(body)
+        config = self.server.config
+        if self.server.should_fail():
+            self.server.count("error")
+            time.sleep(config.latency)
+            self._send_json(503, {"error": {"message": "The stand-in is failing on purpose.", "type": "server_error"}})
+            return
+
+        content, kind = _completion_content(request, config)
+        self.server.count(kind)
+        prompt_tokens = sum(len(message.get("content") or "") for message in request["messages"]) // CHARS_PER_TOKEN
+        completion_tokens = max(1, len(content) // CHARS_PER_TOKEN)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        time.sleep(config.latency)
+        if request.get("stream"):
+            self._stream(request, content, usage)
+            return
+
+        # Non-streaming answers still take as long as producing every token.
+        time.sleep(completion_tokens / config.tokens_per_second)
+        self._send_json(200, _completion(request, {"message": {"role": "assistant", "content": content}}, usage))
+
+    def _stream(self, request: dict, content: str, usage: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        delay = 1 / self.server.config.tokens_per_second
+        for token in _tokens(content):
+            chunk = _completion(request, {"delta": {"content": token}}, None, "chat.completion.chunk")
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(delay)
+        if (request.get("stream_options") or {}).get("include_usage"):
+            chunk = _completion(request, None, usage, "chat.completion.chunk")
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+def _tokens(content: str) -> Iterator[str]:
+    for start in range(0, len(content), CHARS_PER_TOKEN):
+        yield content[start:start + CHARS_PER_TOKEN]
+
+
+def _completion_content(request: dict, config: FakeOpenAIConfig) -> Tuple[str, str]:
+    """
+    :return: The answer the app expects for this kind of request, and the kind.
+    """
+    if (request.get("response_format") or {}).get("type") == "json_object":
+        fields = BATCH_FIELD_REGEX.findall(request["messages"][-1]["content"])
+        return json.dumps({field: "yes" for field in fields}), "validate_batch"
+    if request.get("max_tokens", 0) <= 10:
+        return "yes", "validate"
+    tokens = min(config.completion_tokens, request.get("max_tokens") or config.completion_tokens)
+    return rewritten_resume_text(tokens * CHARS_PER_TOKEN), "generate"
+
+
+def _completion(request: dict, choice, usage, object_name: str = "chat.completion") -> dict:
+    data = {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": object_name,
+        "created": int(time.time()),
+        "model": request.get("model", ""),
+        "choices": [],
+        "usage": usage,
+    }
+    if choice is not None:
+        data["choices"] = [{"index": 0, "finish_reason": "stop", "logprobs": None, **choice}]
+    return data
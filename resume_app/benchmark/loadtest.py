@@ -0,0 +1,290 @@
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+from django.conf import settings
+
+from resume_app.benchmark.corpus import CorpusDocument, resume_text
+
+WORKER_CLASSES = {
+    "gthread": ("gunicorn.conf.py", "resume_righter.wsgi"),
+    "uvicorn": ("gunicorn.asgi.conf.py", "resume_righter.asgi"),
+}
+ENDPOINTS = (
+    "validate-resume", "validate-job-posting", "validate-special-considerations", "validate", "generate-resume",
+    "generate-resume-stream",
+)
+
+
+@dataclass
+class EndpointResult:
+    endpoint: str
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        latencies = np.array(self.latencies or [0.0]) * 1000
+        requests = len(self.latencies)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "throughput_rps": requests / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p90_ms": float(np.percentile(latencies, 90)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "max_ms": float(latencies.max()),
+        }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _child_pids(parent_pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces, so split after its closing parenthesis.
+                fields = stat.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return children
+
+
+class MemorySampler(threading.Thread):
+    """
+    Records the peak resident memory of each gunicorn worker while a run is in progress.
+    """
+
+    def __init__(self, master_pid: int, interval: float = 0.25):
+        super().__init__(name="memory-sampler", daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peak_rss: Dict[int, int] = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            for pid in _child_pids(self.master_pid):
+                self.peak_rss[pid] = max(self.peak_rss.get(pid, 0), _rss_bytes(pid))
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> Dict[int, int]:
+        self._stop_event.set()
+        self.join()
+        return self.peak_rss
+
+
+class AppServer:
+    """
+    The app under gunicorn in a subprocess, wired to the stand-in OpenAI server
+    and to a throwaway database and cache, lock and rate limit directories.
+    """
+
+    def __init__(self, worker_class: str, workers: int, threads: Optional[int], fake_openai_url: str,
+                 work_dir: str, use_cache: bool):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config_file, application = WORKER_CLASSES[worker_class]
+        command = [
+            sys.executable, "-m", "gunicorn", "--config", os.path.join(settings.BASE_DIR, config_file),
+            "--bind", f"127.0.0.1:{self.port}", "--workers", str(workers),
+        ]
+        if threads:
+            command.extend(["--threads", str(threads)])
+        command.append(application)
+
+        env = dict(os.environ)
+        env.pop("ENVIRONMENT", None)
+        env.update({
+            "WEB_CONCURRENCY": str(workers),
+            "OPENAI_API_KEY": "loadtest",
+            "OPENAI_BASE_URL": f"{fake_openai_url}/v1",
+            "JOB_POSTING_ALLOW_PRIVATE_HOSTS": "true",
+            "GENERATION_WORKER_THREADS": "0",
+            # The client side limits would measure themselves rather than the app.
+            "OPENAI_DEFAULT_REQUESTS_PER_MINUTE": "0",
+            "OPENAI_DEFAULT_TOKENS_PER_MINUTE": "0",
+            "OPENAI_RATE_LIMIT_DB": os.path.join(work_dir, "ratelimit.sqlite3"),
+            "CACHE_LOCATION": os.path.join(work_dir, "cache"),
+            "COMPLETION_CACHE_LOCATION": os.path.join(work_dir, "completions"),
+            "JOB_POSTING_CACHE_DIR": os.path.join(work_dir, "job_postings"),
+            "GENERATION_SINGLE_FLIGHT_DIR": os.path.join(work_dir, "single_flight"),
+            "EXTRACTION_CACHE_DB": os.path.join(work_dir, "extractions.sqlite3"),
+            "METRICS_DB": os.path.join(work_dir, "metrics.sqlite3"),
+            "DATABASE_PATH": os.path.join(work_dir, "db.sqlite3"),
+            "LOG_LEVEL": "WARNING",
+        })
+        if not use_cache:
+            env.update({"OPENAI_CACHE_BACKEND": "memory", "OPENAI_CACHE_TTL": "0", "EXTRACTION_CACHE_MAX_BYTES": "0"})
+
+        self.log_path = os.path.join(work_dir, "gunicorn.log")
+        self._log_file = open(self.log_path, "wb")
+        # The validation endpoints keep their inputs in a resume session.
+        subprocess.run(
+            [sys.executable, "manage.py", "migrate", "--no-input"],
+            env=env, cwd=settings.BASE_DIR, stdout=self._log_file, stderr=subprocess.STDOUT, check=True,
+        )
+        self.process = subprocess.Popen(
+            command, env=env, cwd=settings.BASE_DIR, stdout=self._log_file, stderr=subprocess.STDOUT,
+        )
+
+    def wait_until_ready(self, timeout: float = 60) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {self.process.returncode}, see {self.log_path}")
+            try:
+                httpx.get(self.url + "/", headers={"Host": "localhost"}, timeout=2)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.25)
+        raise RuntimeError(f"gunicorn did not start within {timeout}s, see {self.log_path}")
+
+    def stop(self) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log_file.close()
+
+
+class LoadDriver:
+    """
+    Drives the API endpoints the way the browser does, CSRF token included.
+    """
+
+    def __init__(self, base_url: str, fake_openai_url: str, corpus: List[CorpusDocument], concurrency: int,
+                 timeout: float = 120):
+        self.fake_openai_url = fake_openai_url
+        self.corpus = corpus
+        self.concurrency = concurrency
+        self.client = httpx.Client(
+            base_url=base_url,
+            headers={"Host": "localhost"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self.client.get("/")
+        self.client.headers["X-CSRFToken"] = self.client.cookies.get("csrftoken", "")
+        self._counter = itertools.count()
+
+    def _request(self, endpoint: str) -> httpx.Response:
+        index = next(self._counter)
+        if endpoint == "validate-resume":
+            document = self.corpus[index % len(self.corpus)]
+            return self.client.post("/api/validate-resume/", files={
+                "resume_file": (document.name, document.content),
+            })
+        if endpoint == "validate-job-posting":
+            # A fresh query string per request keeps the job posting cache out of the measurement.
+            return self.client.post("/api/validate-job-posting/", json={
+                "url": f"{self.fake_openai_url}/jobs/{index % 50}?request={index}",
+            })
+        if endpoint == "validate-special-considerations":
+            return self.client.post("/api/validate-special-considerations/", json={
+                "text": f"Emphasize leadership and cloud cost savings. Request {index}.",
+            })
+        if endpoint == "validate":
+            # All three inputs at once, as the page sends them.
+            document = self.corpus[index % len(self.corpus)]
+            return self.client.post("/api/validate/", files={
+                "resume_file": (document.name, document.content),
+            }, data={
+                "url": f"{self.fake_openai_url}/jobs/{index % 50}?request={index}",
+                "text": f"Emphasize leadership and cloud cost savings. Request {index}.",
+            })
+        if endpoint in ("generate-resume", "generate-resume-stream"):
+            path = "/api/generate-resume/stream/" if endpoint == "generate-resume-stream" else "/api/generate-resume/"
+            # The streamed response is read to the end, so its latency is that of the whole resume.
+            return self.client.post(path, json={
+                "resume_text": resume_text(index % 20),
+                "job_posting_text": f"Senior Software Engineer at Acme Corp. Python, Django, AWS. Opening {index}.",
+                "considerations": f"Request {index}.",
+            })
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+    @staticmethod
+    def _succeeded(endpoint: str, response: httpx.Response) -> bool:
+        if response.status_code != 200:
+            return False
+        if endpoint == "generate-resume-stream":
+            # Failures are reported in the stream, after the 200.
+            return "event: done\n" in response.text
+        return True
+
+    def run(self, endpoint: str, requests: int, progress: Callable[[str], None] = lambda message: None) -> EndpointResult:
+        result = EndpointResult(endpoint)
+        lock = threading.Lock()
+
+        def one_request(_):
+            start = time.perf_counter()
+            try:
+                ok = self._succeeded(endpoint, self._request(endpoint))
+            except httpx.HTTPError:
+                ok = False
+            latency = time.perf_counter() - start
+            with lock:
+                if ok:
+                    result.latencies.append(latency)
+                else:
+                    result.errors += 1
+
+        progress(f"{endpoint}: {requests} requests at concurrency {self.concurrency}")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(one_request, range(requests)))
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                        max_regression: float) -> List[str]:
+    """
+    :return: A description of every endpoint whose p90 latency or throughput is
+             more than max_regression (a fraction) worse than in the baseline.
+    """
+    regressions = []
+    for endpoint, summary in results.items():
+        previous = baseline.get(endpoint)
+        if not previous:
+            continue
+        if previous["p90_ms"] and summary["p90_ms"] > previous["p90_ms"] * (1 + max_regression):
+            regressions.append(f"{endpoint}: p90 {previous['p90_ms']:.0f}ms -> {summary['p90_ms']:.0f}ms")
+        if previous["throughput_rps"] and summary["throughput_rps"] < previous["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{endpoint}: throughput {previous['throughput_rps']:.1f} -> {summary['throughput_rps']:.1f} req/s"
+            )
+    return regressions
@@ -0,0 +1,83 @@
+import statistics
+import time
+import tracemalloc
+from io import BytesIO
+
+import docx
+from django.core.management.base import BaseCommand
+
+from resume_app.benchmark.corpus import build_corpus, resume_text
+from resume_app.services.docx_extraction_service import read_docx_content
+from resume_app.services.rendering_service import render_resume_docx
+
+
+def extract_python_docx(data: bytes) -> str:
+    """
+    The previous extractor: the top level body paragraphs of a python-docx Document.
+    """
+    document = docx.Document(BytesIO(data))
+    return "\n".join(paragraph.text for paragraph in document.paragraphs)
+
+
+def extract_stream(data: bytes) -> str:
+    return read_docx_content(BytesIO(data)).to_text()
+
+
+def layout_resume_docx(seed: int) -> bytes:
+    """
+    A resume laid out the way many templates do it: the name in the page header
+    and each job in a two-column table of dates and details.
+    """
+    lines = resume_text(seed).splitlines()
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = lines[0]
+    table = document.add_table(rows=0, cols=2)
+    for block in "\n".join(lines[1:]).split("\n\n"):
+        block_lines = block.splitlines()
+        cells = table.add_row().cells
+        cells[0].text = block_lines[0]
+        cells[1].text = "\n".join(block_lines[1:])
+    stream = BytesIO()
+    document.save(stream)
+    return stream.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Compare .docx text extraction time, peak memory and text recovered for python-docx and the streaming extractor."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Passes over the corpus per extractor.")
+        parser.add_argument("--corpus-size", type=int, default=10, help="Resumes per layout.")
+        parser.add_argument("--large-jobs", type=int, default=2000, help="Jobs in the one very large resume.")
+
+    def handle(self, *args, **options):
+        corpus = {
+            "paragraphs": [document.content for document in build_corpus(options["corpus_size"])
+                           if document.file_type == "docx"],
+            "tables+header": [layout_resume_docx(seed) for seed in range(options["corpus_size"])],
+            "large": [render_resume_docx(resume_text(0, jobs=options["large_jobs"]))],
+        }
+
+        self.stdout.write(f"{'corpus':15}{'extractor':13}{'mean':>10}{'p95':>10}{'peak mem':>11}{'chars':>9}")
+        for corpus_name, documents in corpus.items():
+            for name, extract in (("python-docx", extract_python_docx), ("stream", extract_stream)):
+                chars = sum(len(extract(data)) for data in documents)
+                timings = []
+                for _ in range(options["iterations"] if corpus_name != "large" else max(1, options["iterations"] // 10)):
+                    for data in documents:
+                        start = time.perf_counter()
+                        extract(data)
+                        timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+
+                tracemalloc.start()
+                for data in documents:
+                    extract(data)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{corpus_name:15}{name:13}{statistics.mean(timings):>8.2f}ms"
+                    f"{timings[max(int(len(timings) * 0.95) - 1, 0)]:>8.2f}ms"
+                    f"{peak / 2 ** 20:>8.1f}MiB{chars:>9}"
+                )
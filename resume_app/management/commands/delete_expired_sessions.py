@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from resume_app.services.session_service import delete_expired_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete resume sessions older than RESUME_SESSION_TTL. Meant to run periodically."
+
+    def handle(self, *args, **options):
+        deleted = delete_expired_sessions()
+        self.stdout.write(f"Deleted {deleted} expired resume sessions.")
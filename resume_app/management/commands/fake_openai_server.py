@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from resume_app.benchmark.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the local OpenAI stand-in used by `loadtest`, for manual runs. Point the "
+        "app at it with OPENAI_BASE_URL=http://<host>:<port>/v1."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8089)
+        parser.add_argument("--latency", type=float, default=0.3, help="Seconds before the first token.")
+        parser.add_argument("--tokens-per-second", type=float, default=80.0)
+        parser.add_argument("--completion-tokens", type=int, default=600, help="Tokens per generated resume.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls that fail with 503.")
+
+    def handle(self, *args, **options):
+        server = FakeOpenAIServer((options["host"], options["port"]), FakeOpenAIConfig(
+            latency=options["latency"],
+            tokens_per_second=options["tokens_per_second"],
+            completion_tokens=options["completion_tokens"],
+            error_rate=options["error_rate"],
+        ))
+        self.stdout.write(f"OpenAI stand-in listening on {server.url}/v1, job postings under {server.url}/jobs/<id>")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,120 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_app.benchmark.corpus import build_corpus
+from resume_app.benchmark.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+from resume_app.benchmark.loadtest import (
+    ENDPOINTS,
+    WORKER_CLASSES,
+    AppServer,
+    LoadDriver,
+    MemorySampler,
+    compare_to_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the API under gunicorn against a local OpenAI stand-in, reporting "
+        "throughput, latency percentiles and peak memory per worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--worker-class", choices=sorted(WORKER_CLASSES), default="gthread",
+                            help="gthread uses gunicorn.conf.py, uvicorn uses gunicorn.asgi.conf.py.")
+        parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes.")
+        parser.add_argument("--threads", type=int, help="Threads per gthread worker (default: from the config).")
+        parser.add_argument("--url", help="Load test an already running server instead of starting gunicorn.")
+        parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once.")
+        parser.add_argument("--corpus-size", type=int, default=5, help="Resumes per file type (PDF, DOCX, TXT).")
+        parser.add_argument("--latency", type=float, default=0.3, help="Stand-in seconds before the first token.")
+        parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Stand-in token rate.")
+        parser.add_argument("--completion-tokens", type=int, default=600, help="Tokens per generated resume.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stand-in calls that fail with 503.")
+        parser.add_argument("--cache", action="store_true", help="Leave the completion and extraction caches enabled.")
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+        parser.add_argument("--baseline", help="Compare against the JSON written by an earlier --output run.")
+        parser.add_argument("--max-regression", type=float, default=0.2,
+                            help="Fail if p90 or throughput is this fraction worse than the baseline.")
+
+    def handle(self, *args, **options):
+        fake_openai = FakeOpenAIServer(("127.0.0.1", 0), FakeOpenAIConfig(
+            latency=options["latency"],
+            tokens_per_second=options["tokens_per_second"],
+            completion_tokens=options["completion_tokens"],
+            error_rate=options["error_rate"],
+        ))
+        fake_openai.start_in_thread()
+        self.stdout.write(f"OpenAI stand-in listening on {fake_openai.url}")
+        corpus = build_corpus(options["corpus_size"])
+
+        work_dir = tempfile.mkdtemp(prefix="resume_righter_loadtest_")
+        app_server = sampler = None
+        try:
+            if options["url"]:
+                base_url = options["url"].rstrip("/")
+            else:
+                app_server = AppServer(
+                    options["worker_class"], options["workers"], options["threads"], fake_openai.url,
+                    work_dir, options["cache"],
+                )
+                app_server.wait_until_ready()
+                base_url = app_server.url
+                sampler = MemorySampler(app_server.process.pid)
+                sampler.start()
+                self.stdout.write(f"gunicorn ({options['worker_class']}) on {base_url}, log: {app_server.log_path}")
+
+            driver = LoadDriver(base_url, fake_openai.url, corpus, options["concurrency"])
+            results = {}
+            try:
+                for endpoint in options["endpoints"]:
+                    results[endpoint] = driver.run(endpoint, options["requests"], self.stdout.write).summary()
+            finally:
+                driver.close()
+            peak_rss = sampler.stop() if sampler else {}
+        finally:
+            if app_server:
+                app_server.stop()
+            fake_openai.shutdown()
+
+        self._report(results, peak_rss, fake_openai.requests)
+        report = {
+            "options": {name: options[name] for name in (
+                "worker_class", "workers", "threads", "concurrency", "requests", "latency", "tokens_per_second",
+                "completion_tokens", "error_rate", "cache",
+            )},
+            "endpoints": results,
+            "peak_rss_mb": {str(pid): rss / 2 ** 20 for pid, rss in peak_rss.items()},
+            "openai_requests": fake_openai.requests,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)["endpoints"]
+            regressions = compare_to_baseline(results, baseline, options["max_regression"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def _report(self, results, peak_rss, openai_requests):
+        self.stdout.write("")
+        self.stdout.write(f"{'endpoint':34}{'reqs':>6}{'errs':>6}{'req/s':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+        for endpoint, summary in results.items():
+            self.stdout.write(
+                f"{endpoint:34}{summary['requests']:>6}{summary['errors']:>6}{summary['throughput_rps']:>9.1f}"
+                f"{summary['p50_ms']:>7.0f}ms{summary['p90_ms']:>7.0f}ms{summary['p99_ms']:>7.0f}ms"
+                f"{summary['max_ms']:>7.0f}ms"
+            )
+        if peak_rss:
+            self.stdout.write("")
+            for pid, rss in sorted(peak_rss.items()):
+                self.stdout.write(f"worker {pid}: peak RSS {rss / 2 ** 20:.1f} MiB")
+        self.stdout.write(f"\nOpenAI stand-in requests: {openai_requests}")
@@ -0,0 +1,80 @@
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# A line of `python -X importtime` output: self and cumulative microseconds, then
+# the module name, indented by two spaces per level of nesting.
+IMPORT_TIME_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+# What a preloaded gunicorn master imports before forking the workers.
+WARM_UP_SCRIPT = "import django; django.setup(); from resume_app.startup import warm_up; warm_up()"
+# What a worker without preload_app imports on its first request.
+URLCONF_SCRIPT = "import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns"
+
+
+def parse_import_times(output: str):
+    """
+    :param output: The stderr of a `python -X importtime` run.
+    :return: (self time in ms by module, total import time in ms).
+    """
+    self_times = {}
+    total = 0.0
+    for line in output.splitlines():
+        match = IMPORT_TIME_REGEX.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        self_times[name] = self_times.get(name, 0.0) + int(self_us) / 1000
+        if not indent:
+            total += int(cumulative_us) / 1000
+    return self_times, total
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the import time of a worker boot per package (or module) and fail if the total is over "
+        "STARTUP_IMPORT_BUDGET_MS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--budget-ms", type=float, default=settings.STARTUP_IMPORT_BUDGET_MS,
+            help="Total import time allowed, in milliseconds. 0 only reports.",
+        )
+        parser.add_argument("--top", type=int, default=15, help="How many packages or modules to list.")
+        parser.add_argument("--modules", action="store_true", help="List modules instead of top level packages.")
+        parser.add_argument(
+            "--urlconf-only", action="store_true",
+            help="Only load the URLconf, as a worker without preload_app does on its first request, "
+                 "instead of the full preload warm-up.",
+        )
+
+    def handle(self, *args, **options):
+        script = URLCONF_SCRIPT if options["urlconf_only"] else WARM_UP_SCRIPT
+        # A fresh interpreter, since this one has already imported most of the app.
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        self_times, total = parse_import_times(result.stderr)
+        if not options["modules"]:
+            packages = defaultdict(float)
+            for name, milliseconds in self_times.items():
+                packages[name.split(".")[0]] += milliseconds
+            self_times = packages
+
+        self.stdout.write(f"{'package' if not options['modules'] else 'module':50}{'self':>10}{'share':>8}")
+        for name, milliseconds in sorted(self_times.items(), key=lambda item: item[1], reverse=True)[:options["top"]]:
+            self.stdout.write(f"{name:50}{milliseconds:>8.1f}ms{milliseconds / total if total else 0:>8.1%}")
+        self.stdout.write(f"{'total':50}{total:>8.1f}ms")
+
+        budget = options["budget_ms"]
+        if budget > 0 and total > budget:
+            raise CommandError(f"Startup imports took {total:.0f}ms, over the {budget:.0f}ms budget.")
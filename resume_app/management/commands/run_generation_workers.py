@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from resume_app.services.job_service import GenerationWorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run background workers that process queued resume generation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Number of worker threads to run in this process.",
+        )
+
+    def handle(self, *args, **options):
+        pool = GenerationWorkerPool(options["threads"], settings.GENERATION_WORKER_POLL_INTERVAL)
+        self.stdout.write(f"Starting {pool.size} generation worker threads ({pool.worker_id}).")
+        try:
+            pool.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping generation workers.")
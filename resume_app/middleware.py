@@ -0,0 +1,76 @@
+import logging
+import time
+import uuid
+
+from django.utils.deprecation import MiddlewareMixin
+
+from resume_app.services.metrics_service import registry, request_duration, request_id_var, requests_in_flight
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware(MiddlewareMixin):
+    """
+    Tags each request with the Heroku router's X-Request-Id (or a fresh one), so
+    that every log line written while handling it carries the id, and records
+    per-view latency and in-flight metrics. A streamed response is timed until
+    its body has been sent.
+    """
+
+    def process_request(self, request):
+        registry.start_flushing()
+        request.request_id = request.META.get("HTTP_X_REQUEST_ID") or uuid.uuid4().hex
+        request_id_var.set(request.request_id)
+        request.metrics_started_at = time.perf_counter()
+        request.metrics_view = None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = request.resolver_match.url_name or view_func.__name__
+        requests_in_flight.inc(view=request.metrics_view)
+
+    def process_response(self, request, response):
+        if hasattr(request, "request_id"):
+            response["X-Request-Id"] = request.request_id
+
+        if not response.streaming:
+            self._record(request, response)
+        elif response.is_async:
+            response.streaming_content = self._arecord_when_sent(request, response, response.streaming_content)
+        else:
+            response.streaming_content = self._record_when_sent(request, response, response.streaming_content)
+        request_id_var.set("-")
+        return response
+
+    def _record_when_sent(self, request, response, content):
+        try:
+            yield from content
+        finally:
+            self._record_sent(request, response)
+
+    async def _arecord_when_sent(self, request, response, content):
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            self._record_sent(request, response)
+
+    def _record_sent(self, request, response):
+        # The server sends the body after process_response has cleared the request id.
+        request_id_var.set(getattr(request, "request_id", "-"))
+        try:
+            self._record(request, response)
+        finally:
+            request_id_var.set("-")
+
+    def _record(self, request, response):
+        view = getattr(request, "metrics_view", None)
+        if view is not None:
+            requests_in_flight.dec(view=view)
+
+        started_at = getattr(request, "metrics_started_at", None)
+        if started_at is not None:
+            elapsed = time.perf_counter() - started_at
+            request_duration.observe(elapsed, view=view or "unresolved", method=request.method,
+                                     status=response.status_code)
+            logger.info("request method=%s path=%s view=%s status=%s duration=%.1fms",
+                        request.method, request.path, view or "-", response.status_code, elapsed * 1000)
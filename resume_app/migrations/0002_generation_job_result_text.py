@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-17 21:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='generationjob',
+            name='result',
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='result_text',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
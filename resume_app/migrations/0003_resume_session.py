@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-17 22:08
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_app', '0002_generation_job_result_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('resume_data', models.BinaryField(blank=True, null=True)),
+                ('job_posting_data', models.BinaryField(blank=True, null=True)),
+                ('considerations_data', models.BinaryField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_app', '0003_resume_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
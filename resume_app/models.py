@@ -1,3 +1,95 @@
+import uuid
+import zlib
+from typing import Optional
+
 from django.db import models
 
-# Create your models here.
+SESSION_COMPRESSION_LEVEL = 6
+
+
+class GenerationJob(models.Model):
+    """
+    A resume generation queued for the background workers in services/job_service.py.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED, db_index=True)
+    resume_text = models.TextField()
+    job_posting_text = models.TextField()
+    considerations = models.TextField(blank=True, default="")
+    # The rewritten text; files are rendered from it on download.
+    result_text = models.TextField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # How many times a worker has claimed the job.
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class ResumeSession(models.Model):
+    """
+    The validated inputs of one browser session, kept server side so later calls
+    refer to them by id instead of sending the texts again. The texts are stored
+    zlib-compressed; read and write them through the *_text properties.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    resume_data = models.BinaryField(null=True, blank=True)
+    job_posting_data = models.BinaryField(null=True, blank=True)
+    considerations_data = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Sessions expire RESUME_SESSION_TTL seconds after they were last saved.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return str(self.id)
+
+    @property
+    def resume_text(self) -> Optional[str]:
+        return _decompress(self.resume_data)
+
+    @resume_text.setter
+    def resume_text(self, value: Optional[str]) -> None:
+        self.resume_data = _compress(value)
+
+    @property
+    def job_posting_text(self) -> Optional[str]:
+        return _decompress(self.job_posting_data)
+
+    @job_posting_text.setter
+    def job_posting_text(self, value: Optional[str]) -> None:
+        self.job_posting_data = _compress(value)
+
+    @property
+    def considerations(self) -> Optional[str]:
+        return _decompress(self.considerations_data)
+
+    @considerations.setter
+    def considerations(self, value: Optional[str]) -> None:
+        self.considerations_data = _compress(value)
+
+
+def _compress(text: Optional[str]) -> Optional[bytes]:
+    if text is None:
+        return None
+    return zlib.compress(text.encode("utf-8"), SESSION_COMPRESSION_LEVEL)
+
+
+def _decompress(data) -> Optional[str]:
+    if data is None:
+        return None
+    # Some database backends hand binary columns back as memoryview.
+    return zlib.decompress(bytes(data)).decode("utf-8")
@@ -0,0 +1,413 @@
+import asyncio
+import json
+import logging
+import weakref
+from io import BytesIO
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+import httpx
+import openai
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from resume_app.services.cache_service import get_completion_cache
+from resume_app.services.openai_service import (
+    INVALID_RESULT,
+    DeltaStripper,
+    batch_yes_no_request,
+    build_yes_no_messages,
+    completion_cache_key,
+    generation_key,
+    parse_yes_no_answer,
+    prepare_input_validation,
+    render_resume_docx,
+    resume_footer,
+    resume_request,
+    section_cache_key,
+    section_request,
+    split_for_generation,
+)
+from resume_app.services.extraction_service import ExtractionLimitError
+from resume_app.services.metrics_service import openai_in_flight, record_token_usage, stage_timer
+from resume_app.services.ratelimit_service import acall_with_limits
+from resume_app.services.routing_service import acall_routed, preferred_model
+from resume_app.services.section_service import ResumeSplit
+from resume_app.services.singleflight_service import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+# httpx connection pools are bound to the event loop that created them, so the
+# shared client and its concurrency limit are kept per loop. Under uvicorn that
+# means exactly one of each per worker.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """
+    Return the connection pooled AsyncOpenAI client for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=settings.OPENAI_TIMEOUT,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENT_REQUESTS)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def _create_completion(call: str, **kwargs):
+    """
+    Async counterpart of openai_service.create_completion, limited to
+    OPENAI_MAX_CONCURRENT_REQUESTS completions per event loop and subject to
+    the same model routing, shared rate limit, retries and circuit breaker.
+    Streaming completions are returned as an async iterator over their chunks.
+    """
+    if kwargs.get("stream"):
+        kwargs["stream_options"] = {"include_usage": True}
+        return _ainstrumented_stream(call, kwargs)
+    return (await _acreate_routed_completion(call, kwargs))[1]
+
+
+async def _acreate_routed_completion(call: str, kwargs: dict) -> Tuple[str, Any]:
+    """
+    :return: The model that answered and its completion.
+    """
+    async with _get_semaphore():
+        openai_in_flight.inc(call=call)
+        try:
+            with stage_timer(f"openai_{call}"):
+                model, response = await acall_routed(call, kwargs, _send_completion)
+        finally:
+            openai_in_flight.dec(call=call)
+    record_token_usage(model, call, response.usage)
+    return model, response
+
+
+async def _ainstrumented_stream(
+        call: str, kwargs: dict, on_route: Optional[Callable[[str], None]] = None
+) -> AsyncIterator:
+    # Holds a slot of the concurrency limit until the stream is finished.
+    async with _get_semaphore():
+        openai_in_flight.inc(call=call)
+        try:
+            with stage_timer(f"openai_{call}"):
+                model, stream = await acall_routed(call, kwargs, _send_completion)
+                if on_route is not None:
+                    on_route(model)
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        record_token_usage(model, call, chunk.usage)
+                    yield chunk
+        finally:
+            openai_in_flight.dec(call=call)
+
+
+async def _send_completion(kwargs: dict, on_success: Callable[[float], None]):
+    return await acall_with_limits(
+        kwargs["model"], kwargs, lambda: get_async_client().chat.completions.create(**kwargs), on_success,
+    )
+
+
+async def acached_completion(
+        call: str,
+        kwargs: dict,
+        parse: Callable[[Any], str],
+        cache_key: Callable[[str, dict], str] = completion_cache_key,
+) -> str:
+    """
+    Async version of openai_service.cached_completion, sharing the same cache entries.
+    """
+    completion_cache = get_completion_cache()
+    value = await completion_cache.aget(cache_key(preferred_model(call, kwargs), kwargs))
+    if value is None:
+        model, response = await _acreate_routed_completion(call, kwargs)
+        value = parse(response)
+        await completion_cache.aset(cache_key(model, kwargs), value)
+    return value
+
+
+async def _acached_yes_no_answer(prompts: tuple, subject: str) -> str:
+    """
+    Async counterpart of openai_service._cached_yes_no_answer, sharing the same cache entries.
+    """
+    return await acached_completion(
+        "validate",
+        dict(messages=build_yes_no_messages(prompts, subject), temperature=0, max_tokens=10),
+        parse_yes_no_answer,
+    )
+
+
+# Service functions
+async def avalidate_field(
+        name: str, results: Callable[[], Awaitable[Dict[str, Dict[str, Union[bool, str]]]]]
+) -> Dict[str, Union[bool, str]]:
+    """
+    Async version of openai_service.validate_field.
+    """
+    try:
+        return (await results())[name]
+    except ExtractionLimitError:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error: %s", e)
+        return dict(INVALID_RESULT)
+
+
+async def avalidate_resume(file: BytesIO, file_type: str) -> Dict[str, Union[bool, str]]:
+    """
+    Async version of openai_service.validate_resume.
+    """
+    return await avalidate_field("resume", lambda: avalidate_inputs(file, file_type))
+
+
+async def avalidate_job_posting(url: str) -> Dict[str, Union[bool, str]]:
+    """
+    Async version of openai_service.validate_job_posting.
+    """
+    return await avalidate_field("job_posting", lambda: avalidate_inputs(url=url))
+
+
+async def avalidate_special_considerations(text: str) -> Dict[str, Union[bool, str]]:
+    """
+    Async version of openai_service.validate_special_considerations.
+    """
+    return await avalidate_field("special_considerations", lambda: avalidate_inputs(text=text))
+
+
+async def _abatch_yes_no_answers(questions: Dict[str, Tuple[tuple, str]]) -> Dict[str, str]:
+    """
+    Async counterpart of openai_service._batch_yes_no_answers.
+    """
+    kwargs, parse = batch_yes_no_request(questions)
+    return json.loads(await acached_completion("validate_batch", kwargs, parse))
+
+
+async def _aconcurrent_yes_no_answers(questions: Dict[str, Tuple[tuple, str]]) -> Dict[str, str]:
+    """
+    Async counterpart of openai_service._concurrent_yes_no_answers.
+    """
+    async def answer(name: str) -> str:
+        try:
+            return await _acached_yes_no_answer(*questions[name])
+        except Exception as e:
+            logger.warning("Validation of %s failed: %s", name, e)
+            return ""
+
+    return dict(zip(questions, await asyncio.gather(*(answer(name) for name in questions))))
+
+
+async def avalidate_inputs(
+        file: Optional[BytesIO] = None,
+        file_type: Optional[str] = None,
+        url: Optional[str] = None,
+        text: Optional[str] = None,
+) -> Dict[str, Dict[str, Union[bool, str]]]:
+    """
+    Async version of openai_service.validate_inputs.
+    """
+    # Text extraction and the job posting fetch block, keep them off the event loop.
+    validation = await sync_to_async(prepare_input_validation, thread_sensitive=False)(file, file_type, url, text)
+    questions = validation.questions
+    if not questions:
+        return validation.results
+
+    answers = {}
+    if len(questions) > 1:
+        try:
+            answers = await _abatch_yes_no_answers(questions)
+        except (openai.OpenAIError, ValueError) as e:
+            logger.warning("Batch validation failed, validating fields individually: %s", e)
+    if not answers:
+        answers = await _aconcurrent_yes_no_answers(questions)
+    return validation.answered(answers)
+
+
+async def agenerate_rewritten_text(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> str:
+    """
+    Async version of openai_service.generate_rewritten_text.
+    """
+    return await get_single_flight().arun(
+        generation_key(resume_text, job_posting_text, considerations),
+        lambda: _acomplete_rewritten_text(resume_text, job_posting_text, considerations),
+    )
+
+
+async def agenerate_rewritten_resume(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> bytes:
+    """
+    Async version of openai_service.generate_rewritten_resume.
+    """
+    rewritten_text = await agenerate_rewritten_text(resume_text, job_posting_text, considerations)
+    return await sync_to_async(render_resume_docx, thread_sensitive=False)(rewritten_text)
+
+
+async def _acomplete_rewritten_text(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> str:
+    split = split_for_generation(resume_text)
+    if split is not None:
+        chunks = _arewritten_section_chunks(split, resume_text, job_posting_text, considerations)
+        return "".join([chunk async for chunk in chunks]).strip()
+
+    try:
+        response = await _create_completion(
+            "generate", **resume_request(resume_text, job_posting_text, considerations),
+        )
+        return response.choices[0].message.content.strip()
+
+    except openai.OpenAIError as e:
+        logger.error("OpenAI API error: %s", e)
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error: %s", e)
+        raise
+
+
+async def astream_rewritten_resume(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> AsyncIterator[str]:
+    """
+    Async version of openai_service.stream_rewritten_resume.
+    """
+    async with get_single_flight().aflight(generation_key(resume_text, job_posting_text, considerations)) as flight:
+        if flight.shared:
+            yield flight.result
+            return
+
+        split = split_for_generation(resume_text)
+        if split is not None:
+            stream = _arewritten_section_chunks(split, resume_text, job_posting_text, considerations)
+        else:
+            stream = _astream_completion(resume_text, job_posting_text, considerations)
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        flight.publish("".join(chunks).strip())
+
+
+async def _astream_completion(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> AsyncIterator[str]:
+    try:
+        stream = await _create_completion(
+            "generate_stream", **resume_request(resume_text, job_posting_text, considerations), stream=True,
+        )
+        async for delta in _acontent_deltas(stream):
+            yield delta
+
+    except openai.OpenAIError as e:
+        logger.error("OpenAI API error: %s", e)
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error: %s", e)
+        raise
+
+
+async def _arewrite_section(job: str, context: str, job_posting_text: str, considerations: str) -> str:
+    return await acached_completion(
+        "generate_section",
+        section_request(job, context, job_posting_text, considerations),
+        lambda response: response.choices[0].message.content.strip(),
+        lambda model, kwargs: section_cache_key(job, context, job_posting_text, considerations, model),
+    )
+
+
+async def _acontent_deltas(stream) -> AsyncIterator[str]:
+    """
+    Async version of openai_service._content_deltas.
+    """
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+async def _astream_section(job: str, context: str, job_posting_text: str, considerations: str) -> AsyncIterator[str]:
+    """
+    Async version of openai_service._stream_section.
+    """
+    kwargs = section_request(job, context, job_posting_text, considerations)
+    completion_cache = get_completion_cache()
+    value = await completion_cache.aget(
+        section_cache_key(job, context, job_posting_text, considerations, preferred_model("generate_section", kwargs))
+    )
+    if value is not None:
+        yield value
+        return
+
+    routed = []
+    stream = _ainstrumented_stream(
+        "generate_section_stream", dict(kwargs, stream=True, stream_options={"include_usage": True}), routed.append,
+    )
+    stripper = DeltaStripper()
+    parts = []
+    async for delta in _acontent_deltas(stream):
+        part = stripper.feed(delta)
+        if part:
+            parts.append(part)
+            yield part
+    await completion_cache.aset(
+        section_cache_key(job, context, job_posting_text, considerations, routed[0]), "".join(parts),
+    )
+
+
+async def _arewritten_section_chunks(
+        split: ResumeSplit, resume_text: str, job_posting_text: str, considerations: str
+) -> AsyncIterator[str]:
+    """
+    Async version of openai_service._rewritten_section_chunks.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.GENERATION_SECTION_CONCURRENCY))
+
+    async def rewrite(job: str) -> str:
+        async with semaphore:
+            return await _arewrite_section(job, split.context, job_posting_text, considerations)
+
+    # The streamed first job takes its slot before the others queue for theirs.
+    await semaphore.acquire()
+    tasks = [asyncio.ensure_future(rewrite(job)) for job in split.jobs[1:]]
+    try:
+        try:
+            async for part in _astream_section(split.jobs[0], split.context, job_posting_text, considerations):
+                yield part
+        finally:
+            semaphore.release()
+        for task in tasks:
+            yield "\n\n" + await task
+        footer = resume_footer(resume_text)
+        if footer:
+            yield f"\n\n{footer}"
+    except openai.OpenAIError as e:
+        logger.error("OpenAI API error: %s", e)
+        raise
+    finally:
+        # A failed job fails the whole rewrite, so the rest needn't finish.
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,182 @@
+import contextvars
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Iterator, List, Tuple
+
+from django.conf import settings
+
+from resume_app.services.metrics_service import registry
+from resume_app.services.openai_service import completion_slots_var, generate_rewritten_resume, validate_job_posting
+
+logger = logging.getLogger(__name__)
+
+batch_items = registry.counter("batch_generation_items_total", "Batch generation postings by outcome.", ("status",))
+
+
+class BatchItemError(Exception):
+    """
+    Raised when one posting of a batch can't be used. Only that posting fails.
+    """
+
+
+@dataclass
+class BatchItem:
+    index: int
+    url: str
+    status: str = "pending"
+    filename: str = ""
+    error: str = ""
+
+
+class StartRateLimiter:
+    """
+    Spaces out the start of generations so a batch issues at most `per_minute`
+    of them per minute, however many threads are free.
+    """
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class _ZipStream:
+    """
+    Write-only, non-seekable file for ZipFile that hands back whatever has been
+    written since the last drain(). ZipFile falls back to data descriptors, so
+    each member can be sent as soon as it is added.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _posting_slug(posting_text: str) -> str:
+    first_line = next((line for line in posting_text.splitlines() if line.strip()), "")
+    return re.sub(r"[^A-Za-z0-9]+", "_", first_line).strip("_")[:50] or "posting"
+
+
+def _generate_item(
+        item: BatchItem,
+        resume_text: str,
+        considerations: str,
+        limiter: StartRateLimiter,
+        completion_slots: threading.Semaphore,
+) -> Tuple[str, bytes]:
+    # Runs in a copy of the request's context, so this only applies to the item.
+    completion_slots_var.set(completion_slots)
+    validated = validate_job_posting(item.url)
+    if not validated["is_valid"]:
+        raise BatchItemError("The URL doesn't look like a job posting.")
+    job_posting_text = validated["validated_data"]
+
+    limiter.wait()
+    return _posting_slug(job_posting_text), generate_rewritten_resume(resume_text, job_posting_text, considerations)
+
+
+def stream_batch_archive(resume_text: str, urls: List[str], considerations: str) -> Iterator[bytes]:
+    """
+    Tailor one resume to several job postings concurrently and stream a zip of the results.
+    Each .docx is added as soon as its generation finishes. A posting that fails gets an
+    NN_error.txt member instead, and status.json at the end lists every posting's outcome.
+    Small progress/NNN.txt members are added when the batch starts and whenever nothing
+    else has been written for STREAM_HEARTBEAT_INTERVAL seconds, so the response is never
+    silent for long. At most BATCH_GENERATION_CONCURRENCY completions run at once across
+    the whole batch, the job by job rewrites of each posting included.
+    :param resume_text: The validated resume text, extracted once for the whole batch.
+    :param urls: The job posting URLs, in the order the user gave them.
+    :param considerations: The validated special considerations, may be empty.
+    :return: An iterator over the bytes of the zip file.
+    """
+    items = [BatchItem(index=index, url=url) for index, url in enumerate(urls, start=1)]
+    limiter = StartRateLimiter(settings.BATCH_GENERATION_RATE_LIMIT)
+    completion_slots = threading.BoundedSemaphore(max(1, settings.BATCH_GENERATION_CONCURRENCY))
+    zip_stream = _ZipStream()
+    archive = zipfile.ZipFile(zip_stream, "w", compression=zipfile.ZIP_STORED)
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(settings.BATCH_GENERATION_CONCURRENCY, len(items))),
+        thread_name_prefix="batch-generation",
+    )
+    started = time.monotonic()
+    progress_notes = itertools.count()
+
+    def progress(message: str) -> bytes:
+        # Each note is a whole member, closed at once, so results can follow it straight away.
+        archive.writestr(
+            f"progress/{next(progress_notes):03d}.txt",
+            f"[{time.monotonic() - started:6.1f}s] {message}\n",
+        )
+        return zip_stream.drain()
+
+    try:
+        futures = {
+            # Copy the context so the request id follows each item into its thread.
+            executor.submit(
+                contextvars.copy_context().run,
+                _generate_item, item, resume_text, considerations, limiter, completion_slots,
+            ): item
+            for item in items
+        }
+        yield progress(f"Tailoring the resume to {len(items)} job postings.")
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=settings.STREAM_HEARTBEAT_INTERVAL, return_when=FIRST_COMPLETED)
+            if not done:
+                yield progress(f"Still working on {len(pending)} of {len(items)} job postings.")
+            for future in done:
+                item = futures[future]
+                try:
+                    slug, content = future.result()
+                except Exception as e:
+                    logger.warning("batch item failed index=%d url=%s error=%s", item.index, item.url, e)
+                    item.status = "failed"
+                    item.error = str(e) or e.__class__.__name__
+                    item.filename = f"{item.index:02d}_error.txt"
+                    archive.writestr(item.filename, f"{item.url}\n\n{item.error}\n")
+                else:
+                    item.status = "succeeded"
+                    item.filename = f"{item.index:02d}_{slug}.docx"
+                    archive.writestr(item.filename, content)
+                batch_items.inc(status=item.status)
+                yield zip_stream.drain()
+
+        archive.writestr("status.json", json.dumps({"items": [asdict(item) for item in items]}, indent=2))
+        archive.close()
+        yield zip_stream.drain()
+    finally:
+        # Stops queued postings from starting if the client goes away mid-batch.
+        executor.shutdown(wait=False, cancel_futures=True)
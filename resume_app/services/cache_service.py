@@ -0,0 +1,172 @@
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from resume_app.services.metrics_service import registry
+
+
+class CacheBackend(ABC):
+    """
+    Minimal interface shared by the completion cache backends.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Per-process cache with a TTL on every entry and least-recently-used eviction.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoCacheBackend(CacheBackend):
+    """
+    Cache shared between workers through one of the configured Django caches.
+    Eviction is left to the Django backend (MAX_ENTRIES/CULL_FREQUENCY), and
+    clear() empties the whole alias, so it should not be one other data lives in.
+    """
+
+    def __init__(self, alias: str = "completions"):
+        self.alias = alias
+
+    def get(self, key: str) -> Optional[str]:
+        return caches[self.alias].get(key)
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        caches[self.alias].set(key, value, timeout=ttl)
+
+    def clear(self) -> None:
+        caches[self.alias].clear()
+
+
+class CompletionCache:
+    """
+    Content-addressed cache for deterministic completions, keyed on a hash of
+    the model and the full prompt.
+    """
+
+    key_prefix = "completion:"
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, model: str, messages: List[Dict[str, str]], **params) -> str:
+        payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True)
+        return self.key_prefix + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, value: Optional[str]) -> None:
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        :return: The cached value for key, or None on a miss.
+        """
+        value = self.backend.get(key)
+        self._count(value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.backend.set(key, value, self.ttl)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """
+        Async variant of get; backend access runs off the event loop.
+        """
+        value = await sync_to_async(self.backend.get, thread_sensitive=False)(key)
+        self._count(value)
+        return value
+
+    async def aset(self, key: str, value: str) -> None:
+        await sync_to_async(self.backend.set, thread_sensitive=False)(key, value, self.ttl)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_completion_cache: Optional[CompletionCache] = None
+_completion_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    """
+    Return the process wide completion cache, built from the OPENAI_CACHE_* settings.
+    """
+    global _completion_cache
+    with _completion_cache_lock:
+        if _completion_cache is None:
+            if settings.OPENAI_CACHE_BACKEND == "django":
+                backend = DjangoCacheBackend(settings.OPENAI_CACHE_ALIAS)
+            elif settings.OPENAI_CACHE_BACKEND == "memory":
+                backend = InMemoryCacheBackend(settings.OPENAI_CACHE_MAX_ENTRIES)
+            else:
+                raise ValueError(f"Unknown OPENAI_CACHE_BACKEND: {settings.OPENAI_CACHE_BACKEND}")
+            _completion_cache = CompletionCache(backend, settings.OPENAI_CACHE_TTL)
+        return _completion_cache
+
+
+def _completion_cache_samples() -> Dict[tuple, float]:
+    if _completion_cache is None:
+        return {}
+    stats = _completion_cache.stats()
+    return {("hit",): stats["hits"], ("miss",): stats["misses"]}
+
+
+registry.callback(
+    "completion_cache_lookups_total", "Completion cache lookups by result.", ("result",),
+    _completion_cache_samples, type_name="counter",
+)
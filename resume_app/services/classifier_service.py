@@ -0,0 +1,127 @@
+import math
+import re
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+from django.conf import settings
+
+from resume_app.services.metrics_service import registry
+
+# Headers that open the usual resume sections, each matched on a line of its own.
+SECTION_HEADER_PATTERNS = {
+    "experience": r"(?:work |professional |relevant )?experience|employment(?: history)?|work history",
+    "education": r"education(?: and training)?|academic background",
+    "skills": r"(?:technical |core )?skills|competencies|technologies",
+    "summary": r"(?:professional )?summary|profile|objective|about me",
+    "projects": r"projects|portfolio",
+    "certifications": r"certifications?|licenses?|awards|honors|publications",
+}
+SECTION_HEADER_REGEX = re.compile(
+    r"^[\s#*]*(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_HEADER_PATTERNS.items())
+    + r")[\s:*]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+)?(?:\d{{1,2}}/)?(?:19|20)\d{{2}}"
+DATE_RANGE_REGEX = re.compile(
+    rf"\b{_DATE}\s*(?:-|–|—|to)\s*(?:{_DATE}|present|current|now)\b",
+    re.IGNORECASE,
+)
+BULLET_REGEX = re.compile(r"^\s*(?:[-*•▪◦●]|\d+\.)\s+", re.MULTILINE)
+CONTACT_REGEX = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+|\(?\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}|linkedin\.com/")
+
+# Logistic model over the features built in _features(). Hand tuned so a plain
+# text resume with a few section headers and dated jobs scores well above 0.9.
+FEATURE_WEIGHTS = np.array([1.2, 1.0, 2.0, 1.0])
+FEATURE_BIAS = -4.5
+
+
+class PreclassifierStats:
+    """
+    Thread-safe counters of how the pre-classifier answered.
+    """
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.ambiguous = 0
+        self._lock = threading.Lock()
+
+    def record(self, verdict: Optional[bool]) -> None:
+        with self._lock:
+            if verdict is None:
+                self.ambiguous += 1
+            elif verdict:
+                self.accepted += 1
+            else:
+                self.rejected += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.accepted + self.rejected + self.ambiguous
+            return {
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "ambiguous": self.ambiguous,
+                "short_circuit_ratio": (self.accepted + self.rejected) / total if total else 0.0,
+            }
+
+
+preclassifier_stats = PreclassifierStats()
+registry.callback(
+    "resume_preclassifier_verdicts_total", "Resume pre-classifier verdicts; ambiguous ones go to OpenAI.",
+    ("verdict",),
+    lambda: {(verdict,): preclassifier_stats.stats()[verdict] for verdict in ("accepted", "rejected", "ambiguous")},
+    type_name="counter",
+)
+
+
+def _features(text: str) -> np.ndarray:
+    lines = [line for line in text.splitlines() if line.strip()]
+    sections = {
+        name for match in SECTION_HEADER_REGEX.finditer(text)
+        for name, value in match.groupdict().items() if value
+    }
+    return np.array([
+        min(len(sections), 6),
+        math.log1p(len(DATE_RANGE_REGEX.findall(text))),
+        len(BULLET_REGEX.findall(text)) / len(lines) if lines else 0.0,
+        1.0 if CONTACT_REGEX.search(text) else 0.0,
+    ])
+
+
+def resume_score(text: str) -> float:
+    """
+    Estimate how likely the text is to be a resume.
+    :return: A probability-like score between 0 and 1.
+    """
+    return float(1.0 / (1.0 + np.exp(-(FEATURE_WEIGHTS @ _features(text) + FEATURE_BIAS))))
+
+
+def classify_resume_text(text: str) -> Optional[bool]:
+    """
+    Cheaply decide whether extracted text is a resume without calling the model.
+    :param text: The extracted resume text.
+    :return: True or False for confident verdicts, None when the model should decide.
+    """
+    if not settings.RESUME_PRECLASSIFIER_ENABLED:
+        return None
+
+    length = len(text.strip())
+    if length < settings.RESUME_PRECLASSIFIER_MIN_CHARS:
+        verdict = False
+    elif length > settings.RESUME_PRECLASSIFIER_MAX_CHARS:
+        # Long CVs are real too; the features weren't tuned on them.
+        verdict = None
+    else:
+        score = resume_score(text)
+        if score >= settings.RESUME_PRECLASSIFIER_ACCEPT_SCORE:
+            verdict = True
+        elif score <= settings.RESUME_PRECLASSIFIER_REJECT_SCORE:
+            verdict = False
+        else:
+            verdict = None
+
+    preclassifier_stats.record(verdict)
+    return verdict
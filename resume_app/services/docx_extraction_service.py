@@ -0,0 +1,207 @@
+import re
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import IO, List, Optional, Union
+from xml.etree.ElementTree import iterparse
+
+DOCUMENT_PART = "word/document.xml"
+HEADER_PART_REGEX = re.compile(r"^word/header\d*\.xml$")
+FOOTER_PART_REGEX = re.compile(r"^word/footer\d*\.xml$")
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+PARAGRAPH = W + "p"
+TABLE = W + "tbl"
+ROW = W + "tr"
+CELL = W + "tc"
+TEXTBOX = W + "txbxContent"
+TEXT = W + "t"
+# Run content that stands for a character of its own.
+SPECIAL_CHARACTERS = {
+    W + "tab": "\t",
+    W + "br": "\n",
+    W + "cr": "\n",
+    W + "noBreakHyphen": "-",
+}
+# Alternate renderings of the same drawing; only mc:Choice is read.
+FALLBACK = MC + "Fallback"
+# How many elements to parse between time budget checks.
+DEADLINE_CHECK_INTERVAL = 2048
+
+
+class DocxDeadlineExceeded(Exception):
+    """
+    Raised when a part takes longer to parse than the caller's deadline allows.
+    """
+
+
+@dataclass
+class DocxTable:
+    """
+    A table's cell texts by row. A cell's paragraphs are joined by newlines.
+    """
+    rows: List[List[str]] = field(default_factory=list)
+
+    def to_text(self) -> str:
+        lines = []
+        for row in self.rows:
+            cells = [cell for cell in row if cell.strip()]
+            if all("\n" not in cell for cell in cells):
+                lines.append(" | ".join(cell.strip() for cell in cells))
+            else:
+                lines.extend(cells)
+        return "\n".join(line for line in lines if line)
+
+
+Block = Union[str, DocxTable]
+
+
+@dataclass
+class DocxPart:
+    """
+    The paragraphs and tables of one part of the document, in order. Text boxes
+    follow the paragraph they are anchored in.
+    """
+    name: str
+    blocks: List[Block] = field(default_factory=list)
+
+    def to_text(self) -> str:
+        return "\n".join(block.to_text() if isinstance(block, DocxTable) else block for block in self.blocks)
+
+
+@dataclass
+class DocxContent:
+    """
+    The text of a .docx in a compact form: its headers, body and footers.
+    """
+    headers: List[DocxPart]
+    body: DocxPart
+    footers: List[DocxPart]
+
+    def to_text(self) -> str:
+        """
+        The headers, body and footers in reading order. Headers and footers that
+        repeat an earlier one (first page, even pages) are only included once.
+        """
+        seen = set()
+
+        def distinct(parts: List[DocxPart]) -> List[str]:
+            texts = []
+            for part in parts:
+                text = part.to_text().strip("\n")
+                if text.strip() and text not in seen:
+                    seen.add(text)
+                    texts.append(text)
+            return texts
+
+        return "\n".join([*distinct(self.headers), self.body.to_text(), *distinct(self.footers)])
+
+
+class _PartParser:
+    """
+    Builds a DocxPart from the start and end events of one XML part. Paragraphs,
+    table cells and text boxes nest, so each open container collects its own blocks.
+    """
+
+    def __init__(self, name: str):
+        self.part = DocxPart(name)
+        # Blocks of the innermost open body, cell or text box.
+        self.containers: List[List[Block]] = [self.part.blocks]
+        # Text of each open paragraph, and the text box paragraphs anchored in it.
+        self.paragraphs: List[List[str]] = []
+        self.anchored: List[List[Block]] = []
+        self.tables: List[DocxTable] = []
+        self.fallback_depth = 0
+
+    def start(self, tag: str) -> None:
+        if tag == FALLBACK:
+            self.fallback_depth += 1
+        if self.fallback_depth:
+            return
+        if tag == PARAGRAPH:
+            self.paragraphs.append([])
+            self.anchored.append([])
+        elif tag == TABLE:
+            self.tables.append(DocxTable())
+        elif tag == ROW and self.tables:
+            self.tables[-1].rows.append([])
+        elif tag in (CELL, TEXTBOX):
+            self.containers.append([])
+
+    def end(self, tag: str, text: Optional[str]) -> None:
+        if tag == FALLBACK:
+            self.fallback_depth -= 1
+            return
+        if self.fallback_depth:
+            return
+        if tag == TEXT:
+            if self.paragraphs:
+                self.paragraphs[-1].append(text or "")
+        elif tag in SPECIAL_CHARACTERS:
+            if self.paragraphs:
+                self.paragraphs[-1].append(SPECIAL_CHARACTERS[tag])
+        elif tag == PARAGRAPH and self.paragraphs:
+            self.containers[-1].append("".join(self.paragraphs.pop()))
+            self.containers[-1].extend(self.anchored.pop())
+        elif tag == TABLE and self.tables:
+            self.containers[-1].append(self.tables.pop())
+        elif tag == CELL:
+            blocks = self.containers.pop()
+            if self.tables and self.tables[-1].rows:
+                self.tables[-1].rows[-1].append(
+                    "\n".join(block.to_text() if isinstance(block, DocxTable) else block for block in blocks)
+                )
+        elif tag == TEXTBOX:
+            blocks = self.containers.pop()
+            # Anchored in a paragraph that is still open; it follows that paragraph.
+            (self.anchored[-1] if self.anchored else self.containers[-1]).extend(blocks)
+
+
+def parse_docx_part(stream: IO[bytes], name: str, deadline: Optional[float] = None) -> DocxPart:
+    """
+    Parse one WordprocessingML part incrementally, discarding each element once
+    it has been read so memory stays flat however large the part is.
+    :param stream: The part's XML.
+    :param name: A label for the part, such as "body" or "header".
+    :param deadline: A time.time() value after which parsing is abandoned.
+    :raises DocxDeadlineExceeded: If the deadline passes.
+    """
+    parser = _PartParser(name)
+    open_elements = []
+    for count, (event, element) in enumerate(iterparse(stream, events=("start", "end"))):
+        if event == "start":
+            open_elements.append(element)
+            parser.start(element.tag)
+            continue
+        parser.end(element.tag, element.text)
+        open_elements.pop()
+        element.clear()
+        if open_elements:
+            open_elements[-1].remove(element)
+        if deadline is not None and count % DEADLINE_CHECK_INTERVAL == 0 and time.time() > deadline:
+            raise DocxDeadlineExceeded(f"Parsing {name} ran out of time.")
+    return parser.part
+
+
+def read_docx_content(file: IO[bytes], deadline: Optional[float] = None) -> DocxContent:
+    """
+    Read the text of a .docx straight from its zip: the main document plus its
+    headers and footers, including tables and text boxes.
+    :param file: The .docx file, opened for reading.
+    :param deadline: A time.time() value after which parsing is abandoned.
+    :raises DocxDeadlineExceeded: If the deadline passes.
+    :raises KeyError: If the file has no word/document.xml.
+    """
+    with zipfile.ZipFile(file) as archive:
+        names = sorted(archive.namelist())
+
+        def parse(part_name: str, label: str) -> DocxPart:
+            with archive.open(part_name) as stream:
+                return parse_docx_part(stream, label, deadline)
+
+        return DocxContent(
+            headers=[parse(name, "header") for name in names if HEADER_PART_REGEX.match(name)],
+            body=parse(DOCUMENT_PART, "body"),
+            footers=[parse(name, "footer") for name in names if FOOTER_PART_REGEX.match(name)],
+        )
@@ -0,0 +1,136 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+from django.conf import settings
+
+from resume_app.services.metrics_service import registry
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before trying again to open a cache that failed to open.
+INIT_RETRY_INTERVAL = 60
+
+extraction_cache_lookups = registry.counter(
+    "extraction_cache_lookups_total", "Extracted text cache lookups by file type and result.", ("file_type", "result"),
+)
+extraction_cache_evictions = registry.counter(
+    "extraction_cache_evictions_total", "Extracted texts evicted to keep the cache under its size cap.",
+)
+
+
+class ExtractionCache:
+    """
+    Text extracted from uploaded files, keyed by the file's content hash and kept
+    in a SQLite file so every worker on the dyno shares it. Texts are stored
+    zlib-compressed, and once they add up to more than max_bytes the least
+    recently used ones are evicted. SQLite errors and corrupt rows are logged and
+    treated as misses, and get_extraction_cache() skips a cache that can't be
+    opened, so a broken cache only costs the extraction it would have saved.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as connection:
+            # Lookups far outnumber writes; WAL lets them run alongside one.
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "key TEXT PRIMARY KEY, text BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _key(file_type: str, extractor: str, content_hash: str) -> str:
+        return f"{file_type}:{extractor}:{content_hash}"
+
+    def get(self, file_type: str, extractor: str, content_hash: str) -> Optional[str]:
+        """
+        :param file_type: The type of the file ('pdf', 'docx', 'txt').
+        :param extractor: Names the code that extracted the text, so texts from
+                          another engine or an older version are misses.
+        :param content_hash: The hex sha256 of the file contents.
+        :return: The cached text, or None on a miss.
+        """
+        key = self._key(file_type, extractor, content_hash)
+        try:
+            connection = self._connection()
+            row = connection.execute("SELECT text FROM extractions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                connection.execute("UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), key))
+                text = zlib.decompress(row[0]).decode("utf-8")
+            else:
+                text = None
+        except (sqlite3.Error, zlib.error, UnicodeDecodeError) as e:
+            logger.warning("Extraction cache lookup failed: %s", e)
+            text = None
+
+        extraction_cache_lookups.inc(file_type=file_type, result="miss" if text is None else "hit")
+        return text
+
+    def set(self, file_type: str, extractor: str, content_hash: str, text: str) -> None:
+        """
+        Store an extracted text, evicting the least recently used texts if the
+        cache grows past max_bytes.
+        """
+        data = zlib.compress(text.encode("utf-8"))
+        if len(data) > self.max_bytes:
+            return
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO extractions (key, text, size, last_used) VALUES (?, ?, ?, ?)",
+                (self._key(file_type, extractor, content_hash), data, len(data), time.time()),
+            )
+            evicted = connection.execute(
+                "DELETE FROM extractions WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running_size FROM extractions"
+                " ) WHERE running_size > ?"
+                ")",
+                (self.max_bytes,),
+            ).rowcount
+        except sqlite3.Error as e:
+            logger.warning("Extraction cache store failed: %s", e)
+            return
+        if evicted > 0:
+            extraction_cache_evictions.inc(evicted)
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_retry_at = 0.0
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Return the process wide handle on the shared extraction cache, or None if
+    EXTRACTION_CACHE_MAX_BYTES disables it or it can't be opened. A cache that
+    failed to open is retried after INIT_RETRY_INTERVAL seconds rather than on
+    every upload.
+    """
+    global _extraction_cache, _extraction_cache_retry_at
+    if settings.EXTRACTION_CACHE_MAX_BYTES <= 0:
+        return None
+    with _extraction_cache_lock:
+        if _extraction_cache is None and time.monotonic() >= _extraction_cache_retry_at:
+            try:
+                _extraction_cache = ExtractionCache(settings.EXTRACTION_CACHE_DB, settings.EXTRACTION_CACHE_MAX_BYTES)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("Extraction cache unavailable, extracting without it: %s", e)
+                _extraction_cache_retry_at = time.monotonic() + INIT_RETRY_INTERVAL
+        return _extraction_cache
@@ -0,0 +1,213 @@
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from io import BytesIO
+from typing import List, Optional, Union
+
+from django.conf import settings
+
+from resume_app.services.docx_extraction_service import DocxDeadlineExceeded, read_docx_content
+from resume_app.services.extraction_cache_service import get_extraction_cache
+from resume_app.services.metrics_service import stage_timer
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Part of every extraction cache key; bump it when extraction output changes so
+# texts cached by older code aren't served.
+EXTRACTOR_VERSION = 3
+
+# Map extensions to file types
+FILE_TYPE_MAP = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".txt": "txt",
+}
+
+
+class ExtractionLimitError(Exception):
+    """
+    Raised when an upload exceeds one of the EXTRACTION_* byte, page or time budgets.
+    """
+
+
+def _read_limited(file: BytesIO, max_bytes: int) -> bytes:
+    """
+    Read a file in chunks, giving up as soon as it grows past max_bytes.
+    """
+    chunks = []
+    total = 0
+    while True:
+        chunk = file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise ExtractionLimitError(f"File is larger than {max_bytes} bytes.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _file_bytes(file: BytesIO, max_bytes: int) -> bytes:
+    """
+    The contents of a file, without copying them if the upload handler already holds them.
+    """
+    data = getattr(file, "data", None)
+    if isinstance(data, bytes):
+        if len(data) > max_bytes:
+            raise ExtractionLimitError(f"File is larger than {max_bytes} bytes.")
+        return data
+    return _read_limited(file, max_bytes)
+
+
+def _extract_pdf_page_range(data: bytes, start: int, stop: int, deadline: float) -> List[str]:
+    """
+    Extract the text of pages [start, stop). Runs in the caller's process or in a
+    pool process, and stops at the wall-clock deadline either way.
+    """
+    import fitz  # PyMuPDF
+
+    pages = []
+    with fitz.open(stream=data, filetype="pdf") as pdf_document:
+        for page_number in range(start, stop):
+            if time.time() > deadline:
+                raise ExtractionLimitError("PDF text extraction ran out of time.")
+            pages.append(pdf_document.load_page(page_number).get_text())
+    return pages
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned rather than forked: the web process is multi-threaded.
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.EXTRACTION_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def extract_pdf_text(data: bytes) -> str:
+    """
+    Extract the text of a PDF page by page, fanning large documents out across
+    the extraction process pool by page range.
+    :param data: The PDF file contents.
+    :return: The text of every page, in order.
+    """
+    import fitz  # PyMuPDF
+
+    deadline = time.time() + settings.EXTRACTION_TIME_BUDGET
+
+    with fitz.open(stream=data, filetype="pdf") as pdf_document:
+        page_count = pdf_document.page_count
+    if page_count > settings.EXTRACTION_MAX_PAGES:
+        raise ExtractionLimitError(f"PDF has more than {settings.EXTRACTION_MAX_PAGES} pages.")
+
+    processes = settings.EXTRACTION_PROCESSES
+    if processes < 2 or page_count < settings.EXTRACTION_PARALLEL_MIN_PAGES:
+        return "".join(_extract_pdf_page_range(data, 0, page_count, deadline))
+
+    pool = _get_process_pool()
+    range_size = -(-page_count // processes)
+    futures = [
+        pool.submit(_extract_pdf_page_range, data, start, min(start + range_size, page_count), deadline)
+        for start in range(0, page_count, range_size)
+    ]
+    done, not_done = wait(futures, timeout=max(deadline - time.time(), 0), return_when=FIRST_EXCEPTION)
+    if not_done:
+        for future in not_done:
+            future.cancel()
+        for future in done:
+            future.result()
+        raise ExtractionLimitError("PDF text extraction ran out of time.")
+
+    return "".join(text for future in futures for text in future.result())
+
+
+def extract_docx_text(data: bytes) -> str:
+    """
+    Extract the text of a .docx with the DOCX_EXTRACTION_ENGINE: "stream" reads the
+    XML parts straight from the zip, including tables, text boxes, headers and
+    footers; "python-docx" only reads the body's top level paragraphs.
+    :param data: The .docx file contents.
+    """
+    if settings.DOCX_EXTRACTION_ENGINE == "python-docx":
+        import docx
+
+        doc = docx.Document(BytesIO(data))
+        return "\n".join([p.text for p in doc.paragraphs])
+
+    try:
+        return read_docx_content(BytesIO(data), time.time() + settings.EXTRACTION_TIME_BUDGET).to_text()
+    except DocxDeadlineExceeded as e:
+        raise ExtractionLimitError(str(e)) from e
+
+
+def _extract_text(data: bytes, file_type: str) -> str:
+    if file_type == "pdf":
+        return extract_pdf_text(data)
+    elif file_type == "docx":
+        return extract_docx_text(data)
+    elif file_type == "txt":
+        return data.decode("utf-8")
+    else:
+        raise ValueError("Unsupported file type.")
+
+
+@stage_timer("extract_text")
+def extract_text_from_file(file: Union[BytesIO, str], file_type: str) -> str:
+    """
+    Extract text content from a file based on its type. PDF and DOCX texts are
+    cached by content hash, so a file uploaded again isn't parsed again.
+    :param file: The file object (BytesIO for uploaded files or path for local files).
+    :param file_type: The type of the file ('pdf', 'docx', 'txt').
+    :return: Extracted text as a string.
+    :raises ExtractionLimitError: If the file is over the configured size, page or time budget.
+    """
+    data = _file_bytes(file, settings.EXTRACTION_MAX_BYTES)
+    cache = get_extraction_cache()
+    # Decoding a text file is cheaper than a cache lookup.
+    if cache is None or file_type == "txt":
+        return _parse_file(data, file_type) or ""
+
+    # Uploads parsed by ResumeUploadHandler were hashed as they arrived.
+    content_hash = getattr(file, "sha256", None) or hashlib.sha256(data).hexdigest()
+    extractor = extractor_id(file_type)
+    text = cache.get(file_type, extractor, content_hash)
+    if text is None:
+        text = _parse_file(data, file_type)
+        if text is None:
+            return ""
+        cache.set(file_type, extractor, content_hash, text)
+    return text
+
+
+def extractor_id(file_type: str) -> str:
+    """
+    :return: The engine and version that extract text from this file type, as
+             part of the extraction cache key.
+    """
+    engine = settings.DOCX_EXTRACTION_ENGINE if file_type == "docx" else "pymupdf"
+    return f"{engine}:v{EXTRACTOR_VERSION}"
+
+
+def _parse_file(data: bytes, file_type: str) -> Optional[str]:
+    """
+    :return: The extracted text, or None if the file can't be parsed.
+    """
+    try:
+        return _extract_text(data, file_type)
+    except ExtractionLimitError:
+        raise
+    except Exception as e:
+        logger.warning("Error extracting text from %s: %s", file_type, e)
+        return None
@@ -0,0 +1,420 @@
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a click came from.
+TRACKING_PARAMETERS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "referrer", "src", "source", "trk", "trackingid"}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+MAX_REDIRECTS = 5
+USER_AGENT = "ResumeRighter/1.0 (+https://github.com/hashr25/ResumeRighter)"
+# How often each process prunes the posting cache, in seconds.
+CACHE_PRUNE_INTERVAL = 300
+
+
+class JobPostingFetchError(Exception):
+    """
+    Raised when a job posting URL can't be fetched or doesn't contain any text.
+    """
+
+
+@dataclass
+class JobPosting:
+    url: str
+    text: str
+    etag: str = ""
+    last_modified: str = ""
+    fetched_at: float = 0.0
+    from_cache: bool = False
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a job posting URL so that links to the same posting share a cache entry.
+    Lower-cases the scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the remaining query parameters.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError as e:
+        raise JobPostingFetchError(f"Invalid URL: {e}")
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        raise JobPostingFetchError(f"Unsupported URL scheme: {parts.scheme or 'none'}")
+    if not parts.hostname:
+        raise JobPostingFetchError("URL has no host.")
+
+    netloc = parts.hostname.lower()
+    if ":" in netloc:
+        netloc = f"[{netloc}]"
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMETERS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+class _MainTextParser(HTMLParser):
+    """
+    Collects the readable text of a page, skipping scripts, navigation and other
+    chrome, and separately keeps the text inside <main>/<article> and any JSON-LD blocks.
+    """
+
+    skipped_tags = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form", "button"}
+    block_tags = {
+        "p", "div", "section", "article", "main", "br", "li", "ul", "ol", "tr", "table",
+        "h1", "h2", "h3", "h4", "h5", "h6", "dt", "dd", "blockquote", "pre",
+    }
+    main_tags = {"main", "article"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text: List[str] = []
+        self.main_text: List[str] = []
+        self.json_ld: List[str] = []
+        self.title: List[str] = []
+        self._skip_depth = 0
+        self._open_main_tags: List[str] = []
+        self._in_json_ld = False
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag == "script" and (attributes.get("type") or "").lower() == "application/ld+json":
+            self._in_json_ld = True
+            self.json_ld.append("")
+        if tag in self.skipped_tags:
+            self._skip_depth += 1
+        elif tag in self.main_tags or attributes.get("role") == "main":
+            self._open_main_tags.append(tag)
+        if tag == "title":
+            self._in_title = True
+        if tag in self.block_tags:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            self._in_json_ld = False
+        if tag in self.skipped_tags:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif self._open_main_tags and tag == self._open_main_tags[-1]:
+            self._open_main_tags.pop()
+        if tag == "title":
+            self._in_title = False
+        if tag in self.block_tags:
+            self._append("\n")
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self.json_ld[-1] += data
+        elif self._in_title:
+            self.title.append(data)
+        elif not self._skip_depth:
+            self._append(data)
+
+    def _append(self, data):
+        self.text.append(data)
+        if self._open_main_tags:
+            self.main_text.append(data)
+
+
+def _normalize_whitespace(text: str) -> str:
+    lines = (re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _job_posting_from_json_ld(blocks: List[str]) -> str:
+    """
+    Return the title and description of the first schema.org JobPosting found in the JSON-LD blocks.
+    Most job boards embed one, and it is cleaner than anything scraped from the page.
+    """
+    for block in blocks:
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        candidates = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+        for candidate in candidates:
+            if not isinstance(candidate, dict) or not candidate.get("description"):
+                continue
+            types = candidate.get("@type")
+            if "JobPosting" in (types if isinstance(types, list) else [types]):
+                description = extract_main_text(candidate["description"], use_json_ld=False)
+                organization = candidate.get("hiringOrganization") or {}
+                company = organization.get("name", "") if isinstance(organization, dict) else ""
+                header = " at ".join(part for part in (candidate.get("title", ""), company) if part)
+                return f"{header}\n\n{description}" if header else description
+    return ""
+
+
+def extract_main_text(html: str, use_json_ld: bool = True) -> str:
+    """
+    Extract the main readable text from an HTML page.
+    :param html: The page markup.
+    :param use_json_ld: Prefer an embedded schema.org JobPosting when the page has one.
+    :return: The extracted text with normalized whitespace.
+    """
+    parser = _MainTextParser()
+    parser.feed(html)
+    parser.close()
+
+    if use_json_ld:
+        json_ld_text = _job_posting_from_json_ld(parser.json_ld)
+        if json_ld_text:
+            return _normalize_whitespace(json_ld_text)
+
+    text = _normalize_whitespace("".join(parser.main_text))
+    # Pages that wrap only a heading in <main> are better served by the whole body.
+    if len(text) < 200:
+        text = _normalize_whitespace("".join(parser.text))
+    title = _normalize_whitespace("".join(parser.title))
+    if title and title not in text:
+        return f"{title}\n\n{text}"
+    return text
+
+
+class JobPostingCache:
+    """
+    Disk-backed cache of extracted job postings, one JSON file per canonical URL.
+    Files are written atomically so every worker on the dyno can share the directory.
+    A file's modification time is its last use: entries unused for max_age seconds
+    are deleted, and then the least recently used ones until the rest fit in max_bytes.
+    """
+
+    def __init__(self, directory: str, max_age: float, max_bytes: int):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._next_prune = 0.0
+        self._prune_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, canonical_url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(canonical_url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, canonical_url: str) -> Optional[JobPosting]:
+        path = self._path(canonical_url)
+        try:
+            with open(path, encoding="utf-8") as cache_file:
+                posting = JobPosting(**json.load(cache_file))
+            os.utime(path)
+        except (OSError, ValueError, TypeError):
+            return None
+        return posting
+
+    def set(self, canonical_url: str, posting: JobPosting) -> None:
+        data = {
+            "url": posting.url,
+            "text": posting.text,
+            "etag": posting.etag,
+            "last_modified": posting.last_modified,
+            "fetched_at": posting.fetched_at,
+        }
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as cache_file:
+                json.dump(data, cache_file)
+            os.replace(temp_path, self._path(canonical_url))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        with self._prune_lock:
+            prune = time.monotonic() >= self._next_prune
+            if prune:
+                self._next_prune = time.monotonic() + CACHE_PRUNE_INTERVAL
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete expired entries, then the least recently used ones beyond max_bytes.
+        Temporary files older than max_age, left by interrupted writes, go too.
+        :return: How many files were deleted.
+        """
+        now = time.time()
+        entries = []
+        with os.scandir(self.directory) as directory:
+            for entry in directory:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        deleted = 0
+        kept_bytes = 0
+        for modified, size, path in sorted(entries, reverse=True):
+            expired = now - modified > self.max_age
+            if path.endswith(".tmp"):
+                # Possibly being written by another worker right now.
+                evict = expired
+            else:
+                evict = expired or kept_bytes + size > self.max_bytes
+            if not evict:
+                kept_bytes += size
+                continue
+            try:
+                os.remove(path)
+                deleted += 1
+            except OSError:
+                pass
+        return deleted
+
+
+_http_client: Optional[httpx.Client] = None
+_job_posting_cache: Optional[JobPostingCache] = None
+_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the process wide pooled HTTP client used to fetch job postings.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                timeout=settings.JOB_POSTING_FETCH_TIMEOUT,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+                follow_redirects=False,
+            )
+        return _http_client
+
+
+def get_job_posting_cache() -> Optional[JobPostingCache]:
+    """
+    Return the process wide posting cache, or None if its directory can't be
+    created, in which case postings are fetched every time.
+    """
+    global _job_posting_cache
+    with _lock:
+        if _job_posting_cache is None:
+            try:
+                _job_posting_cache = JobPostingCache(
+                    settings.JOB_POSTING_CACHE_DIR,
+                    settings.JOB_POSTING_CACHE_MAX_AGE,
+                    settings.JOB_POSTING_CACHE_MAX_BYTES,
+                )
+            except OSError as e:
+                logger.warning("Job posting cache unavailable: %s", e)
+        return _job_posting_cache
+
+
+def _check_host_allowed(url: str) -> None:
+    """
+    Refuse to fetch from loopback, private and other internal addresses, so the
+    fetcher can't be pointed at services on the dyno's network.
+    """
+    if settings.JOB_POSTING_ALLOW_PRIVATE_HOSTS:
+        return
+    parts = urlsplit(url)
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, parts.port or DEFAULT_PORTS.get(parts.scheme, 443))
+    except socket.gaierror as e:
+        raise JobPostingFetchError(f"Could not resolve {parts.hostname}: {e}")
+    for address in addresses:
+        try:
+            # Link-local IPv6 addresses come with a scope, as in fe80::1%eth0.
+            ip = ipaddress.ip_address(address[4][0].split("%", 1)[0])
+        except ValueError:
+            raise JobPostingFetchError(f"Refusing to fetch from unrecognised address {address[4][0]}.")
+        if not ip.is_global:
+            raise JobPostingFetchError(f"Refusing to fetch from non-public address {ip}.")
+
+
+def _download(url: str, cached: Optional[JobPosting]) -> Optional[JobPosting]:
+    """
+    GET the page, following redirects by hand so every hop is checked.
+    :return: The freshly extracted posting, or None if the server answered 304 Not Modified.
+    """
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    client = get_http_client()
+    for _ in range(MAX_REDIRECTS + 1):
+        _check_host_allowed(url)
+        with client.stream("GET", url, headers=headers) as response:
+            if response.has_redirect_location:
+                url = urljoin(url, response.headers["Location"])
+                continue
+            if response.status_code == 304 and cached is not None:
+                return None
+            if response.status_code != 200:
+                raise JobPostingFetchError(f"Job posting URL returned HTTP {response.status_code}.")
+
+            body = bytearray()
+            for chunk in response.iter_bytes():
+                body.extend(chunk)
+                if len(body) > settings.JOB_POSTING_MAX_BYTES:
+                    raise JobPostingFetchError("Job posting page is too large.")
+
+            text = extract_main_text(bytes(body).decode(response.encoding or "utf-8", errors="replace"))
+            if not text:
+                raise JobPostingFetchError("Job posting page has no readable text.")
+            return JobPosting(
+                url=str(response.url),
+                text=text,
+                etag=response.headers.get("ETag", ""),
+                last_modified=response.headers.get("Last-Modified", ""),
+                fetched_at=time.time(),
+            )
+    raise JobPostingFetchError("Too many redirects.")
+
+
+def fetch_job_posting(url: str) -> JobPosting:
+    """
+    Fetch a job posting and extract its main text, reusing the disk cache.
+    Entries younger than JOB_POSTING_CACHE_TTL are served without touching the
+    network; older ones are revalidated with a conditional GET.
+    :param url: The job posting URL entered by the user.
+    :return: The extracted posting.
+    :raises JobPostingFetchError: If the page can't be fetched or has no text.
+    """
+    canonical_url = canonicalize_url(url)
+    cache = get_job_posting_cache()
+    cached = cache.get(canonical_url) if cache is not None else None
+    if cached is not None and time.time() - cached.fetched_at < settings.JOB_POSTING_CACHE_TTL:
+        cached.from_cache = True
+        return cached
+
+    try:
+        posting = _download(canonical_url, cached)
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+        raise JobPostingFetchError(f"Could not fetch job posting: {e}")
+
+    if posting is None:
+        cached.fetched_at = time.time()
+        cached.from_cache = True
+        posting = cached
+    if cache is not None:
+        try:
+            cache.set(canonical_url, posting)
+        except OSError as e:
+            logger.warning("Could not cache job posting: %s", e)
+    return posting
@@ -0,0 +1,211 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from resume_app.models import GenerationJob
+from resume_app.services.openai_service import generate_rewritten_text
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """
+    Raised when the generation queue is at GENERATION_QUEUE_MAX_DEPTH.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full, retry after {retry_after} seconds.")
+        self.retry_after = retry_after
+
+
+def submit_generation_job(resume_text: str, job_posting_text: str, considerations: str) -> GenerationJob:
+    """
+    Queue a resume generation for the background workers.
+    :return: The queued job.
+    :raises QueueFullError: If too many jobs are already waiting or running.
+    """
+    # The insert comes first so that it takes SQLite's write lock: a concurrent
+    # submission waits for this transaction and then counts this job as well,
+    # instead of both counting the same depth and overfilling the queue.
+    with transaction.atomic():
+        job = GenerationJob.objects.create(
+            resume_text=resume_text,
+            job_posting_text=job_posting_text,
+            considerations=considerations or "",
+        )
+        depth = GenerationJob.objects.filter(
+            status__in=[GenerationJob.Status.QUEUED, GenerationJob.Status.RUNNING]
+        ).count()
+        if depth > settings.GENERATION_QUEUE_MAX_DEPTH:
+            raise QueueFullError(settings.GENERATION_QUEUE_RETRY_AFTER)
+    start_worker_pool()
+    return job
+
+
+def claim_next_job() -> Optional[GenerationJob]:
+    """
+    Atomically move the oldest queued job to running. Safe to call from several
+    processes at once, since only one conditional UPDATE can win each row.
+    :return: The claimed job, or None if the queue is empty.
+    """
+    while True:
+        job = GenerationJob.objects.filter(status=GenerationJob.Status.QUEUED).order_by("created_at").first()
+        if job is None:
+            return None
+
+        started_at = timezone.now()
+        claimed = GenerationJob.objects.filter(pk=job.pk, status=GenerationJob.Status.QUEUED).update(
+            status=GenerationJob.Status.RUNNING, started_at=started_at, attempts=F("attempts") + 1,
+        )
+        if claimed:
+            job.status = GenerationJob.Status.RUNNING
+            job.started_at = started_at
+            job.attempts += 1
+            return job
+
+
+def run_job(job: GenerationJob) -> None:
+    """
+    Generate the resume for a claimed job and record the outcome, unless the job
+    was requeued as stale in the meantime. Each claim stamps a new started_at, so
+    it identifies this attempt and a late finish can't overwrite a later one.
+    """
+    try:
+        job.result_text = generate_rewritten_text(job.resume_text, job.job_posting_text, job.considerations)
+        job.status = GenerationJob.Status.SUCCEEDED
+    except Exception as e:
+        job.error = str(e)
+        job.status = GenerationJob.Status.FAILED
+    job.finished_at = timezone.now()
+    saved = GenerationJob.objects.filter(
+        pk=job.pk, status=GenerationJob.Status.RUNNING, started_at=job.started_at,
+    ).update(result_text=job.result_text, error=job.error, status=job.status, finished_at=job.finished_at)
+    if not saved:
+        logger.warning("Discarding the result of job %s, which was requeued while it ran", job.pk)
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Put jobs back in the queue whose worker died while running them, that is jobs
+    that have been running for longer than GENERATION_JOB_TIMEOUT. Jobs that have
+    already been claimed GENERATION_JOB_MAX_ATTEMPTS times are failed instead.
+    :return: The number of jobs requeued.
+    """
+    now = timezone.now()
+    stale = GenerationJob.objects.filter(
+        status=GenerationJob.Status.RUNNING, started_at__lt=now - timedelta(seconds=settings.GENERATION_JOB_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=settings.GENERATION_JOB_MAX_ATTEMPTS).update(
+        status=GenerationJob.Status.FAILED,
+        error=f"Timed out after {settings.GENERATION_JOB_MAX_ATTEMPTS} attempts.",
+        finished_at=now,
+    )
+    if failed:
+        logger.warning("Failed %d generation jobs that timed out too many times", failed)
+    return stale.update(status=GenerationJob.Status.QUEUED, started_at=None)
+
+
+def delete_expired_jobs() -> int:
+    """
+    Delete finished jobs whose results are older than GENERATION_JOB_RESULT_TTL.
+    :return: The number of jobs deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.GENERATION_JOB_RESULT_TTL)
+    deleted, _ = GenerationJob.objects.filter(
+        status__in=[GenerationJob.Status.SUCCEEDED, GenerationJob.Status.FAILED], finished_at__lt=cutoff,
+    ).delete()
+    return deleted
+
+
+class GenerationWorkerPool:
+    """
+    A pool of threads that poll the database for queued jobs and run them.
+    """
+
+    def __init__(self, size: int, poll_interval: float):
+        self.size = size
+        self.poll_interval = poll_interval
+        self.worker_id = uuid.uuid4().hex[:8]
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            # Threads don't survive a fork, so a pool started before gunicorn forked
+            # (preload_app) is restarted in each worker on first use.
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self.size):
+                thread = threading.Thread(
+                    target=self._run, name=f"generation-worker-{self.worker_id}-{index}", daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self) -> None:
+        """
+        Run the pool in the foreground until stop() is called or the process is interrupted.
+        """
+        self.start()
+        try:
+            while not self._stop.wait(self.poll_interval):
+                pass
+        finally:
+            self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                job = claim_next_job()
+                if job is None:
+                    requeue_stale_jobs()
+                    delete_expired_jobs()
+                    self._stop.wait(self.poll_interval)
+                    continue
+                run_job(job)
+            except Exception as e:
+                logger.exception("Generation worker error: %s", e)
+                time.sleep(self.poll_interval)
+
+
+_worker_pool: Optional[GenerationWorkerPool] = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool(size: Optional[int] = None) -> GenerationWorkerPool:
+    """
+    Return the process wide worker pool, creating it on first use.
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = GenerationWorkerPool(
+                size if size is not None else settings.GENERATION_WORKER_THREADS,
+                settings.GENERATION_WORKER_POLL_INTERVAL,
+            )
+        return _worker_pool
+
+
+def start_worker_pool() -> None:
+    """
+    Start this process's worker threads unless GENERATION_WORKER_THREADS is 0.
+    Called as gunicorn boots each worker, so jobs left queued by a process that
+    went away are picked up without waiting for a new submission, and again on
+    each submission in case the threads were lost.
+    """
+    if settings.GENERATION_WORKER_THREADS > 0:
+        get_worker_pool().start()
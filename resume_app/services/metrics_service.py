@@ -0,0 +1,420 @@
+import atexit
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# X-Request-Id of the request being handled, set by RequestIdMiddleware.
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+METRIC_PREFIX = "resume_righter_"
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if pid <= 0 or os.name == "nt":
+        # On Windows os.kill() would terminate the process; only one worker runs there.
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _Metric:
+    type_name = ""
+    # How the samples of every worker are combined: "sum" adds them up over every
+    # process that ever wrote them, "livesum" and "livemax" only look at running ones.
+    aggregate = "sum"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = METRIC_PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self, samples: Optional[Dict[str, float]] = None) -> List[str]:
+        """
+        :param samples: The samples to render, by default this process's own.
+        """
+        if samples is None:
+            samples = self.snapshot()
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"] + [
+            f"{sample} {value}" for sample, value in samples.items()
+        ]
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        :return: This process's values by sample name and labels, in exposition order.
+        """
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {f"{self.name}{_format_labels(self.label_names, key)}": value for key, value in self._values.items()}
+
+    def reset(self) -> None:
+        super().reset()
+        self._values = {}
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), aggregate: str = "livesum"):
+        super().__init__(name, documentation, labels)
+        self.aggregate = aggregate
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            counts[index] += 1
+            self._values[key][1] = total + value
+
+    def snapshot(self) -> Dict[str, float]:
+        samples = {}
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                    samples[f"{self.name}_bucket{_format_labels(self.label_names, key, le)}"] = cumulative
+                samples[f"{self.name}_sum{_format_labels(self.label_names, key)}"] = total
+                samples[f"{self.name}_count{_format_labels(self.label_names, key)}"] = cumulative
+        return samples
+
+    def reset(self) -> None:
+        super().reset()
+        self._values = {}
+
+
+class CallbackMetric(_Metric):
+    """
+    A metric whose samples are read from a callback at scrape time, used to expose
+    counters that other services already keep.
+    """
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...],
+                 callback: Callable[[], Dict[LabelValues, float]], type_name: str = "gauge",
+                 aggregate: str = "livesum"):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+        self.type_name = type_name
+        self.aggregate = "sum" if type_name == "counter" else aggregate
+
+    def snapshot(self) -> Dict[str, float]:
+        return {f"{self.name}{_format_labels(self.label_names, key)}": value for key, value in self.callback().items()}
+
+
+class MetricsStore:
+    """
+    The latest snapshot of every worker's metrics, kept in a SQLite file so that
+    whichever worker answers a scrape can report the whole dyno. Each process
+    replaces its own rows when it flushes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS samples (process TEXT NOT NULL, pid INTEGER NOT NULL, "
+                "metric TEXT NOT NULL, sample TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (process, sample))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=20, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def save(self, process: str, pid: int, samples: Dict[str, Dict[str, float]]) -> None:
+        """
+        Replace a process's snapshot.
+        :param process: Id of the process, unique even when the OS reuses its pid.
+        :param samples: Values by sample, by metric name.
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # An earlier process with this pid has exited; pid 0 keeps it from passing for alive.
+            connection.execute("UPDATE samples SET pid = 0 WHERE pid = ? AND process != ?", (pid, process))
+            connection.execute("DELETE FROM samples WHERE process = ?", (process,))
+            connection.executemany(
+                "INSERT INTO samples (process, pid, metric, sample, value) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (process, pid, metric, sample, value)
+                    for metric, values in samples.items() for sample, value in values.items()
+                ],
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def load(self) -> List[Tuple[int, str, str, float]]:
+        """
+        :return: (pid, metric, sample, value) of every process, in the order they were written.
+        """
+        return self._connection().execute("SELECT pid, metric, sample, value FROM samples ORDER BY rowid").fetchall()
+
+
+_store: Optional[MetricsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store() -> Optional[MetricsStore]:
+    """
+    Return the process wide handle on the METRICS_DB store, None when it is disabled.
+    """
+    global _store
+    if not settings.METRICS_DB:
+        return None
+    with _store_lock:
+        if _store is None or _store.path != settings.METRICS_DB:
+            _store = MetricsStore(settings.METRICS_DB)
+        return _store
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        # Id and pid of the process whose snapshots this registry writes, and
+        # whether its flushing thread runs.
+        self._process = uuid.uuid4().hex
+        self._pid = os.getpid()
+        self._flushing = False
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = (), aggregate: str = "livesum") -> Gauge:
+        return self.register(Gauge(name, documentation, labels, aggregate))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def callback(self, name: str, documentation: str, labels: Tuple[str, ...],
+                 callback: Callable[[], Dict[LabelValues, float]], type_name: str = "gauge",
+                 aggregate: str = "livesum") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labels, callback, type_name, aggregate))
+
+    def _metric_list(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def flush(self, store: Optional[MetricsStore] = None) -> None:
+        """
+        Write this process's snapshot to the shared store.
+        """
+        store = store or get_metrics_store()
+        if store is not None:
+            store.save(self._process, self._pid, {metric.name: metric.snapshot() for metric in self._metric_list()})
+
+    def start_flushing(self) -> None:
+        """
+        Flush every METRICS_FLUSH_INTERVAL seconds from a background thread, and
+        once more at exit. Called on each request, it starts the thread once per process.
+        """
+        if self._flushing or not settings.METRICS_DB:
+            return
+        with self._lock:
+            if self._flushing:
+                return
+            self._flushing = True
+        threading.Thread(target=self._flush_periodically, name="metrics-flush", daemon=True).start()
+        atexit.register(self._flush_quietly)
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            self._flush_quietly()
+
+    def _flush_quietly(self) -> None:
+        try:
+            self.flush()
+        except sqlite3.Error:
+            logger.exception("Could not flush metrics to %s", settings.METRICS_DB)
+
+    def reset(self) -> None:
+        """
+        Start over as a new process with no values, as a forked worker does so that
+        it does not report what its parent had already counted.
+        """
+        self._lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric.reset()
+        self._process = uuid.uuid4().hex
+        self._pid = os.getpid()
+        self._flushing = False
+
+    def render(self, store: Optional[MetricsStore] = None) -> str:
+        """
+        Render every metric in the Prometheus text exposition format, combined over
+        every worker that flushed to the METRICS_DB store.
+        """
+        store = store or get_metrics_store()
+        metrics = self._metric_list()
+        if store is None:
+            return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+        self.flush(store)
+        by_metric: Dict[str, Dict[str, List[Tuple[int, float]]]] = {}
+        alive: Dict[int, bool] = {}
+        for pid, metric, sample, value in store.load():
+            by_metric.setdefault(metric, {}).setdefault(sample, []).append((pid, value))
+            if pid not in alive:
+                alive[pid] = _pid_alive(pid)
+        lines = []
+        for metric in metrics:
+            samples = {}
+            for sample, values in by_metric.get(metric.name, {}).items():
+                if metric.aggregate != "sum":
+                    values = [(pid, value) for pid, value in values if alive[pid]]
+                    if not values:
+                        continue
+                combine = max if metric.aggregate == "livemax" else sum
+                samples[sample] = combine(value for _, value in values)
+            lines.extend(metric.render(samples))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry.reset)
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to produce a response, by view and status.", ("view", "method", "status"),
+)
+requests_in_flight = registry.gauge("http_requests_in_flight", "Requests currently being handled.", ("view",))
+stage_duration = registry.histogram(
+    "stage_duration_seconds", "Time spent in each stage of request handling.", ("stage",),
+)
+openai_in_flight = registry.gauge("openai_requests_in_flight", "OpenAI completions currently waiting.", ("call",))
+openai_tokens = registry.counter(
+    "openai_tokens_total", "Tokens used by OpenAI completions.", ("model", "call", "kind"),
+)
+openai_cost = registry.counter("openai_cost_usd_total", "Estimated OpenAI spend in US dollars.", ("model", "call"))
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Time a stage of request handling into the stage_duration histogram and log it.
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration.observe(elapsed, stage=stage)
+        logger.info("stage=%s outcome=%s duration=%.1fms", stage, outcome, elapsed * 1000)
+
+
+def record_token_usage(model: str, call: str, usage) -> None:
+    """
+    Count the tokens reported by a completion and the estimated cost from OPENAI_PRICING.
+    :param usage: The completion's usage object, may be None.
+    """
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    openai_tokens.inc(prompt_tokens, model=model, call=call, kind="prompt")
+    openai_tokens.inc(completion_tokens, model=model, call=call, kind="completion")
+
+    prompt_price, completion_price = settings.OPENAI_PRICING.get(model, (0.0, 0.0))
+    openai_cost.inc((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000, model=model, call=call)
+    logger.info("openai_usage model=%s call=%s prompt_tokens=%d completion_tokens=%d",
+                model, call, prompt_tokens, completion_tokens)
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Adds the current request's X-Request-Id to every log record.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
@@ -1,19 +1,241 @@
 import openai
 from django.conf import settings
-import fitz  # PyMuPDF
-import docx
-from docx import Document
+import contextvars
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from io import BytesIO
-from typing import Union, Dict
+from typing import Any, Callable, Optional, Tuple, Union, Dict, Iterator, List
+
+from resume_app.services import rendering_service
+from resume_app.services.cache_service import get_completion_cache
+from resume_app.services.ratelimit_service import call_with_limits
+from resume_app.services.routing_service import call_routed, preferred_model
+from resume_app.services.section_service import ResumeSplit, split_resume_jobs
+from resume_app.services.singleflight_service import get_single_flight
+from resume_app.services.classifier_service import classify_resume_text
+from resume_app.services.extraction_service import ExtractionLimitError, extract_text_from_file
+from resume_app.services.job_posting_service import JobPostingFetchError, fetch_job_posting
+from resume_app.services.metrics_service import openai_in_flight, record_token_usage, stage_timer
+from resume_app.services.prompt_service import (
+    PromptBudget,
+    PromptSection,
+    context_budget,
+    dedupe_lines,
+    estimate_tokens,
+    fit_prompt,
+    strip_job_posting_boilerplate,
+)
+
+logger = logging.getLogger(__name__)
 
 # Initialize OpenAI API key
 openai.api_key = settings.OPENAI_API_KEY
-openai.log = "debug"
+if settings.OPENAI_BASE_URL:
+    # Unlike OpenAI(), the module level client doesn't add the trailing slash itself.
+    openai.base_url = settings.OPENAI_BASE_URL.rstrip("/") + "/"
+# Retries are handled by ratelimit_service, which also honors the shared rate limit.
+openai.max_retries = 0
 
 openai_model = settings.OPENAI_MODEL
 
+# Set by callers that run several generations at once, such as batch_service, to
+# cap the completions they have in flight together. Every completion, section
+# rewrites included, holds a slot while it runs.
+completion_slots_var: contextvars.ContextVar[Optional[threading.Semaphore]] = contextvars.ContextVar(
+    "completion_slots", default=None,
+)
+
+
+RESUME_VALIDATION_PROMPTS = (
+    "You are an AI assistant for validating resumes.",
+    "Does the following text look like a person's resume?\n\n{}\n\nRespond 'yes' or 'no'.",
+)
+JOB_POSTING_VALIDATION_PROMPTS = (
+    "You are an AI assistant for validating job postings.",
+    "Does the following URL point to a job posting?\n\n{}\n\nRespond 'yes' or 'no'.",
+)
+JOB_POSTING_PAGE_VALIDATION_PROMPTS = (
+    "You are an AI assistant for validating job postings.",
+    "Does the following web page look like a job posting?\n\n{}\n\nRespond 'yes' or 'no'.",
+)
+SPECIAL_CONSIDERATIONS_VALIDATION_PROMPTS = (
+    "You are an AI assistant for validating special considerations.",
+    "Is the following text relevant to resume optimization?\n\n{}\n\nRespond 'yes' or 'no'.",
+)
+
+BATCH_VALIDATION_SYSTEM_PROMPT = "You are an AI assistant for validating the inputs to a resume rewriting service."
+
+
+def create_completion(call: str, **kwargs):
+    """
+    Create a chat completion on the model routing_service picks for the call,
+    under the shared rate limit, retry policy and circuit breaker, recording its
+    latency, in-flight count and token usage.
+    :param call: A short name for the kind of call, used for routing and as a metric label.
+    :param kwargs: Passed through to openai.chat.completions.create, without a model.
+                   Streaming completions are returned as an iterator over their chunks.
+    """
+    if kwargs.get("stream"):
+        kwargs["stream_options"] = {"include_usage": True}
+        return _instrumented_stream(call, kwargs)
+    return _create_routed_completion(call, kwargs)[1]
+
+
+@contextmanager
+def _completion_slot() -> Iterator[None]:
+    slots = completion_slots_var.get()
+    if slots is None:
+        yield
+        return
+    with slots:
+        yield
+
+
+def _create_routed_completion(call: str, kwargs: dict) -> Tuple[str, Any]:
+    """
+    :return: The model that answered and its completion.
+    """
+    with _completion_slot():
+        openai_in_flight.inc(call=call)
+        try:
+            with stage_timer(f"openai_{call}"):
+                model, response = call_routed(call, kwargs, _send_completion)
+        finally:
+            openai_in_flight.dec(call=call)
+    record_token_usage(model, call, response.usage)
+    return model, response
+
+
+def _send_completion(kwargs: dict, on_success: Callable[[float], None]):
+    return call_with_limits(kwargs["model"], kwargs, lambda: openai.chat.completions.create(**kwargs), on_success)
+
+
+def _instrumented_stream(call: str, kwargs: dict, on_route: Optional[Callable[[str], None]] = None) -> Iterator:
+    """
+    :param on_route: Called with the model that answered once the stream is open.
+    """
+    with _completion_slot():
+        openai_in_flight.inc(call=call)
+        try:
+            with stage_timer(f"openai_{call}"):
+                # Only opening the stream is retried or failed over; chunks already
+                # sent can't be taken back. Its routing latency is the time to open it.
+                model, stream = call_routed(call, kwargs, _send_completion)
+                if on_route is not None:
+                    on_route(model)
+                for chunk in stream:
+                    if chunk.usage is not None:
+                        record_token_usage(model, call, chunk.usage)
+                    yield chunk
+        finally:
+            openai_in_flight.dec(call=call)
+
+
+def build_yes_no_messages(prompts: tuple, subject: str) -> list:
+    """
+    Build the chat messages for one of the *_VALIDATION_PROMPTS pairs.
+    """
+    system_prompt, user_prompt = prompts
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt.format(subject)},
+    ]
+
+
+def completion_cache_key(model: str, kwargs: dict) -> str:
+    """
+    The completion cache key for a request sent to model.
+    """
+    params = {name: value for name, value in kwargs.items() if name != "messages"}
+    return get_completion_cache().make_key(model, kwargs["messages"], **params)
+
+
+def cached_completion(
+        call: str,
+        kwargs: dict,
+        parse: Callable[[Any], str],
+        cache_key: Callable[[str, dict], str] = completion_cache_key,
+) -> str:
+    """
+    Create a deterministic completion through the completion cache. Answers are
+    stored under the model that gave them, which after a failover isn't the
+    preferred one, and looked up under the model the router would pick now.
+    :param call: The kind of call, as for create_completion.
+    :param kwargs: The request parameters, without a model.
+    :param parse: Turns the response into the value to cache. It may raise to keep
+                  a malformed response out of the cache.
+    :param cache_key: Builds the cache key from a model and the request parameters.
+    """
+    completion_cache = get_completion_cache()
+    value = completion_cache.get(cache_key(preferred_model(call, kwargs), kwargs))
+    if value is None:
+        model, response = _create_routed_completion(call, kwargs)
+        value = parse(response)
+        completion_cache.set(cache_key(model, kwargs), value)
+    return value
+
+
+def parse_yes_no_answer(response) -> str:
+    return response.choices[0].message.content.strip().lower()
+
+
+def _cached_yes_no_answer(prompts: tuple, subject: str) -> str:
+    """
+    Ask the model a deterministic yes/no question, reusing earlier answers for identical prompts.
+    :return: The model's answer, stripped and lower-cased.
+    """
+    return cached_completion(
+        "validate",
+        dict(messages=build_yes_no_messages(prompts, subject), temperature=0, max_tokens=10),
+        parse_yes_no_answer,
+    )
+
+
+@stage_timer("job_posting_fetch")
+def job_posting_question(url: str) -> Tuple[tuple, str, str]:
+    """
+    Fetch the posting behind a URL and decide what to ask the model about it. If the
+    page can't be fetched, only the URL itself is validated, as before.
+    :param url: The job posting URL.
+    :return: The prompts, the subject to validate and the text to hand to generation if valid.
+    """
+    try:
+        posting = fetch_job_posting(url)
+    except JobPostingFetchError as e:
+        logger.warning("Could not fetch job posting, validating the URL only: %s", e)
+        return JOB_POSTING_VALIDATION_PROMPTS, url, url
+
+    excerpt = posting.text[:settings.JOB_POSTING_VALIDATION_MAX_CHARS]
+    return JOB_POSTING_PAGE_VALIDATION_PROMPTS, f"URL: {url}\n\n{excerpt}", posting.text
+
 
 # Service functions
+INVALID_RESULT: Dict[str, Union[bool, str]] = {"is_valid": False, "validated_data": ""}
+
+
+def validate_field(
+        name: str, results: Callable[[], Dict[str, Dict[str, Union[bool, str]]]]
+) -> Dict[str, Union[bool, str]]:
+    """
+    Pick one field's result from a validate_inputs style call, treating any failure
+    other than an extraction limit as invalid input.
+    :param name: The field, as keyed by validate_inputs.
+    :param results: Runs the validation.
+    """
+    try:
+        return results()[name]
+    except ExtractionLimitError:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error: %s", e)
+        return dict(INVALID_RESULT)
+
+
 def validate_resume(file: BytesIO, file_type: str) -> Dict[str, Union[bool, str]]:
     """
     Validate that the uploaded file content looks like a resume.
@@ -21,59 +243,16 @@ def validate_resume(file: BytesIO, file_type: str) -> Dict[str, Union[bool, str]
     :param file_type: The type of the file ('pdf', 'docx', 'txt').
     :return: A dictionary with is_valid (bool) and validated_data (str) if valid.
     """
-    try:
-        # Step 1: Extract text from the file
-        file_content = extract_text_from_file(file, file_type)
-        if not file_content:
-            return {"is_valid": False, "validated_data": ""}
-
-        # Step 2: Validate the extracted text
-        response = openai.chat.completions.create(
-            model=openai_model,
-            messages=[
-                {"role": "system", "content": "You are an AI assistant for validating resumes."},
-                {"role": "user",
-                 "content": f"Does the following text look like a person's resume?\n\n{file_content}\n\nRespond 'yes' or 'no'."},
-            ],
-            temperature=0,
-            max_tokens=10,
-        )
-
-        result = response.choices[0].message.content.strip().lower()
-        return {"is_valid": result == "yes", "validated_data": file_content if result == "yes" else ""}
-    except openai.OpenAIError as e:
-        print(f"OpenAI API error: {e}")
-        return {"is_valid": False, "validated_data": ""}
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        return {"is_valid": False, "validated_data": ""}
+    return validate_field("resume", lambda: validate_inputs(file, file_type))
 
 
 def validate_job_posting(url: str) -> Dict[str, Union[bool, str]]:
     """
     Validate that the given URL points to a job posting.
     :param url: The job posting URL.
-    :return: A dictionary with is_valid (bool) and validated_data (str) if valid.
+    :return: A dictionary with is_valid (bool) and validated_data (str), the posting's text, if valid.
     """
-    try:
-        response = openai.chat.completions.create(
-            model=openai_model,
-            messages=[
-                {"role": "system", "content": "You are an AI assistant for validating job postings."},
-                {"role": "user",
-                 "content": f"Does the following URL point to a job posting?\n\n{url}\n\nRespond 'yes' or 'no'."},
-            ],
-            temperature=0,
-            max_tokens=10,
-        )
-        result = response.choices[0].message.content.strip().lower()
-        return {"is_valid": result == "yes", "validated_data": url if result == "yes" else ""}
-    except openai.OpenAIError as e:
-        print(f"OpenAI API error: {e}")
-        return {"is_valid": False, "validated_data": ""}
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        return {"is_valid": False, "validated_data": ""}
+    return validate_field("job_posting", lambda: validate_inputs(url=url))
 
 
 def validate_special_considerations(text: str) -> Dict[str, Union[bool, str]]:
@@ -82,52 +261,385 @@ def validate_special_considerations(text: str) -> Dict[str, Union[bool, str]]:
     :param text: The special considerations input.
     :return: A dictionary with is_valid (bool) and validated_data (str) if valid.
     """
-    try:
-        response = openai.chat.completions.create(
-            model=openai_model,
-            messages=[
-                {"role": "system", "content": "You are an AI assistant for validating special considerations."},
-                {"role": "user",
-                 "content": f"Is the following text relevant to resume optimization?\n\n{text}\n\nRespond 'yes' or 'no'."},
-            ],
-            temperature=0,
-            max_tokens=10,
+    return validate_field("special_considerations", lambda: validate_inputs(text=text))
+
+
+RESUME_MAX_OUTPUT_TOKENS = 4096
+# Per job when the resume is rewritten job by job: a heading and at most 5 bullets.
+RESUME_SECTION_MAX_OUTPUT_TOKENS = 1024
+RESUME_SECTION_CACHE_KEY_PREFIX = "resume_section:"
+# The operator's EXTRA_DETAILS_FOR_RESUME_GENERATION instructions are trimmed
+# before the considerations and the resume, but never below this.
+EXTRA_DETAILS_MIN_TOKENS = 200
+RESUME_FOOTER = (
+    "This resume was generated using Resume Righter, written by Randy Hash. "
+    "The source code for this project can be found at [GitHub](https://github.com/hashr25/ResumeRighter)."
+)
+RESUME_GENERATION_SYSTEM_PROMPT = (
+    "You are a professional resume consultant tasked with improving a resume by rewriting bullet points for previous jobs. "
+)
+
+
+def batch_yes_no_request(questions: Dict[str, Tuple[tuple, str]]) -> Tuple[dict, Callable[[Any], str]]:
+    """
+    Build the completion that answers several yes/no validation questions at once.
+    :param questions: The (prompts, subject) pair for each field, keyed by field name.
+    :return: The request parameters and the parser for cached_completion. The parser
+             returns the answers as JSON and raises ValueError if the model's JSON
+             doesn't answer every field.
+    """
+    question_text = "\n\n---\n\n".join(
+        f"[{field}]\n{prompts[1].format(subject)}" for field, (prompts, subject) in questions.items()
+    )
+    messages = [
+        {"role": "system", "content": BATCH_VALIDATION_SYSTEM_PROMPT},
+        {"role": "user",
+         "content": "Answer each of the following questions independently. Respond with a JSON object that maps "
+                    "each bracketed field name to 'yes' or 'no'.\n\n" + question_text},
+    ]
+
+    def parse(response) -> str:
+        answers = json.loads(response.choices[0].message.content)
+        # Check the answer before it is cached, so a malformed reply is retried next time.
+        if not isinstance(answers, dict) or set(questions) - set(answers):
+            raise ValueError(f"Batch validation answered {answers!r}, expected {sorted(questions)}.")
+        return json.dumps({field: str(answers[field]).strip().lower() for field in questions})
+
+    return dict(messages=messages, temperature=0, max_tokens=60, response_format={"type": "json_object"}), parse
+
+
+def _batch_yes_no_answers(questions: Dict[str, Tuple[tuple, str]]) -> Dict[str, str]:
+    """
+    Answer several yes/no validation questions in one completion.
+    :param questions: The (prompts, subject) pair for each field, keyed by field name.
+    :return: The answer for every field, keyed by field name.
+    :raises ValueError: If the model's JSON doesn't answer every field.
+    """
+    kwargs, parse = batch_yes_no_request(questions)
+    return json.loads(cached_completion("validate_batch", kwargs, parse))
+
+
+def _concurrent_yes_no_answers(questions: Dict[str, Tuple[tuple, str]]) -> Dict[str, str]:
+    """
+    Answer each yes/no validation question with its own completion, run concurrently.
+    A field whose call fails is answered with an empty string.
+    """
+    def answer(field: str) -> str:
+        try:
+            return _cached_yes_no_answer(*questions[field])
+        except Exception as e:
+            logger.warning("Validation of %s failed: %s", field, e)
+            return ""
+
+    if len(questions) == 1:
+        return {name: answer(name) for name in questions}
+    with ThreadPoolExecutor(max_workers=len(questions)) as executor:
+        return dict(zip(questions, executor.map(answer, questions)))
+
+
+@dataclass
+class InputValidation:
+    """
+    The fields of a validate_inputs call: results for those settled without the
+    model, and the yes/no question to ask about each of the others.
+    """
+    results: Dict[str, Dict[str, Union[bool, str]]] = field(default_factory=dict)
+    questions: Dict[str, Tuple[tuple, str]] = field(default_factory=dict)
+    validated_data: Dict[str, str] = field(default_factory=dict)
+
+    def answered(self, answers: Dict[str, str]) -> Dict[str, Dict[str, Union[bool, str]]]:
+        """
+        :param answers: The model's answer for each question, keyed by field name.
+        :return: A validate_* style result for every field.
+        """
+        results = dict(self.results)
+        for name in self.questions:
+            is_valid = answers.get(name) == "yes"
+            results[name] = {"is_valid": is_valid, "validated_data": self.validated_data[name] if is_valid else ""}
+        return results
+
+
+def prepare_input_validation(
+        file: Optional[BytesIO] = None,
+        file_type: Optional[str] = None,
+        url: Optional[str] = None,
+        text: Optional[str] = None,
+) -> InputValidation:
+    """
+    Extract the resume and fetch the job posting for validate_inputs, settling
+    what the classifier can without the model.
+    """
+    validation = InputValidation()
+    if file is not None:
+        file_content = extract_text_from_file(file, file_type)
+        with stage_timer("preclassify"):
+            verdict = classify_resume_text(file_content) if file_content else False
+        if verdict is None:
+            validation.questions["resume"] = (RESUME_VALIDATION_PROMPTS, file_content)
+            validation.validated_data["resume"] = file_content
+        else:
+            validation.results["resume"] = {"is_valid": verdict, "validated_data": file_content if verdict else ""}
+    if url:
+        prompts, subject, posting_text = job_posting_question(url)
+        validation.questions["job_posting"] = (prompts, subject)
+        validation.validated_data["job_posting"] = posting_text
+    if text:
+        validation.questions["special_considerations"] = (SPECIAL_CONSIDERATIONS_VALIDATION_PROMPTS, text)
+        validation.validated_data["special_considerations"] = text
+    return validation
+
+
+def validate_inputs(
+        file: Optional[BytesIO] = None,
+        file_type: Optional[str] = None,
+        url: Optional[str] = None,
+        text: Optional[str] = None,
+) -> Dict[str, Dict[str, Union[bool, str]]]:
+    """
+    Validate any combination of resume file, job posting URL and special considerations
+    with a single completion, falling back to concurrent per-field calls.
+    :param file: The resume file object, if supplied.
+    :param file_type: The type of the resume file ('pdf', 'docx', 'txt').
+    :param url: The job posting URL, if supplied.
+    :param text: The special considerations, if supplied.
+    :return: A validate_* style result for each supplied field, keyed by
+             'resume', 'job_posting' and 'special_considerations'.
+    """
+    validation = prepare_input_validation(file, file_type, url, text)
+    questions = validation.questions
+    if not questions:
+        return validation.results
+
+    answers = {}
+    if len(questions) > 1:
+        try:
+            answers = _batch_yes_no_answers(questions)
+        except (openai.OpenAIError, ValueError) as e:
+            logger.warning("Batch validation failed, validating fields individually: %s", e)
+    if not answers:
+        answers = _concurrent_yes_no_answers(questions)
+    return validation.answered(answers)
+
+
+def _render_resume_prompt(texts: Dict[str, str]) -> str:
+    considerations = texts["considerations"]
+    return (
+        "Your goal is to make suggestions for each job so it aligns better with the provided job posting, highlights relevant skills and experience, "
+        "and adheres to professional standards. Follow these instructions:\n\n"
+        f"{texts['extra_details']}\n\n"
+        "Specific Guidelines:\n"
+        "1. Make suggestions for all jobs listed in the original resume. Do not remove any job entries.\n"
+        "2. Rewrite descriptions and bullet points for each job posting to better align with the job posting. Use action-oriented language.\n"
+        "3. Highlight transferable skills and technologies relevant to the job posting. Add keywords from the job posting where appropriate.\n"
+        "4. Limit the suggestions for each job listing to no more than 5 bullet points.\n\n"
+        "5. Do not list individual skills or technologies separately. Instead, incorporate them into the job descriptions.\n\n"
+        "6. Do not include personal information, such as name, address, or contact details, in the resume suggestion document.\n\n"
+        "7. Do not include any education or certification information in the resume suggestion document.\n\n"
+        "Original Resume:\n\n"
+        f"{texts['resume']}\n\n"
+        "Job Posting:\n\n"
+        f"{texts['job_posting']}\n\n"
+        "Special Considerations (if provided):\n\n"
+        f"{considerations if considerations.strip() else 'None'}\n\n"
+        "Output the suggestions for the resume in a clean format, labeling each job by company name.\n\n"
+        "Include a footer only if the name \"Randy Hash\" is not present in the resume. The footer should say:\n"
+        "'This resume was generated using Resume Righter, written by Randy Hash. The source code for this project can be found at {insert link to https://github.com/hashr25/ResumeRighter that simple says 'GitHub'}'."
+    )
+
+
+def _warn_if_extra_details_trimmed(prompt_budget: PromptBudget) -> None:
+    if "extra_details" in prompt_budget.trimmed:
+        logger.warning(
+            "EXTRA_DETAILS_FOR_RESUME_GENERATION trimmed to %d tokens to fit the prompt budget",
+            prompt_budget.section_tokens["extra_details"],
         )
-        result = response.choices[0].message.content.strip().lower()
-        return {"is_valid": result == "yes", "validated_data": text if result == "yes" else ""}
-    except openai.OpenAIError as e:
-        print(f"OpenAI API error: {e}")
-        return {"is_valid": False, "validated_data": ""}
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        return {"is_valid": False, "validated_data": ""}
 
 
-def extract_text_from_file(file: Union[BytesIO, str], file_type: str) -> str:
+@stage_timer("prompt_assembly")
+def assemble_resume_prompt(resume_text: str, job_posting_text: str, considerations: str) -> PromptBudget:
     """
-    Extract text content from a file based on its type.
-    :param file: The file object (BytesIO for uploaded files or path for local files).
-    :param file_type: The type of the file ('pdf', 'docx', 'txt').
-    :return: Extracted text as a string.
+    Build the user prompt for the resume rewrite completion, fitted to the model's context budget.
+    Job posting boilerplate and duplicate bullets are always dropped; if the prompt is
+    still too long the job posting is trimmed first and the resume last.
+    :return: The prompt with its per-section token breakdown.
+    """
+    sections = [
+        PromptSection("job_posting", dedupe_lines(strip_job_posting_boilerplate(job_posting_text)),
+                      priority=0, min_tokens=300),
+        PromptSection("extra_details", settings.EXTRA_DETAILS_FOR_RESUME_GENERATION,
+                      priority=1, min_tokens=EXTRA_DETAILS_MIN_TOKENS),
+        PromptSection("considerations", considerations or "", priority=2, min_tokens=100),
+        PromptSection("resume", dedupe_lines(resume_text), priority=3, min_tokens=500),
+    ]
+    budget = context_budget(openai_model, RESUME_MAX_OUTPUT_TOKENS) - estimate_tokens(RESUME_GENERATION_SYSTEM_PROMPT)
+    prompt_budget = fit_prompt(_render_resume_prompt, sections, budget, openai_model)
+    _warn_if_extra_details_trimmed(prompt_budget)
+    logger.info(
+        "resume_prompt tokens=%d budget=%d sections=%s trimmed=%s",
+        prompt_budget.total_tokens, prompt_budget.budget, prompt_budget.section_tokens, prompt_budget.trimmed,
+    )
+    return prompt_budget
+
+
+def build_resume_prompt(resume_text: str, job_posting_text: str, considerations: str) -> str:
+    """
+    Build the user prompt for the resume rewrite completion.
+    """
+    return assemble_resume_prompt(resume_text, job_posting_text, considerations).prompt
+
+
+def resume_request(resume_text: str, job_posting_text: str, considerations: str) -> dict:
+    """
+    The completion parameters for rewriting the whole resume at once.
+    """
+    return dict(
+        messages=[
+            {"role": "system", "content": RESUME_GENERATION_SYSTEM_PROMPT},
+            {"role": "user", "content": build_resume_prompt(resume_text, job_posting_text, considerations)},
+        ],
+        temperature=0.7,
+        max_tokens=RESUME_MAX_OUTPUT_TOKENS,
+    )
+
+
+def _render_section_prompt(texts: Dict[str, str]) -> str:
+    considerations = texts["considerations"]
+    return (
+        "Your goal is to make suggestions for one job from a resume so it aligns better with the provided job posting, "
+        "highlights relevant skills and experience, and adheres to professional standards. Follow these instructions:\n\n"
+        f"{texts['extra_details']}\n\n"
+        "Specific Guidelines:\n"
+        "1. Make suggestions for the job entry below only. Label it by company name, e.g. 'Company: <name>', "
+        "followed by the job title and the bullet points.\n"
+        "2. Rewrite the description and bullet points to better align with the job posting. Use action-oriented language.\n"
+        "3. Highlight transferable skills and technologies relevant to the job posting. Add keywords from the job posting where appropriate.\n"
+        "4. Limit the suggestions to no more than 5 bullet points.\n\n"
+        "5. Do not list individual skills or technologies separately. Instead, incorporate them into the job description.\n\n"
+        "6. Do not include personal information, such as name, address, or contact details.\n\n"
+        "7. Do not include other jobs, education, certifications, an introduction or a footer.\n\n"
+        "Rest of the Resume (for context only, do not rewrite it):\n\n"
+        f"{texts['context'] or 'None'}\n\n"
+        "Job Entry:\n\n"
+        f"{texts['job']}\n\n"
+        "Job Posting:\n\n"
+        f"{texts['job_posting']}\n\n"
+        "Special Considerations (if provided):\n\n"
+        f"{considerations if considerations.strip() else 'None'}"
+    )
+
+
+def build_section_messages(job: str, context: str, job_posting_text: str, considerations: str) -> List[Dict[str, str]]:
     """
+    Build the chat messages for rewriting one job entry, fitted to the model's context budget.
+    The rest of the resume is trimmed first and the job entry last.
+    """
+    sections = [
+        PromptSection("context", dedupe_lines(context), priority=0),
+        PromptSection("job_posting", dedupe_lines(strip_job_posting_boilerplate(job_posting_text)),
+                      priority=1, min_tokens=300),
+        PromptSection("extra_details", settings.EXTRA_DETAILS_FOR_RESUME_GENERATION,
+                      priority=2, min_tokens=EXTRA_DETAILS_MIN_TOKENS),
+        PromptSection("considerations", considerations or "", priority=3, min_tokens=100),
+        PromptSection("job", dedupe_lines(job), priority=4, min_tokens=200),
+    ]
+    budget = (context_budget(openai_model, RESUME_SECTION_MAX_OUTPUT_TOKENS)
+              - estimate_tokens(RESUME_GENERATION_SYSTEM_PROMPT))
+    prompt_budget = fit_prompt(_render_section_prompt, sections, budget, openai_model)
+    _warn_if_extra_details_trimmed(prompt_budget)
+    return [
+        {"role": "system", "content": RESUME_GENERATION_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt_budget.prompt},
+    ]
+
+
+def section_cache_key(job: str, context: str, job_posting_text: str, considerations: str, model: str) -> str:
+    """
+    Cache key for one rewritten job by model. A later generation only misses for
+    the jobs whose text, resume context, posting or considerations changed.
+    """
+    payload = json.dumps([
+        job,
+        hashlib.sha256(context.encode("utf-8")).hexdigest(),
+        hashlib.sha256(job_posting_text.encode("utf-8")).hexdigest(),
+        hashlib.sha256((considerations or "").encode("utf-8")).hexdigest(),
+        model,
+        settings.EXTRA_DETAILS_FOR_RESUME_GENERATION,
+    ])
+    return RESUME_SECTION_CACHE_KEY_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def resume_footer(resume_text: str) -> str:
+    """
+    The Resume Righter footer, left off resumes of its author.
+    """
+    return "" if "Randy Hash" in resume_text else RESUME_FOOTER
+
+
+def split_for_generation(resume_text: str) -> Optional[ResumeSplit]:
+    """
+    :return: The resume's jobs if it should be rewritten job by job, or None to
+             rewrite it with a single completion.
+    """
+    if not settings.GENERATION_SECTION_PARALLEL:
+        return None
+    return split_resume_jobs(resume_text)
+
+
+@stage_timer("render_docx")
+def render_resume_docx(rewritten_text: str) -> bytes:
+    """
+    Render the rewritten resume text as a .docx file.
+    :param rewritten_text: The text returned by the model.
+    :return: The .docx file contents.
+    """
+    return rendering_service.render_resume_docx(rewritten_text)
+
+
+def generation_key(resume_text: str, job_posting_text: str, considerations: str) -> str:
+    """
+    Single-flight key for a generation; identical requests overlapping in time share one completion.
+    """
+    return get_single_flight().make_key(
+        resume_text, job_posting_text, considerations or "", openai_model, settings.EXTRA_DETAILS_FOR_RESUME_GENERATION,
+    )
+
+
+def generate_rewritten_text(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> str:
+    """
+    Generate the rewritten resume text based on the original resume, job posting, and special considerations.
+    Concurrent identical requests, from this worker or another, wait for one completion and share it.
+    """
+    return get_single_flight().run(
+        generation_key(resume_text, job_posting_text, considerations),
+        lambda: _complete_rewritten_text(resume_text, job_posting_text, considerations),
+    )
+
+
+def _complete_rewritten_text(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> str:
+    split = split_for_generation(resume_text)
+    if split is not None:
+        return "".join(_rewritten_section_chunks(split, resume_text, job_posting_text, considerations)).strip()
+    return _complete_whole_resume(resume_text, job_posting_text, considerations)
+
+
+def _complete_whole_resume(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> str:
     try:
-        if file_type == "pdf":
-            text = ""
-            pdf_document = fitz.open(stream=file.read(), filetype="pdf")
-            for page in pdf_document:
-                text += page.get_text()
-            pdf_document.close()
-            return text
-        elif file_type == "docx":
-            doc = docx.Document(file)
-            return "\n".join([p.text for p in doc.paragraphs])
-        elif file_type == "txt":
-            return file.read().decode("utf-8")
-        else:
-            raise ValueError("Unsupported file type.")
+        # Generate rewritten resume using OpenAI API
+        response = create_completion("generate", **resume_request(resume_text, job_posting_text, considerations))
+        return response.choices[0].message.content.strip()
+
+    except openai.OpenAIError as e:
+        logger.error("OpenAI API error: %s", e)
+        raise
     except Exception as e:
-        print(f"Error extracting text from {file_type}: {e}")
-        return ""
+        logger.exception("Unexpected error: %s", e)
+        raise
 
 
 def generate_rewritten_resume(
@@ -135,59 +647,174 @@ def generate_rewritten_resume(
 ) -> bytes:
     """
     Generate a rewritten resume based on the original resume, job posting, and special considerations.
+    :return: The rewritten resume as a .docx file.
     """
-    extra_details = settings.EXTRA_DETAILS_FOR_RESUME_GENERATION
+    return render_resume_docx(generate_rewritten_text(resume_text, job_posting_text, considerations))
 
-    try:
-        prompt = (
-            "Your goal is to make suggestions for each job so it aligns better with the provided job posting, highlights relevant skills and experience, "
-            "and adheres to professional standards. Follow these instructions:\n\n"
-            f"{extra_details}\n\n"
-            "Specific Guidelines:\n"
-            "1. Make suggestions for all jobs listed in the original resume. Do not remove any job entries.\n"
-            "2. Rewrite descriptions and bullet points for each job posting to better align with the job posting. Use action-oriented language.\n"
-            "3. Highlight transferable skills and technologies relevant to the job posting. Add keywords from the job posting where appropriate.\n"
-            "4. Limit the suggestions for each job listing to no more than 5 bullet points.\n\n"
-            "5. Do not list individual skills or technologies separately. Instead, incorporate them into the job descriptions.\n\n"
-            "6. Do not include personal information, such as name, address, or contact details, in the resume suggestion document.\n\n"
-            "7. Do not include any education or certification information in the resume suggestion document.\n\n"
-            "Original Resume:\n\n"
-            f"{resume_text}\n\n"
-            "Job Posting:\n\n"
-            f"{job_posting_text}\n\n"
-            "Special Considerations (if provided):\n\n"
-            f"{considerations if considerations.strip() else 'None'}\n\n"
-            "Output the suggestions for the resume in a clean format, labeling each job by company name.\n\n"
-            "Include a footer only if the name \"Randy Hash\" is not present in the resume. The footer should say:\n"
-            "'This resume was generated using Resume Righter, written by Randy Hash. The source code for this project can be found at {insert link to https://github.com/hashr25/ResumeRighter that simple says 'GitHub'}'."
-        )
 
-        # Generate rewritten resume using OpenAI API
-        response = openai.chat.completions.create(
-            model=openai_model,
-            messages=[
-                {"role": "system", "content": "You are a professional resume consultant tasked with improving a resume by rewriting bullet points for previous jobs. "},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=4096,
-        )
-        rewritten_text = response.choices[0].message.content.strip()
+def stream_rewritten_resume(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> Iterator[str]:
+    """
+    Stream the rewritten resume text as the model produces it.
+    :param resume_text: The validated resume text.
+    :param job_posting_text: The validated job posting text.
+    :param considerations: The special considerations, may be empty.
+    :return: An iterator over text chunks, in order. A resume rewritten job by job
+        arrives one job per chunk. If an identical generation is already in
+        flight, its whole text arrives as a single chunk once it finishes.
+    """
+    with get_single_flight().flight(generation_key(resume_text, job_posting_text, considerations)) as flight:
+        if flight.shared:
+            yield flight.result
+            return
+
+        split = split_for_generation(resume_text)
+        if split is not None:
+            stream = _rewritten_section_chunks(split, resume_text, job_posting_text, considerations)
+        else:
+            stream = _stream_completion(resume_text, job_posting_text, considerations)
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        flight.publish("".join(chunks).strip())
 
-        # Create a .docx file with the rewritten resume
-        document = Document()
-        for paragraph in rewritten_text.split("\n\n"):
-            document.add_paragraph(paragraph.strip())
 
-        # Save the document to a byte stream
-        byte_stream = BytesIO()
-        document.save(byte_stream)
-        byte_stream.seek(0)
-        return byte_stream.getvalue()
+def _stream_completion(
+        resume_text: str, job_posting_text: str, considerations: str
+) -> Iterator[str]:
+    try:
+        stream = create_completion(
+            "generate_stream", **resume_request(resume_text, job_posting_text, considerations), stream=True,
+        )
+        yield from _content_deltas(stream)
 
     except openai.OpenAIError as e:
-        print(f"OpenAI API error: {e}")
+        logger.error("OpenAI API error: %s", e)
         raise
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        logger.exception("Unexpected error: %s", e)
+        raise
+
+
+def _content_deltas(stream) -> Iterator[str]:
+    """
+    :return: The text of a streamed completion, as it arrives.
+    """
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+class DeltaStripper:
+    """
+    Strips streamed text the way str.strip() strips the whole of it: leading
+    whitespace is dropped and trailing whitespace held back until more text follows.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.pending = ""
+
+    def feed(self, delta: str) -> str:
+        """
+        :return: The part of delta that can be sent on, possibly empty.
+        """
+        text = self.pending + delta
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        stripped = text.rstrip()
+        self.pending = text[len(stripped):]
+        return stripped
+
+
+def section_request(job: str, context: str, job_posting_text: str, considerations: str) -> dict:
+    """
+    The completion parameters for rewriting one job.
+    """
+    return dict(
+        messages=build_section_messages(job, context, job_posting_text, considerations),
+        temperature=0.7,
+        max_tokens=RESUME_SECTION_MAX_OUTPUT_TOKENS,
+    )
+
+
+def _rewrite_section(job: str, context: str, job_posting_text: str, considerations: str) -> str:
+    return cached_completion(
+        "generate_section",
+        section_request(job, context, job_posting_text, considerations),
+        lambda response: response.choices[0].message.content.strip(),
+        lambda model, kwargs: section_cache_key(job, context, job_posting_text, considerations, model),
+    )
+
+
+def _stream_section(job: str, context: str, job_posting_text: str, considerations: str) -> Iterator[str]:
+    """
+    Rewrite one job like _rewrite_section, streaming the text as the model writes
+    it. The result shares _rewrite_section's cache entries.
+    """
+    kwargs = section_request(job, context, job_posting_text, considerations)
+    completion_cache = get_completion_cache()
+    value = completion_cache.get(
+        section_cache_key(job, context, job_posting_text, considerations, preferred_model("generate_section", kwargs))
+    )
+    if value is not None:
+        yield value
+        return
+
+    routed = []
+    stream = _instrumented_stream(
+        "generate_section_stream", dict(kwargs, stream=True, stream_options={"include_usage": True}), routed.append,
+    )
+    stripper = DeltaStripper()
+    parts = []
+    for delta in _content_deltas(stream):
+        part = stripper.feed(delta)
+        if part:
+            parts.append(part)
+            yield part
+    completion_cache.set(section_cache_key(job, context, job_posting_text, considerations, routed[0]), "".join(parts))
+
+
+def _rewritten_section_chunks(
+        split: ResumeSplit, resume_text: str, job_posting_text: str, considerations: str
+) -> Iterator[str]:
+    """
+    Rewrite every job with its own completion, GENERATION_SECTION_CONCURRENCY at a
+    time, so the wait is set by the longest job rather than the whole resume. The
+    first job is streamed token by token from this thread, so the reader sees text
+    as soon as the model starts writing.
+    :return: An iterator over the rewritten text in resume order: the first job as
+        it is written, each later job as soon as it and the jobs before it are
+        done, then the footer.
+    """
+    first, rest = split.jobs[0], split.jobs[1:]
+    # The streamed job takes one of the GENERATION_SECTION_CONCURRENCY slots.
+    workers = min(len(rest), settings.GENERATION_SECTION_CONCURRENCY - 1)
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="generate-section")
+
+    def submit(job: str):
+        return executor.submit(
+            contextvars.copy_context().run, _rewrite_section, job, split.context, job_posting_text, considerations,
+        )
+
+    try:
+        futures = [submit(job) for job in rest] if workers > 0 else []
+        yield from _stream_section(first, split.context, job_posting_text, considerations)
+        futures = futures or [submit(job) for job in rest]
+        for future in futures:
+            yield "\n\n" + future.result()
+        footer = resume_footer(resume_text)
+        if footer:
+            yield f"\n\n{footer}"
+    except openai.OpenAIError as e:
+        logger.error("OpenAI API error: %s", e)
         raise
+    finally:
+        # A failed job fails the whole rewrite, so the rest needn't finish.
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,178 @@
+import functools
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from django.conf import settings
+
+try:
+    import tiktoken
+except ImportError:
+    # tiktoken is pinned in requirements.txt; without it token counts fall back
+    # to a character based estimate, which undercounts non-English text.
+    tiktoken = None
+
+# Tokens used by chat message framing on top of the message contents.
+MESSAGE_OVERHEAD_TOKENS = 16
+# Characters per token for English text when tiktoken isn't installed.
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[...]"
+
+# Paragraphs of a job posting that say nothing about the job itself.
+JOB_POSTING_BOILERPLATE_REGEX = re.compile(
+    r"equal (?:employment )?opportunity|\beeo\b|affirmative action|reasonable accommodation|e-verify|"
+    r"without regard to (?:race|sex|age)|protected veteran|pay transparency|privacy (?:policy|notice)|"
+    r"cookies?\b|all rights reserved|recruitment (?:agencies|fraud)|unsolicited resumes",
+    re.IGNORECASE,
+)
+BULLET_PREFIX_REGEX = re.compile(r"^\s*(?:[-*•▪◦●]|\d+[.)])\s*")
+# Lines shorter than this are only deduplicated when they are bullets, so that
+# repeated short lines like a job title or "Remote" keep the resume's structure.
+DEDUPE_MIN_LINE_LENGTH = 40
+
+
+@dataclass
+class PromptSection:
+    """
+    A variable part of a prompt. When the prompt is over budget, sections are
+    trimmed in ascending priority, never below min_tokens.
+    """
+    name: str
+    text: str
+    priority: int
+    min_tokens: int = 0
+
+
+@dataclass
+class PromptBudget:
+    """
+    The assembled prompt and its token accounting.
+    """
+    prompt: str
+    budget: int
+    total_tokens: int
+    section_tokens: Dict[str, int]
+    trimmed: List[str] = field(default_factory=list)
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding_for_model(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text: str, model: str = "") -> int:
+    """
+    Count the tokens in text, exactly with tiktoken when it is installed or
+    approximately from the character count otherwise.
+    """
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_encoding_for_model(model or settings.OPENAI_MODEL).encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "") -> str:
+    """
+    Cut text down to roughly max_tokens, preferring to end at a line break.
+    """
+    if estimate_tokens(text, model) <= max_tokens:
+        return text
+    # Leave room for the marker, or the section would still be over its share.
+    keep_tokens = max_tokens - estimate_tokens(TRUNCATION_MARKER, model)
+    if keep_tokens <= 0:
+        return ""
+
+    if tiktoken is not None:
+        encoding = _encoding_for_model(model or settings.OPENAI_MODEL)
+        truncated = encoding.decode(encoding.encode(text)[:keep_tokens])
+    else:
+        truncated = text[:keep_tokens * CHARS_PER_TOKEN]
+
+    line_break = truncated.rfind("\n")
+    if line_break > len(truncated) * 0.8:
+        truncated = truncated[:line_break]
+    return truncated.rstrip() + TRUNCATION_MARKER
+
+
+def strip_job_posting_boilerplate(text: str) -> str:
+    """
+    Drop equal-opportunity statements, legal notices and similar paragraphs from a job posting.
+    """
+    paragraphs = re.split(r"\n\s*\n", text)
+    return "\n\n".join(paragraph for paragraph in paragraphs if not JOB_POSTING_BOILERPLATE_REGEX.search(paragraph))
+
+
+def dedupe_lines(text: str) -> str:
+    """
+    Remove repeated bullets and long lines, keeping the first occurrence.
+    """
+    seen = set()
+    lines = []
+    for line in text.split("\n"):
+        is_bullet = bool(BULLET_PREFIX_REGEX.match(line))
+        key = " ".join(BULLET_PREFIX_REGEX.sub("", line).lower().split())
+        if key and (is_bullet or len(key) >= DEDUPE_MIN_LINE_LENGTH):
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def context_budget(model: str, max_output_tokens: int) -> int:
+    """
+    The number of prompt tokens available to a model once room is left for its output.
+    """
+    context_window = settings.OPENAI_CONTEXT_WINDOWS.get(model, settings.OPENAI_DEFAULT_CONTEXT_WINDOW)
+    budget = context_window - max_output_tokens - MESSAGE_OVERHEAD_TOKENS
+    if settings.PROMPT_MAX_INPUT_TOKENS:
+        budget = min(budget, settings.PROMPT_MAX_INPUT_TOKENS)
+    return budget
+
+
+def fit_prompt(
+        render: Callable[[Dict[str, str]], str],
+        sections: List[PromptSection],
+        budget: int,
+        model: str = "",
+) -> PromptBudget:
+    """
+    Render a prompt, trimming its lowest priority sections until it fits the budget.
+    :param render: Builds the full prompt from the section texts, keyed by section name.
+    :param sections: The variable parts of the prompt.
+    :param budget: The maximum number of prompt tokens.
+    :param model: The model whose tokenizer should be used for counting.
+    :return: The fitted prompt and its token breakdown.
+    """
+    texts = {section.name: section.text for section in sections}
+    section_tokens = {section.name: estimate_tokens(section.text, model) for section in sections}
+    fixed_tokens = estimate_tokens(render({name: "" for name in texts}), model)
+    over = fixed_tokens + sum(section_tokens.values()) - budget
+
+    trimmed = []
+    for section in sorted(sections, key=lambda s: s.priority):
+        if over <= 0:
+            break
+        current = section_tokens[section.name]
+        allowed = max(current - over, section.min_tokens)
+        if allowed >= current:
+            continue
+        texts[section.name] = truncate_to_tokens(texts[section.name], allowed, model)
+        section_tokens[section.name] = estimate_tokens(texts[section.name], model)
+        over -= current - section_tokens[section.name]
+        trimmed.append(section.name)
+
+    prompt = render(texts)
+    section_tokens["instructions"] = fixed_tokens
+    return PromptBudget(
+        prompt=prompt,
+        budget=budget,
+        total_tokens=estimate_tokens(prompt, model),
+        section_tokens=section_tokens,
+        trimmed=trimmed,
+    )
@@ -0,0 +1,405 @@
+import asyncio
+import logging
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+import openai
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from resume_app.services.metrics_service import registry
+from resume_app.services.prompt_service import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Failures that say nothing about the request itself and are worth another try.
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+rate_limit_wait = registry.histogram(
+    "openai_rate_limit_wait_seconds", "Time spent waiting for the shared OpenAI rate limit.", ("model",),
+    buckets=(0.0, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf")),
+)
+rate_limit_rejections = registry.counter(
+    "openai_rate_limit_rejections_total", "OpenAI calls refused before being sent.", ("model", "reason"),
+)
+openai_retries = registry.counter("openai_retries_total", "OpenAI calls retried after a failure.", ("model", "error"))
+circuit_state = registry.gauge(
+    "openai_circuit_state", "OpenAI circuit breaker state (0 closed, 1 half open, 2 open), the worst of any worker.",
+    ("model",), aggregate="livemax",
+)
+
+
+class RateLimitExceeded(openai.OpenAIError):
+    """
+    Raised when a call would wait longer than OPENAI_RATE_LIMIT_MAX_WAIT for the rate limit.
+    """
+
+
+class CircuitOpenError(openai.OpenAIError):
+    """
+    Raised without calling OpenAI while the circuit breaker for a model is open.
+    """
+
+
+class TokenBucketLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets for each model, kept in a
+    SQLite file so every worker on the dyno draws from the same budget. Callers
+    reserve capacity up front and sleep off any deficit, which queues them in
+    arrival order instead of letting them race for the next refill.
+    """
+
+    def __init__(self, path: str, limits: Dict[str, Tuple[int, int]], default_limits: Tuple[int, int]):
+        self.path = path
+        self.limits = limits
+        self.default_limits = default_limits
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=20, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def _buckets(self, model: str, tokens: int):
+        requests_per_minute, tokens_per_minute = self.limits.get(model, self.default_limits)
+        if requests_per_minute > 0:
+            yield f"{model}:requests", requests_per_minute, 1
+        if tokens_per_minute > 0:
+            # A request bigger than the whole bucket would otherwise never fit.
+            yield f"{model}:tokens", tokens_per_minute, min(tokens, tokens_per_minute)
+
+    def reserve(self, model: str, tokens: int, max_wait: float) -> float:
+        """
+        Take one request and `tokens` tokens from the model's buckets.
+        :return: Seconds the caller must wait before sending the request.
+        :raises RateLimitExceeded: If that wait would exceed max_wait; nothing is taken.
+        """
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            levels = {}
+            wait = 0.0
+            for name, capacity, amount in self._buckets(model, tokens):
+                row = connection.execute("SELECT level, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+                level = capacity if row is None else min(capacity, row[0] + (now - row[1]) * capacity / 60)
+                levels[name] = level - amount
+                wait = max(wait, -levels[name] * 60 / capacity)
+            if wait > max_wait:
+                raise RateLimitExceeded(f"Rate limit for {model} would need a {wait:.1f}s wait.")
+            connection.executemany(
+                "INSERT INTO buckets (name, level, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET level = excluded.level, updated_at = excluded.updated_at",
+                [(name, level, now) for name, level in levels.items()],
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+    def refund(self, model: str, tokens: int) -> None:
+        """
+        Return tokens reserved for a call that used fewer than estimated.
+        """
+        _, tokens_per_minute = self.limits.get(model, self.default_limits)
+        if tokens <= 0 or tokens_per_minute <= 0:
+            return
+        self._connection().execute(
+            "UPDATE buckets SET level = MIN(?, level + ?) WHERE name = ?",
+            (tokens_per_minute, tokens, f"{model}:tokens"),
+        )
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker for one model. It opens after failure_threshold
+    consecutive upstream failures, fails fast for reset_timeout seconds, then
+    lets a single trial call through and closes again if it succeeds.
+    """
+
+    def __init__(self, model: str, failure_threshold: int, reset_timeout: float):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        circuit_state.set(CIRCUIT_STATES[state], model=self.model)
+
+    def before_call(self) -> None:
+        """
+        :raises CircuitOpenError: If the call should not be sent.
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"OpenAI circuit for {self.model} is open.")
+                self._set_state("half_open")
+            if self.state == "half_open":
+                if self._trial_in_flight:
+                    raise CircuitOpenError(f"OpenAI circuit for {self.model} is half open.")
+                self._trial_in_flight = True
+
+    def release_trial(self) -> None:
+        """
+        Give back the half open trial slot of a call that was never sent, or
+        whose outcome says nothing about the upstream's health.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != "closed":
+                logger.info("openai circuit closed model=%s", self.model)
+                self._set_state("closed")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("openai circuit opened model=%s failures=%d", self.model, self.failures)
+                self.opened_at = time.monotonic()
+                self._set_state("open")
+
+
+_limiter: Optional[TokenBucketLimiter] = None
+_breakers: Dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    """
+    Return the process wide handle on the shared rate limit buckets.
+    """
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = TokenBucketLimiter(
+                settings.OPENAI_RATE_LIMIT_DB,
+                settings.OPENAI_RATE_LIMITS,
+                (settings.OPENAI_DEFAULT_REQUESTS_PER_MINUTE, settings.OPENAI_DEFAULT_TOKENS_PER_MINUTE),
+            )
+        return _limiter
+
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    with _lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = _breakers[model] = CircuitBreaker(
+                model, settings.OPENAI_CIRCUIT_FAILURE_THRESHOLD, settings.OPENAI_CIRCUIT_RESET_TIMEOUT,
+            )
+        return breaker
+
+
+def estimate_request_tokens(kwargs: dict) -> int:
+    """
+    Rough upper bound on the tokens a completion request will use, for reserving
+    rate limit capacity. The exact count is reconciled from the response's usage.
+    """
+    prompt_chars = sum(len(message.get("content") or "") for message in kwargs.get("messages", []))
+    return math.ceil(prompt_chars / CHARS_PER_TOKEN) + kwargs.get("max_tokens", 0)
+
+
+def _retry_after(error: openai.OpenAIError) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(headers["retry-after"]).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _before_attempt(model: str, tokens: int) -> float:
+    """
+    Check the circuit and reserve rate limit capacity for one attempt.
+    :return: Seconds to wait before sending it.
+    """
+    try:
+        get_circuit_breaker(model).before_call()
+    except CircuitOpenError:
+        rate_limit_rejections.inc(model=model, reason="circuit_open")
+        raise
+    reserved = False
+    try:
+        wait = get_rate_limiter().reserve(model, tokens, settings.OPENAI_RATE_LIMIT_MAX_WAIT)
+        reserved = True
+    except RateLimitExceeded:
+        rate_limit_rejections.inc(model=model, reason="rate_limit")
+        raise
+    finally:
+        if not reserved:
+            # The call won't be sent, so it can't be the half open trial.
+            get_circuit_breaker(model).release_trial()
+    rate_limit_wait.observe(wait, model=model)
+    return wait
+
+
+def _after_failure(model: str, error: Exception, attempt: int) -> float:
+    """
+    Record a failed attempt and decide whether to retry it.
+    :return: Seconds to back off before the next attempt.
+    :raises: The original error if it isn't retryable or the retries are used up.
+    """
+    breaker = get_circuit_breaker(model)
+    if not isinstance(error, RETRYABLE_ERRORS):
+        # Bad requests and the like say nothing about the upstream's health, so
+        # the breaker is left as it is; only a trial slot this call held is freed.
+        breaker.release_trial()
+        raise error
+    if isinstance(error, openai.RateLimitError):
+        # A 429 shows the model is up but busy: it neither resets the failure
+        # count nor adds to it, and a trial that got one lets another try.
+        breaker.release_trial()
+    else:
+        breaker.record_failure()
+    if attempt >= settings.OPENAI_MAX_RETRIES or breaker.state == "open":
+        raise error
+
+    delay = _retry_after(error)
+    if delay is None:
+        # Full jitter keeps the workers that failed together from retrying together.
+        delay = random.uniform(0, settings.OPENAI_RETRY_BASE_DELAY * 2 ** attempt)
+    delay = min(delay, settings.OPENAI_RETRY_MAX_DELAY)
+    openai_retries.inc(model=model, error=error.__class__.__name__)
+    logger.warning("openai retry model=%s attempt=%d delay=%.2fs error=%s", model, attempt + 1, delay, error)
+    return delay
+
+
+def _reconcile_usage(model: str, reserved_tokens: int, response) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        get_rate_limiter().refund(model, reserved_tokens - usage.total_tokens)
+
+
+def _reconciled_stream(model: str, reserved_tokens: int, stream: openai.Stream) -> Iterator:
+    """
+    Pass a streamed completion's chunks through, reconciling the reservation
+    from the usage chunk that ends a stream requested with include_usage. A
+    stream abandoned before then keeps its whole reservation.
+    """
+    with stream:
+        for chunk in stream:
+            _reconcile_usage(model, reserved_tokens, chunk)
+            yield chunk
+
+
+async def _areconciled_stream(model: str, reserved_tokens: int, stream: openai.AsyncStream) -> AsyncIterator:
+    """
+    Async variant of _reconciled_stream.
+    """
+    async with stream:
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                await sync_to_async(_reconcile_usage, thread_sensitive=False)(model, reserved_tokens, chunk)
+            yield chunk
+
+
+def call_with_limits(
+        model: str, kwargs: dict, create: Callable[[], T], on_success: Optional[Callable[[float], None]] = None
+) -> T:
+    """
+    Send an OpenAI request under the shared rate limit, retrying transient
+    failures with jittered exponential backoff (or the server's Retry-After)
+    and failing fast while the model's circuit breaker is open.
+    :param model: The model the request is for.
+    :param kwargs: The request parameters, used to estimate its token cost.
+    :param create: Sends the request once. A streamed response is returned as an
+                   iterator over its chunks.
+    :param on_success: Called with how long the successful attempt took, leaving
+                       out rate limit waits and earlier attempts.
+    """
+    tokens = estimate_request_tokens(kwargs)
+    attempt = 0
+    while True:
+        wait = _before_attempt(model, tokens)
+        try:
+            time.sleep(wait)
+            started = time.monotonic()
+            response = create()
+        except Exception as e:
+            # A failed attempt consumed no tokens upstream; the retry reserves them again.
+            get_rate_limiter().refund(model, tokens)
+            time.sleep(_after_failure(model, e, attempt))
+            attempt += 1
+            continue
+        except BaseException:
+            # Interrupted before the outcome was known; another call may be the trial.
+            get_circuit_breaker(model).release_trial()
+            raise
+        get_circuit_breaker(model).record_success()
+        if on_success is not None:
+            on_success(time.monotonic() - started)
+        if isinstance(response, openai.Stream):
+            return _reconciled_stream(model, tokens, response)
+        _reconcile_usage(model, tokens, response)
+        return response
+
+
+async def acall_with_limits(
+        model: str, kwargs: dict, create: Callable[[], Awaitable[T]],
+        on_success: Optional[Callable[[float], None]] = None,
+) -> T:
+    """
+    Async variant of call_with_limits.
+    """
+    tokens = estimate_request_tokens(kwargs)
+    attempt = 0
+    while True:
+        wait = await sync_to_async(_before_attempt, thread_sensitive=False)(model, tokens)
+        try:
+            await asyncio.sleep(wait)
+            started = time.monotonic()
+            response = await create()
+        except Exception as e:
+            await sync_to_async(get_rate_limiter().refund, thread_sensitive=False)(model, tokens)
+            await asyncio.sleep(_after_failure(model, e, attempt))
+            attempt += 1
+            continue
+        except BaseException:
+            # Cancelled before the outcome was known; another call may be the trial.
+            get_circuit_breaker(model).release_trial()
+            raise
+        get_circuit_breaker(model).record_success()
+        if on_success is not None:
+            on_success(time.monotonic() - started)
+        if isinstance(response, openai.AsyncStream):
+            return _areconciled_stream(model, tokens, response)
+        await sync_to_async(_reconcile_usage, thread_sensitive=False)(model, tokens, response)
+        return response
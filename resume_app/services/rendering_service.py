@@ -0,0 +1,269 @@
+import re
+import threading
+import zipfile
+from dataclasses import dataclass, field
+from io import BytesIO
+from html import escape as escape_html
+from typing import Callable, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+DOCUMENT_PART = "word/document.xml"
+
+# Paragraph style ids used for each kind of line. They exist in python-docx's
+# default template, and a custom RESUME_DOCX_TEMPLATE is expected to define them too.
+COMPANY_STYLE = "Heading1"
+ROLE_STYLE = "Heading2"
+BULLET_STYLE = "ListBullet"
+
+BULLET_REGEX = re.compile(r"^\s*(?:[-*•▪◦●]|\d+[.)])\s+")
+MARKDOWN_HEADING_REGEX = re.compile(r"^\s*#{1,6}\s*")
+LABELLED_COMPANY_REGEX = re.compile(r"^(?:company(?: name)?|employer)\s*:\s*(.+)$", re.IGNORECASE)
+LABELLED_ROLE_REGEX = re.compile(r"^(?:role|title|position|job title)\s*:\s*(.+)$", re.IGNORECASE)
+# Characters that are not allowed anywhere in an XML 1.0 document.
+INVALID_XML_CHARS_REGEX = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+@dataclass
+class ResumeSection:
+    """
+    One job from the model's output. Text outside any job (an intro or the
+    footer) is kept in a section without a company.
+    """
+    company: str = ""
+    role: str = ""
+    bullets: List[str] = field(default_factory=list)
+    paragraphs: List[str] = field(default_factory=list)
+
+
+def _strip_emphasis(line: str) -> str:
+    return line.strip().strip("*_").strip()
+
+
+def _is_heading(raw_line: str, line: str) -> bool:
+    if MARKDOWN_HEADING_REGEX.match(raw_line):
+        return True
+    stripped = raw_line.strip()
+    # A whole line in bold, or a short line introducing the bullets below it.
+    if stripped.startswith("**") and stripped.endswith("**") and len(stripped) > 4:
+        return True
+    return line.endswith(":") and len(line) <= 80
+
+
+def parse_resume_sections(text: str) -> List[ResumeSection]:
+    """
+    Split the rewritten resume into per-company sections of role and bullets.
+    :param text: The text returned by the model.
+    :return: The sections in their original order.
+    """
+    sections = [ResumeSection()]
+    for raw_line in text.splitlines():
+        if not raw_line.strip():
+            continue
+        current = sections[-1]
+
+        if BULLET_REGEX.match(raw_line):
+            current.bullets.append(_strip_emphasis(BULLET_REGEX.sub("", raw_line)))
+            continue
+
+        line = _strip_emphasis(MARKDOWN_HEADING_REGEX.sub("", raw_line))
+        company = LABELLED_COMPANY_REGEX.match(line)
+        role = LABELLED_ROLE_REGEX.match(line)
+        if company:
+            sections.append(ResumeSection(company=_strip_emphasis(company.group(1))))
+        elif role and not current.role:
+            current.role = _strip_emphasis(role.group(1))
+        elif _is_heading(raw_line, line):
+            heading = line.rstrip(":").strip()
+            if current.company and not current.role and not current.bullets:
+                current.role = heading
+            else:
+                sections.append(ResumeSection(company=heading))
+        elif current.company and not current.role and not current.bullets and not current.paragraphs:
+            current.role = line
+        else:
+            current.paragraphs.append(line)
+
+    return [section for section in sections if section.company or section.bullets or section.paragraphs]
+
+
+def _paragraph_xml(text: str, style: Optional[str] = None) -> str:
+    text = escape(INVALID_XML_CHARS_REGEX.sub("", text))
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f'<w:p>{properties}<w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+
+def sections_to_body_xml(sections: List[ResumeSection]) -> str:
+    """
+    Render sections as WordprocessingML paragraphs for the document body.
+    """
+    parts = []
+    for section in sections:
+        if section.company:
+            parts.append(_paragraph_xml(section.company, COMPANY_STYLE))
+        if section.role:
+            parts.append(_paragraph_xml(section.role, ROLE_STYLE))
+        parts.extend(_paragraph_xml(bullet, BULLET_STYLE) for bullet in section.bullets)
+        parts.extend(_paragraph_xml(paragraph) for paragraph in section.paragraphs)
+    return "".join(parts)
+
+
+class DocxTemplate:
+    """
+    A .docx package loaded once, kept as a zip of every part except the main
+    document plus the main document's XML split around the point where the
+    resume body is inserted. Rendering only appends one new part to a copy of
+    the zip, so the other parts are never parsed or recompressed per request.
+    """
+
+    def __init__(self, template_bytes: bytes):
+        with zipfile.ZipFile(BytesIO(template_bytes)) as template_zip:
+            document_xml = template_zip.read(DOCUMENT_PART).decode("utf-8")
+            package = BytesIO()
+            with zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as package_zip:
+                for item in template_zip.infolist():
+                    if item.filename != DOCUMENT_PART:
+                        package_zip.writestr(item, template_zip.read(item.filename))
+        self.package = package.getvalue()
+
+        # Anything already in the template's body (a letterhead, say) stays above the
+        # resume. The final section properties must remain the last child of the body.
+        insert_at = document_xml.rfind("<w:sectPr")
+        if insert_at == -1:
+            insert_at = document_xml.rfind("</w:body>")
+        self.document_prefix = document_xml[:insert_at]
+        self.document_suffix = document_xml[insert_at:]
+
+    @classmethod
+    def from_path(cls, path: str) -> "DocxTemplate":
+        with open(path, "rb") as template_file:
+            return cls(template_file.read())
+
+    @classmethod
+    def default(cls) -> "DocxTemplate":
+        import docx
+
+        byte_stream = BytesIO()
+        docx.Document().save(byte_stream)
+        return cls(byte_stream.getvalue())
+
+    def render(self, body_xml: str) -> bytes:
+        output = BytesIO(self.package)
+        output.seek(0, 2)
+        with zipfile.ZipFile(output, "a", zipfile.ZIP_DEFLATED) as package_zip:
+            package_zip.writestr(DOCUMENT_PART, self.document_prefix + body_xml + self.document_suffix)
+        return output.getvalue()
+
+
+_template: Optional[DocxTemplate] = None
+_template_lock = threading.Lock()
+
+
+def get_docx_template() -> DocxTemplate:
+    """
+    Return the process wide .docx template, loading RESUME_DOCX_TEMPLATE (or
+    python-docx's default template) the first time it is needed.
+    """
+    global _template
+    with _template_lock:
+        if _template is None:
+            if settings.RESUME_DOCX_TEMPLATE:
+                _template = DocxTemplate.from_path(settings.RESUME_DOCX_TEMPLATE)
+            else:
+                _template = DocxTemplate.default()
+        return _template
+
+
+def render_resume_docx(rewritten_text: str) -> bytes:
+    """
+    Render the rewritten resume text into the .docx template, one heading per
+    company, a subheading for the role and a bulleted list of suggestions.
+    :param rewritten_text: The text returned by the model.
+    :return: The .docx file contents.
+    """
+    return get_docx_template().render(sections_to_body_xml(parse_resume_sections(rewritten_text)))
+
+
+def render_resume_markdown(rewritten_text: str) -> bytes:
+    """
+    Render the rewritten resume as Markdown.
+    """
+    lines = []
+    for section in parse_resume_sections(rewritten_text):
+        if section.company:
+            lines.extend([f"## {section.company}", ""])
+        if section.role:
+            lines.extend([f"### {section.role}", ""])
+        if section.bullets:
+            lines.extend(f"- {bullet}" for bullet in section.bullets)
+            lines.append("")
+        for paragraph in section.paragraphs:
+            lines.extend([paragraph, ""])
+    return "\n".join(lines).strip().encode("utf-8") + b"\n"
+
+
+def _sections_to_html(sections: List[ResumeSection]) -> str:
+    parts = []
+    for section in sections:
+        if section.company:
+            parts.append(f"<h2>{escape_html(section.company)}</h2>")
+        if section.role:
+            parts.append(f"<h3>{escape_html(section.role)}</h3>")
+        if section.bullets:
+            parts.append("<ul>" + "".join(f"<li>{escape_html(bullet)}</li>" for bullet in section.bullets) + "</ul>")
+        parts.extend(f"<p>{escape_html(paragraph)}</p>" for paragraph in section.paragraphs)
+    return "".join(parts)
+
+
+def render_resume_html(rewritten_text: str) -> bytes:
+    """
+    Render the rewritten resume as a standalone HTML page for previewing in the browser.
+    """
+    return (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"UTF-8\"><title>Rewritten Resume</title>"
+        "<style>body{font-family:Calibri,Arial,sans-serif;max-width:800px;margin:40px auto;line-height:1.4}"
+        "h2{margin-bottom:0}h3{margin-top:4px;color:#555}</style></head><body>"
+        f"{_sections_to_html(parse_resume_sections(rewritten_text))}</body></html>"
+    ).encode("utf-8")
+
+
+def render_resume_pdf(rewritten_text: str) -> bytes:
+    """
+    Render the rewritten resume as a US letter PDF with PyMuPDF.
+    """
+    import fitz  # PyMuPDF
+
+    story = fitz.Story(html=_sections_to_html(parse_resume_sections(rewritten_text)))
+    page_rect = fitz.paper_rect("letter")
+    content_rect = page_rect + (72, 72, -72, -72)
+
+    byte_stream = BytesIO()
+    writer = fitz.DocumentWriter(byte_stream)
+    more = True
+    while more:
+        device = writer.begin_page(page_rect)
+        more, _ = story.place(content_rect)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+    return byte_stream.getvalue()
+
+
+@dataclass
+class OutputFormat:
+    content_type: str
+    extension: str
+    render: Callable[[str], bytes]
+    # Shown in the browser rather than downloaded.
+    inline: bool = False
+
+
+OUTPUT_FORMATS: Dict[str, OutputFormat] = {
+    "docx": OutputFormat(
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx", render_resume_docx,
+    ),
+    "pdf": OutputFormat("application/pdf", "pdf", render_resume_pdf),
+    "md": OutputFormat("text/markdown; charset=utf-8", "md", render_resume_markdown),
+    "html": OutputFormat("text/html; charset=utf-8", "html", render_resume_html, inline=True),
+}
@@ -0,0 +1,58 @@
+import uuid
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from resume_app.services.metrics_service import stage_timer
+from resume_app.services.rendering_service import OUTPUT_FORMATS
+
+GENERATED_RESUME_KEY_PREFIX = "generated_resume:"
+RENDERED_RESUME_KEY_PREFIX = "rendered_resume:"
+
+
+def store_generated_resume(rewritten_text: str) -> str:
+    """
+    Keep a finished rewrite around for a short time so the client can download it.
+    :param rewritten_text: The full text produced by the model.
+    :return: An opaque handle for fetching the result later.
+    """
+    handle = uuid.uuid4().hex
+    cache.set(
+        f"{GENERATED_RESUME_KEY_PREFIX}{handle}",
+        rewritten_text,
+        timeout=settings.GENERATED_RESUME_HANDLE_TTL,
+    )
+    return handle
+
+
+def load_generated_resume(handle: str) -> Optional[str]:
+    """
+    Look up a finished rewrite by the handle returned from store_generated_resume.
+    :param handle: The handle returned when the result was stored.
+    :return: The rewritten text, or None if the handle is unknown or expired.
+    """
+    return cache.get(f"{GENERATED_RESUME_KEY_PREFIX}{handle}")
+
+
+def get_rendered_resume(result_id: str, output_format: str, load_text: Callable[[], Optional[str]]) -> Optional[bytes]:
+    """
+    Render a finished rewrite in one of the OUTPUT_FORMATS. Each (result, format)
+    pair is rendered at most once and then served from the cache.
+    :param result_id: A stable id for the rewrite, such as its handle or job id.
+    :param output_format: A key of OUTPUT_FORMATS.
+    :param load_text: Returns the rewritten text, or None if it no longer exists.
+    :return: The rendered file contents, or None if the text no longer exists.
+    """
+    key = f"{RENDERED_RESUME_KEY_PREFIX}{result_id}:{output_format}"
+    content = cache.get(key)
+    if content is not None:
+        return content
+
+    rewritten_text = load_text()
+    if rewritten_text is None:
+        return None
+    with stage_timer(f"render_{output_format}"):
+        content = OUTPUT_FORMATS[output_format].render(rewritten_text)
+    cache.set(key, content, timeout=settings.GENERATED_RESUME_HANDLE_TTL)
+    return content
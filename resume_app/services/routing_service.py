@@ -0,0 +1,250 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import numpy as np
+import openai
+from django.conf import settings
+
+from resume_app.services.metrics_service import registry
+from resume_app.services.ratelimit_service import (
+    RETRYABLE_ERRORS,
+    CircuitOpenError,
+    RateLimitExceeded,
+    estimate_request_tokens,
+    get_circuit_breaker,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors after which the same request may well succeed on another model.
+FAILOVER_ERRORS = RETRYABLE_ERRORS + (CircuitOpenError, RateLimitExceeded)
+
+model_failovers = registry.counter(
+    "openai_model_failovers_total", "Calls moved to a fallback model.", ("route", "from_model", "to_model"),
+)
+
+
+@dataclass
+class Route:
+    """
+    One row of OPENAI_MODEL_ROUTES: the models, in order of preference, for some call types.
+    """
+    name: str
+    calls: Tuple[str, ...]
+    models: List[str]
+    max_input_tokens: Optional[int] = None
+    latency_slo: float = 30.0
+
+    def matches(self, call: str, input_tokens: int) -> bool:
+        return call in self.calls and (self.max_input_tokens is None or input_tokens <= self.max_input_tokens)
+
+
+class ModelHealth:
+    """
+    Rolling latency and error samples for one model on one route, limited to
+    the last `window` seconds and `max_samples` calls.
+    """
+
+    def __init__(self, window: float, max_samples: int = 500):
+        self.window = window
+        self._samples: "deque[Tuple[float, float, bool]]" = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        :return: The sample count, p50 and p95 latency of successful calls, and error rate.
+        """
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            samples = list(self._samples)
+        latencies = [latency for _, latency, ok in samples if ok]
+        p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (0.0, 0.0)
+        errors = sum(1 for _, _, ok in samples if not ok)
+        return {
+            "count": len(samples),
+            "p50": float(p50),
+            "p95": float(p95),
+            "error_rate": errors / len(samples) if samples else 0.0,
+        }
+
+
+class ModelRouter:
+    """
+    Picks the model for each OpenAI call from the route table, preferring models
+    that are healthy on that route and whose context window fits the request.
+    """
+
+    def __init__(self, routes: List[Route], window: float, min_samples: int, max_error_rate: float):
+        self.routes = routes
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._health: Dict[Tuple[str, str], ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def _route_for(self, call: str, input_tokens: int) -> Route:
+        for route in self.routes:
+            if route.matches(call, input_tokens):
+                return route
+        return Route(name=call, calls=(call,), models=[settings.OPENAI_MODEL])
+
+    def health(self, route: Route, model: str) -> ModelHealth:
+        with self._lock:
+            health = self._health.get((route.name, model))
+            if health is None:
+                health = self._health[(route.name, model)] = ModelHealth(self.window)
+            return health
+
+    def is_healthy(self, route: Route, model: str) -> bool:
+        if get_circuit_breaker(model).state == "open":
+            return False
+        snapshot = self.health(route, model).snapshot()
+        if snapshot["count"] < self.min_samples:
+            return True
+        return snapshot["error_rate"] <= self.max_error_rate and snapshot["p95"] <= route.latency_slo
+
+    def plan(self, call: str, kwargs: dict) -> Tuple[Route, List[str]]:
+        """
+        :return: The route for the call and its models in the order to try them:
+                 healthy models first, each group in the route's order of preference.
+        """
+        input_tokens = estimate_request_tokens(dict(kwargs, max_tokens=0))
+        route = self._route_for(call, input_tokens)
+        needed_tokens = input_tokens + kwargs.get("max_tokens", 0)
+        models = [
+            model for model in route.models
+            if settings.OPENAI_CONTEXT_WINDOWS.get(model, settings.OPENAI_DEFAULT_CONTEXT_WINDOW) >= needed_tokens
+        ] or route.models
+        healthy = [model for model in models if self.is_healthy(route, model)]
+        return route, healthy + [model for model in models if model not in healthy]
+
+    def stats(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """
+        :return: A snapshot for each (route, model) that has samples in the window.
+        """
+        with self._lock:
+            health = dict(self._health)
+        snapshots = {key: model_health.snapshot() for key, model_health in health.items()}
+        return {key: snapshot for key, snapshot in snapshots.items() if snapshot["count"]}
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Return the process wide model router, built from OPENAI_MODEL_ROUTES.
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter(
+                [Route(**{**route, "calls": tuple(route["calls"])}) for route in settings.OPENAI_MODEL_ROUTES],
+                settings.OPENAI_ROUTING_WINDOW,
+                settings.OPENAI_ROUTING_MIN_SAMPLES,
+                settings.OPENAI_ROUTING_MAX_ERROR_RATE,
+            )
+        return _router
+
+
+def preferred_model(call: str, kwargs: dict) -> str:
+    """
+    :return: The model call_routed would try first for this request right now.
+    """
+    _, models = get_model_router().plan(call, kwargs)
+    return models[0]
+
+
+def _record_failure(router: ModelRouter, route: Route, model: str, elapsed: float, error: Exception) -> None:
+    # Calls refused before they were sent say nothing about the model's latency.
+    if not isinstance(error, (CircuitOpenError, RateLimitExceeded)):
+        router.health(route, model).record(elapsed, ok=False)
+
+
+def call_routed(call: str, kwargs: dict, send: Callable[[dict, Callable[[float], None]], T]) -> Tuple[str, T]:
+    """
+    Send a completion request to the best model for it, failing over to the
+    route's other models when one errors or its circuit is open.
+    :param call: The kind of call, matched against each route's calls.
+    :param kwargs: The request parameters, without a model.
+    :param send: Sends the request with the given parameters, including the chosen
+                 model, and calls its second argument with the latency of the
+                 attempt that succeeded. Rate limit waits and retries are left
+                 out so they don't count against the model's latency SLO.
+    :return: The model that answered and its response.
+    """
+    router = get_model_router()
+    route, models = router.plan(call, kwargs)
+    for position, model in enumerate(models):
+        started = time.monotonic()
+        latencies: List[float] = []
+        try:
+            response = send(dict(kwargs, model=model), latencies.append)
+        except openai.OpenAIError as e:
+            _record_failure(router, route, model, time.monotonic() - started, e)
+            if position == len(models) - 1 or not isinstance(e, FAILOVER_ERRORS):
+                raise
+            model_failovers.inc(route=route.name, from_model=model, to_model=models[position + 1])
+            logger.warning("openai failover route=%s from=%s to=%s error=%s", route.name, model, models[position + 1], e)
+            continue
+        router.health(route, model).record(latencies[-1] if latencies else time.monotonic() - started, ok=True)
+        return model, response
+
+
+async def acall_routed(
+        call: str, kwargs: dict, send: Callable[[dict, Callable[[float], None]], Awaitable[T]]
+) -> Tuple[str, T]:
+    """
+    Async variant of call_routed.
+    """
+    router = get_model_router()
+    route, models = router.plan(call, kwargs)
+    for position, model in enumerate(models):
+        started = time.monotonic()
+        latencies: List[float] = []
+        try:
+            response = await send(dict(kwargs, model=model), latencies.append)
+        except openai.OpenAIError as e:
+            _record_failure(router, route, model, time.monotonic() - started, e)
+            if position == len(models) - 1 or not isinstance(e, FAILOVER_ERRORS):
+                raise
+            model_failovers.inc(route=route.name, from_model=model, to_model=models[position + 1])
+            logger.warning("openai failover route=%s from=%s to=%s error=%s", route.name, model, models[position + 1], e)
+            continue
+        router.health(route, model).record(latencies[-1] if latencies else time.monotonic() - started, ok=True)
+        return model, response
+
+
+def _latency_samples() -> Dict[tuple, float]:
+    if _router is None:
+        return {}
+    samples = {}
+    for (route, model), snapshot in _router.stats().items():
+        samples[(route, model, "0.5")] = snapshot["p50"]
+        samples[(route, model, "0.95")] = snapshot["p95"]
+    return samples
+
+
+registry.callback(
+    "openai_model_latency_seconds", "Rolling OpenAI latency of successful calls by route and model, the worst of any worker.",
+    ("route", "model", "quantile"), _latency_samples, aggregate="livemax",
+)
+registry.callback(
+    "openai_model_error_rate", "Rolling share of failed OpenAI calls by route and model, the worst of any worker.",
+    ("route", "model"),
+    lambda: {key: snapshot["error_rate"] for key, snapshot in _router.stats().items()} if _router else {},
+    aggregate="livemax",
+)
@@ -0,0 +1,94 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from resume_app.services.prompt_service import BULLET_PREFIX_REGEX
+
+EXPERIENCE_HEADING_REGEX = re.compile(
+    r"^(?:(?:work|professional|relevant|employment)\s+)?(?:experience|employment(?:\s+history)?|work\s+history|"
+    r"career\s+history)$",
+    re.IGNORECASE,
+)
+# Headings that end the experience section.
+SECTION_HEADING_REGEX = re.compile(
+    r"^(?:education(?:al background)?|(?:technical\s+|core\s+)?skills|core\s+competencies|certifications?|"
+    r"licenses?(?:\s+(?:and|&)\s+certifications?)?|projects|publications|awards|honou?rs|volunteer(?:ing)?"
+    r"(?:\s+experience)?|languages|interests|references|summary|profile|objective)$",
+    re.IGNORECASE,
+)
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+"
+DATE_RANGE_REGEX = re.compile(
+    rf"(?:{_MONTH}|\d{{1,2}}/)?(?:19|20)\d{{2}}\s*(?:-|–|—|to)\s*"
+    rf"(?:(?:{_MONTH}|\d{{1,2}}/)?(?:19|20)\d{{2}}|present|current|now|today)",
+    re.IGNORECASE,
+)
+# A job's title and company lines sit at most this many lines above its dates.
+MAX_JOB_HEADER_LINES = 2
+MAX_JOB_HEADER_LENGTH = 100
+
+
+@dataclass
+class ResumeSplit:
+    """
+    A resume cut into its job entries, in order, and everything else (header,
+    summary, skills, education), which each job is rewritten against.
+    """
+    jobs: List[str]
+    context: str
+
+
+def _heading(line: str) -> str:
+    return line.strip().strip("*#_").strip().rstrip(":").strip()
+
+
+def _job_start(lines: List[str], date_line: int, floor: int) -> int:
+    """
+    The first line of the job whose date range is on date_line: the date line
+    itself, or the title and company lines just above it.
+    """
+    start = date_line
+    while start - 1 > floor and date_line - (start - 1) <= MAX_JOB_HEADER_LINES:
+        line = lines[start - 1]
+        if not line.strip() or BULLET_PREFIX_REGEX.match(line) or len(line.strip()) > MAX_JOB_HEADER_LENGTH:
+            break
+        start -= 1
+    return start
+
+
+def split_resume_jobs(text: str) -> Optional[ResumeSplit]:
+    """
+    Find the job entries in a resume's experience section. Each job is recognised
+    by its date range, starting at the title and company lines just above it.
+    :param text: The extracted resume text.
+    :return: The split, or None if the resume has no recognisable experience
+             section with at least two jobs.
+    """
+    lines = text.splitlines()
+    experience = next((index for index, line in enumerate(lines) if EXPERIENCE_HEADING_REGEX.match(_heading(line))), None)
+    if experience is None:
+        return None
+    end = next(
+        (index for index in range(experience + 1, len(lines)) if SECTION_HEADING_REGEX.match(_heading(lines[index]))),
+        len(lines),
+    )
+
+    starts = []
+    for index in range(experience + 1, end):
+        if BULLET_PREFIX_REGEX.match(lines[index]) or not DATE_RANGE_REGEX.search(lines[index]):
+            continue
+        floor = starts[-1] if starts else experience
+        start = _job_start(lines, index, floor)
+        # Several date lines in one header (e.g. promotions) stay one job.
+        if starts and start - starts[-1] <= MAX_JOB_HEADER_LINES and not any(
+                BULLET_PREFIX_REGEX.match(line) for line in lines[starts[-1]:start]):
+            continue
+        starts.append(start)
+    if len(starts) < 2:
+        return None
+
+    jobs = [
+        "\n".join(lines[start:stop]).strip()
+        for start, stop in zip(starts, starts[1:] + [end])
+    ]
+    context = "\n".join(lines[:starts[0]] + lines[end:]).strip()
+    return ResumeSplit(jobs=jobs, context=context)
@@ -0,0 +1,55 @@
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from resume_app.models import ResumeSession
+
+
+def load_session(session_id: Optional[str]) -> Optional[ResumeSession]:
+    """
+    Look up a resume session that hasn't expired.
+    :param session_id: The id returned by the validation endpoints.
+    :return: The session, or None if the id is malformed, unknown or expired.
+    """
+    if not session_id:
+        return None
+    try:
+        session_uuid = uuid.UUID(str(session_id))
+    except ValueError:
+        return None
+    cutoff = timezone.now() - timedelta(seconds=settings.RESUME_SESSION_TTL)
+    return ResumeSession.objects.filter(pk=session_uuid, updated_at__gte=cutoff).first()
+
+
+def save_session_inputs(session_id: Optional[str], resume_text: Optional[str] = None,
+                        job_posting_text: Optional[str] = None,
+                        considerations: Optional[str] = None) -> ResumeSession:
+    """
+    Store validated inputs in a resume session. Inputs left as None keep their
+    previous value, so each field can be validated again on its own.
+    :param session_id: The session to update. A new session is started if it is
+                       None, unknown or expired.
+    :return: The saved session.
+    """
+    session = load_session(session_id) or ResumeSession()
+    if resume_text is not None:
+        session.resume_text = resume_text
+    if job_posting_text is not None:
+        session.job_posting_text = job_posting_text
+    if considerations is not None:
+        session.considerations = considerations
+    session.save()
+    return session
+
+
+def delete_expired_sessions() -> int:
+    """
+    Delete sessions last saved more than RESUME_SESSION_TTL seconds ago.
+    :return: The number of sessions deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.RESUME_SESSION_TTL)
+    deleted, _ = ResumeSession.objects.filter(updated_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,302 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from resume_app.services.metrics_service import registry
+
+logger = logging.getLogger(__name__)
+
+LOCK_POLL_INTERVAL = 0.1
+
+single_flight_requests = registry.counter(
+    "generation_single_flight_total",
+    "Generation requests by single-flight role (leader, follower in the same worker, shared from another worker).",
+    ("role",),
+)
+
+
+@dataclass
+class Flight:
+    """
+    One caller's view of a flight. If shared is set, result already holds the
+    value produced by an identical call; otherwise the caller is the leader and
+    must publish() its value for the callers waiting on it.
+    """
+    result: Optional[str] = None
+    shared: bool = False
+
+    def publish(self, value: str) -> None:
+        self.result = value
+
+
+class _LocalFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that compute the same value. Inside a worker,
+    followers wait on the leader's event. Across workers on the dyno, the leader
+    holds an exclusive lock on the key's lock file while it computes and stores
+    the result in the shared cache, where the other workers find it once they get
+    the lock. The leader removes the lock file as it releases it, so only keys in
+    flight have one.
+    """
+
+    key_prefix = "single_flight:"
+
+    def __init__(self, lock_dir: str, result_ttl: int, wait_timeout: float):
+        self.lock_dir = lock_dir
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        os.makedirs(lock_dir, exist_ok=True)
+        self._flights: Dict[str, _LocalFlight] = {}
+        self._async_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_leaders: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        Hash the inputs that fully determine a computation into a flight key.
+        """
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def _lock_path(self, key: str) -> str:
+        return os.path.join(self.lock_dir, f"{key}.lock")
+
+    def _try_file_lock(self, key: str) -> Optional[int]:
+        """
+        Take the cross-worker lock for key if nobody holds it.
+        :return: The locked file descriptor, or None if it is held.
+        """
+        path = self._lock_path(key)
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            locked = os.fstat(fd)
+            if current is not None and (current.st_dev, current.st_ino) == (locked.st_dev, locked.st_ino):
+                return fd
+            # The previous holder removed the file as it released it; lock the one now at path.
+            os.close(fd)
+
+    def _acquire_file_lock(self, key: str) -> Optional[int]:
+        """
+        Take the cross-worker lock for key, waiting up to wait_timeout.
+        :return: The locked file descriptor, or None if the wait timed out.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            fd = self._try_file_lock(key)
+            if fd is not None:
+                return fd
+            if time.monotonic() >= deadline:
+                logger.warning("single_flight lock wait timed out key=%s", key)
+                return None
+            time.sleep(LOCK_POLL_INTERVAL)
+
+    async def _aacquire_file_lock(self, key: str) -> Optional[int]:
+        """
+        Async variant of _acquire_file_lock(), which waits on the event loop
+        rather than in a thread.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            fd = self._try_file_lock(key)
+            if fd is not None:
+                return fd
+            if time.monotonic() >= deadline:
+                logger.warning("single_flight lock wait timed out key=%s", key)
+                return None
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+    def _release_file_lock(self, key: str, fd: Optional[int]) -> None:
+        if fd is None:
+            return
+        # Removed while still locked; a waiter holding the old file notices and retries.
+        try:
+            os.unlink(self._lock_path(key))
+        except FileNotFoundError:
+            pass
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    @contextmanager
+    def _shared_flight(self, key: str) -> Iterator[Flight]:
+        fd = self._acquire_file_lock(key)
+        try:
+            result = cache.get(self.key_prefix + key)
+            if result is not None:
+                single_flight_requests.inc(role="shared")
+                yield Flight(result=result, shared=True)
+                return
+
+            single_flight_requests.inc(role="leader")
+            flight = Flight()
+            yield flight
+            if flight.result is not None:
+                # Stored before the lock is released, so the next holder finds it.
+                cache.set(self.key_prefix + key, flight.result, timeout=self.result_ttl)
+        finally:
+            self._release_file_lock(key, fd)
+
+    @contextmanager
+    def flight(self, key: str) -> Iterator[Flight]:
+        """
+        Join the flight for key. The block runs as the leader or with a shared result.
+        If the leader fails, its followers each retry as their own leader.
+        :param key: A key from make_key().
+        """
+        with self._lock:
+            local = self._flights.get(key)
+            leader = local is None
+            if leader:
+                local = self._flights[key] = _LocalFlight()
+
+        if not leader:
+            if local.done.wait(self.wait_timeout) and local.result is not None:
+                single_flight_requests.inc(role="follower")
+                yield Flight(result=local.result, shared=True)
+                return
+            with self._shared_flight(key) as flight:
+                yield flight
+            return
+
+        try:
+            with self._shared_flight(key) as flight:
+                yield flight
+                local.result = flight.result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            local.done.set()
+
+    def run(self, key: str, create: Callable[[], str]) -> str:
+        """
+        Return the value for key, calling create() only if no identical call is in flight.
+        """
+        with self.flight(key) as flight:
+            if not flight.shared:
+                flight.publish(create())
+            return flight.result
+
+    @asynccontextmanager
+    async def _ashared_flight(self, key: str) -> AsyncIterator[Flight]:
+        fd = await self._aacquire_file_lock(key)
+        try:
+            result = await sync_to_async(cache.get, thread_sensitive=False)(self.key_prefix + key)
+            if result is not None:
+                single_flight_requests.inc(role="shared")
+                yield Flight(result=result, shared=True)
+                return
+
+            single_flight_requests.inc(role="leader")
+            flight = Flight()
+            yield flight
+            if flight.result is not None:
+                await sync_to_async(cache.set, thread_sensitive=False)(
+                    self.key_prefix + key, flight.result, timeout=self.result_ttl,
+                )
+        finally:
+            self._release_file_lock(key, fd)
+
+    @asynccontextmanager
+    async def aflight(self, key: str) -> AsyncIterator[Flight]:
+        """
+        Async variant of flight(), for callers that stream the value while they
+        produce it and so can't hand arun() a coroutine.
+        :param key: A key from make_key().
+        """
+        loop = asyncio.get_running_loop()
+        leaders = self._async_leaders.setdefault(loop, {})
+        leader = leaders.get(key)
+        if leader is not None:
+            try:
+                # The leader's future resolves to None if it fails.
+                result = await asyncio.wait_for(asyncio.shield(leader), self.wait_timeout)
+            except asyncio.TimeoutError:
+                result = None
+            if result is not None:
+                single_flight_requests.inc(role="follower")
+                yield Flight(result=result, shared=True)
+                return
+            async with self._ashared_flight(key) as flight:
+                yield flight
+            return
+
+        leader = leaders[key] = loop.create_future()
+        result = None
+        try:
+            async with self._ashared_flight(key) as flight:
+                yield flight
+                result = flight.result
+        finally:
+            leaders.pop(key, None)
+            leader.set_result(result)
+
+    async def _arun_shared(self, key: str, create: Callable[[], Awaitable[str]]) -> str:
+        async with self._ashared_flight(key) as flight:
+            if not flight.shared:
+                flight.publish(await create())
+            return flight.result
+
+    async def arun(self, key: str, create: Callable[[], Awaitable[str]]) -> str:
+        """
+        Async variant of run(). Waiters are shielded from each other, so one
+        client disconnecting doesn't cancel the generation the others wait on.
+        """
+        flights = self._async_flights.setdefault(asyncio.get_running_loop(), {})
+        task = flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._arun_shared(key, create))
+            flights[key] = task
+            task.add_done_callback(lambda _: flights.pop(key, None))
+        else:
+            single_flight_requests.inc(role="follower")
+        return await asyncio.shield(task)
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    Return the process wide single-flight coordinator for resume generation.
+    """
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight(
+                settings.GENERATION_SINGLE_FLIGHT_DIR,
+                settings.GENERATION_SINGLE_FLIGHT_TTL,
+                settings.GENERATION_SINGLE_FLIGHT_TIMEOUT,
+            )
+        return _single_flight
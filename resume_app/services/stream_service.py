@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import queue
+import threading
+from typing import AsyncIterator, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def iterate_with_heartbeats(iterator: Iterator[T], interval: float) -> Iterator[Optional[T]]:
+    """
+    Iterate in a background thread and pass the items on, yielding None whenever
+    nothing has arrived for interval seconds, so the caller can keep a streamed
+    response alive while the iterator blocks.
+    :param iterator: The blocking iterator. It is closed if the caller stops early.
+    :param interval: Seconds between heartbeats.
+    :return: The items of iterator, interleaved with None heartbeats.
+    """
+    # (True, item) for each item, then (False, the error or None) once it ends.
+    items: "queue.Queue" = queue.Queue()
+    stopped = threading.Event()
+
+    def produce() -> None:
+        error = None
+        try:
+            for item in iterator:
+                if stopped.is_set():
+                    break
+                items.put((True, item))
+        except BaseException as e:
+            error = e
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            items.put((False, error))
+
+    # Copy the context so the request id follows the iterator into the thread.
+    threading.Thread(target=contextvars.copy_context().run, args=(produce,), name="stream-heartbeat",
+                     daemon=True).start()
+    try:
+        while True:
+            try:
+                has_item, value = items.get(timeout=interval)
+            except queue.Empty:
+                yield None
+                continue
+            if not has_item:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stopped.set()
+
+
+async def aiterate_with_heartbeats(iterator: AsyncIterator[T], interval: float) -> AsyncIterator[Optional[T]]:
+    """
+    Async version of iterate_with_heartbeats.
+    """
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            next_item, pending = pending, None
+            try:
+                item = next_item.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        if pending is not None:
+            # Cancelling the step unwinds the iterator from where it waits.
+            pending.cancel()
+        elif hasattr(iterator, "aclose"):
+            await iterator.aclose()
@@ -0,0 +1,29 @@
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Libraries the services import on first use rather than at module import, so
+# that management commands and the development server don't pay for them.
+LAZY_IMPORTS = ("fitz", "docx")
+
+
+def warm_up() -> None:
+    """
+    Load everything a worker would otherwise load on its first request: the
+    URLconf with the views and services behind it, the lazily imported document
+    libraries and the .docx template. Called from gunicorn's when_ready hook with
+    preload_app, so the forked workers share these pages copy-on-write instead of
+    each importing them again.
+    """
+    from django.urls import get_resolver
+
+    from resume_app.services.rendering_service import get_docx_template
+
+    start = time.perf_counter()
+    get_resolver().url_patterns
+    for name in LAZY_IMPORTS:
+        importlib.import_module(name)
+    get_docx_template()
+    logger.info("Warmed up in %.0fms", (time.perf_counter() - start) * 1000)
@@ -49,155 +49,219 @@ document.addEventListener("DOMContentLoaded", () => {
         fileInput.type = "file";
         fileInput.accept = ".txt,.docx,.pdf";
 
-        fileInput.addEventListener("change", async () => {
+        fileInput.addEventListener("change", () => {
             const file = fileInput.files[0];
             if (!file) {
                 appendMessage("No file selected. Please upload a file.");
                 return;
             }
 
-            const formData = new FormData();
-            formData.append("resume_file", file);
-
-            try {
-                const response = await fetch("/api/validate-resume/", {
-                    method: "POST",
-                    body: formData,
-                    headers: {
-                        "X-CSRFToken": getCSRFToken(),
-                    },
-                });
-
-                const data = await response.json();
-                if (data.valid) {
-                    appendMessage("The uploaded file is a valid resume!");
-                    inputs.resumeText = data.extracted_text;
-                    showNextStep();
-                } else {
-                    appendMessage("The uploaded file is NOT a valid resume.");
-                }
-            } catch (error) {
-                console.error("Error:", error);
-                appendMessage("An error occurred while validating the resume.");
-            }
+            // All inputs are validated together in handleSubmit.
+            inputs.resumeFile = file;
+            appendMessage(`Selected ${file.name}.`);
+            fileInput.disabled = true;
+            showNextStep();
         });
 
         outputDiv.appendChild(fileInput);
     }
 
-    inputField.addEventListener("keypress", async (e) => {
+    inputField.addEventListener("keypress", (e) => {
         if (e.key === "Enter" && currentStep > 0) {
             const step = steps[currentStep - 1];
             const input = inputField.value.trim();
 
             if (step.action === "url") {
-                try {
-                    const response = await fetch("/api/validate-job-posting/", {
-                        method: "POST",
-                        headers: {
-                            "Content-Type": "application/json",
-                            "X-CSRFToken": getCSRFToken(),
-                        },
-                        body: JSON.stringify({url: input}),
-                    });
-
-                    const data = await response.json();
-                    if (data.valid) {
-                        appendMessage("The URL is a valid job posting!");
-                        inputs.jobPostingText = data.job_posting_text;
-                        inputField.value = "";
-                        showNextStep();
-                    } else {
-                        appendMessage("The URL is NOT a valid job posting. Please try again.");
-                    }
-                } catch (error) {
-                    console.error("Error validating job posting:", error);
-                    appendMessage("An error occurred while validating the job posting.");
+                if (input === "") {
+                    appendMessage("Please enter the job posting URL.");
+                    return;
                 }
+                inputs.jobPostingUrl = input;
+                appendMessage(input);
+                inputField.value = "";
+                showNextStep();
             } else if (step.action === "text") {
-                if (input.trim() === "") {
-                    // Skip validation for empty special considerations
+                if (input === "") {
                     appendMessage("No special considerations provided. Skipping this step.");
-                    inputs.text = ""; // Assign empty string
-                    inputField.value = "";
-                    currentStep++;
-                    showNextStep();
                 } else {
-                    try {
-                        const response = await fetch("/api/validate-special-considerations/", {
-                            method: "POST",
-                            headers: {
-                                "Content-Type": "application/json",
-                                "X-CSRFToken": getCSRFToken(),
-                            },
-                            body: JSON.stringify({text: input}),
-                        });
-
-                        const data = await response.json();
-                        if (data.valid) {
-                            appendMessage("Special considerations accepted!");
-                            inputs.text = data.validated_data;
-                            inputField.value = "";
-                            showNextStep();
-                        } else {
-                            appendMessage("Special considerations are not relevant. Please try again.");
-                        }
-                    } catch (error) {
-                        console.error("Error validating special considerations:", error);
-                        appendMessage("An error occurred while validating special considerations.");
-                    }
+                    appendMessage(input);
                 }
+                inputs.considerations = input;
+                inputField.value = "";
+                showNextStep();
             }
         }
     });
 
     async function handleSubmit() {
-        if (!inputs.resumeText) {
-            appendMessage("Resume validation is missing.");
-        } else if (!inputs.jobPostingText) {
-            appendMessage("Job posting validation is missing.");
-        } else if (inputs.text === undefined) {
-            appendMessage("Special considerations validation is missing.");
-        } else {
-            appendMessage("All inputs validated successfully.");
-            showNextStep();
+        inputField.style.display = "none";
+
+        const formData = new FormData();
+        formData.append("resume_file", inputs.resumeFile);
+        formData.append("url", inputs.jobPostingUrl);
+        if (inputs.considerations) {
+            formData.append("text", inputs.considerations);
+        }
+        if (inputs.sessionId) {
+            formData.append("session_id", inputs.sessionId);
+        }
+
+        let data;
+        try {
+            const response = await fetch("/api/validate/", {
+                method: "POST",
+                body: formData,
+                headers: {
+                    "X-CSRFToken": getCSRFToken(),
+                },
+            });
+            data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error);
+            }
+            // The validated inputs stay on the server; later calls refer to them by id.
+            inputs.sessionId = data.session_id;
+        } catch (error) {
+            console.error("Error validating inputs:", error);
+            appendMessage("An error occurred while validating your inputs.");
+            return restartFromStep("file");
+        }
+
+        if (!data.resume.valid) {
+            appendMessage("The uploaded file is NOT a valid resume.");
+            return restartFromStep("file");
+        }
+        appendMessage("The uploaded file is a valid resume!");
+
+        if (!data.job_posting.valid) {
+            appendMessage("The URL is NOT a valid job posting. Please try again.");
+            return restartFromStep("url");
+        }
+        appendMessage("The URL is a valid job posting!");
+
+        if (data.special_considerations) {
+            if (!data.special_considerations.valid) {
+                appendMessage("Special considerations are not relevant. Please try again.");
+                return restartFromStep("text");
+            }
+            appendMessage("Special considerations accepted!");
         }
+
+        appendMessage("All inputs validated successfully.");
+        showNextStep();
+    }
+
+    function restartFromStep(action) {
+        currentStep = steps.findIndex((step) => step.action === action);
+        showNextStep();
     }
 
     async function generateResume() {
         try {
-            const response = await fetch("/api/generate-resume/", {
+            const response = await fetch("/api/generate-resume/stream/", {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
                     "X-CSRFToken": getCSRFToken(),
                 },
-                body: JSON.stringify({
-                    resume_text: inputs.resumeText,
-                    job_posting_text: inputs.jobPostingText,
-                    considerations: inputs.text,
-                }),
+                body: JSON.stringify({session_id: inputs.sessionId}),
             });
 
-            if (!response.ok) {
+            if (!response.ok || !response.body) {
                 throw new Error("Failed to generate rewritten resume.");
             }
 
-            const blob = await response.blob();
-            const url = window.URL.createObjectURL(blob);
+            const previewDiv = document.createElement("div");
+            previewDiv.className = "preview";
+            outputDiv.appendChild(previewDiv);
+
+            let downloadUrl = null;
+            let formatUrls = {};
+            await readServerSentEvents(response, (event, data) => {
+                if (event === "chunk") {
+                    previewDiv.textContent += data;
+                    scrollToBottom();
+                } else if (event === "done") {
+                    downloadUrl = data.download_url;
+                    formatUrls = data.format_urls || {};
+                } else if (event === "error") {
+                    throw new Error(data.error);
+                }
+            });
+
+            if (!downloadUrl) {
+                throw new Error("The resume stream ended before it finished.");
+            }
+
             const a = document.createElement("a");
-            a.href = url;
+            a.href = downloadUrl;
             a.download = "Rewritten_Resume.docx";
             a.click();
-            window.URL.revokeObjectURL(url);
 
             appendMessage("Your rewritten resume has been downloaded!");
+            appendFormatLinks(formatUrls);
         } catch (error) {
             console.error("Error generating resume:", error);
             appendMessage("An error occurred while generating your resume.");
         }
     }
 
+    function appendFormatLinks(formatUrls) {
+        const labels = {pdf: "PDF", md: "Markdown", html: "View in browser"};
+        const linksDiv = document.createElement("div");
+        linksDiv.appendChild(document.createTextNode("Other formats: "));
+        Object.entries(labels).forEach(([format, label]) => {
+            if (!formatUrls[format]) {
+                return;
+            }
+            const a = document.createElement("a");
+            a.href = formatUrls[format];
+            a.textContent = label;
+            if (format === "html") {
+                a.target = "_blank";
+            } else {
+                a.download = `Rewritten_Resume.${format}`;
+            }
+            linksDiv.appendChild(a);
+            linksDiv.appendChild(document.createTextNode(" "));
+        });
+        outputDiv.appendChild(linksDiv);
+        scrollToBottom();
+    }
+
+    async function readServerSentEvents(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+            const {done, value} = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, {stream: true});
+
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = "message";
+                let data = "";
+                for (const line of rawEvent.split("\n")) {
+                    if (line.startsWith("event: ")) {
+                        event = line.slice(7);
+                    } else if (line.startsWith("data: ")) {
+                        data += line.slice(6);
+                    }
+                }
+                // Comment-only events are heartbeats.
+                if (data) {
+                    onEvent(event, JSON.parse(data));
+                }
+            }
+        }
+    }
 
     function appendMessage(message) {
         const messageDiv = document.createElement("div");
@@ -206,8 +270,9 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     function getCSRFToken() {
-        const csrfInput = document.querySelector("input[name=csrfmiddlewaretoken]");
-        return csrfInput ? csrfInput.value : "";
+        // Set by the index view; the page itself is cached and carries no token.
+        const csrfCookie = document.cookie.split("; ").find((cookie) => cookie.startsWith("csrftoken="));
+        return csrfCookie ? decodeURIComponent(csrfCookie.split("=")[1]) : "";
     }
 
     function scrollToBottom() {
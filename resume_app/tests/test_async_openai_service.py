@@ -0,0 +1,59 @@
+import asyncio
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services import async_openai_service
+from resume_app.services.section_service import ResumeSplit
+from resume_app.services.singleflight_service import SingleFlight
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, GENERATION_SECTION_CONCURRENCY=2)
+class StreamRewrittenResumeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.single_flight = SingleFlight(directory.name, result_ttl=60, wait_timeout=5)
+        self.rewritten = []
+        split = ResumeSplit(jobs=["Job A", "Job B", "Job C"], context="Randy Hash")
+        for target, value in [
+            ("get_single_flight", mock.Mock(return_value=self.single_flight)),
+            ("split_for_generation", mock.Mock(return_value=split)),
+            ("_arewrite_section", self.rewrite_section),
+            ("_astream_section", self.stream_section),
+        ]:
+            patcher = mock.patch.object(async_openai_service, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def rewrite_section(self, job, context, job_posting_text, considerations):
+        # Later jobs finish first, the stream still yields them in resume order.
+        await asyncio.sleep({"Job B": 0.02, "Job C": 0.01}[job])
+        self.rewritten.append(job)
+        return f"Rewritten {job}"
+
+    async def stream_section(self, job, context, job_posting_text, considerations):
+        yield "Rewritten "
+        await asyncio.sleep(0.04)
+        self.rewritten.append(job)
+        yield job
+
+    async def collect(self):
+        stream = async_openai_service.astream_rewritten_resume("Randy Hash", "posting", "")
+        return [chunk async for chunk in stream]
+
+    async def test_sections_are_streamed_in_order(self):
+        self.assertEqual(
+            await self.collect(), ["Rewritten ", "Job A", "\n\nRewritten Job B", "\n\nRewritten Job C"],
+        )
+
+    async def test_concurrent_identical_streams_share_one_generation(self):
+        leader, follower = await asyncio.gather(self.collect(), self.collect())
+        self.assertEqual(len(leader), 4)
+        self.assertEqual(follower, ["Rewritten Job A\n\nRewritten Job B\n\nRewritten Job C"])
+        self.assertEqual(sorted(self.rewritten), ["Job A", "Job B", "Job C"])
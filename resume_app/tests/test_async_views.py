@@ -0,0 +1,103 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+
+from resume_app import async_views
+from resume_app.services.result_service import load_generated_resume
+from resume_app.services.session_service import load_session
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GenerateResumeApiTests(SimpleTestCase):
+    def post(self, path: str):
+        request = AsyncRequestFactory().post(
+            path, json.dumps({"resume_text": "resume", "job_posting_text": "posting"}),
+            content_type="application/json",
+        )
+        with mock.patch.object(async_views, "agenerate_rewritten_text", return_value="# Jane Doe\n\nRewritten"):
+            return async_to_sync(async_views.generate_resume_api)(request)
+
+    def test_renders_the_requested_format_and_stores_the_result(self):
+        response = self.post("/api/generate-resume/?format=md")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/markdown; charset=utf-8")
+        handle = response["X-Generated-Resume-Url"].rstrip("/").rsplit("/", 1)[-1]
+        self.assertEqual(load_generated_resume(handle), "# Jane Doe\n\nRewritten")
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.post("/api/generate-resume/?format=rtf").status_code, 400)
+
+
+async def rewritten_chunks(*args):
+    for chunk in ("# Jane Doe", "\n\nRewritten"):
+        yield chunk
+
+
+def upload_request(path: str, data: dict):
+    request = AsyncRequestFactory().post(path, data)
+    # Upload views check CSRF themselves; the test client would skip it.
+    request._dont_enforce_csrf_checks = True
+    return request
+
+
+async def read_body(response) -> bytes:
+    return b"".join([chunk async for chunk in response])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GenerateResumeStreamApiTests(SimpleTestCase):
+    async def test_streams_chunks_then_the_stored_result(self):
+        request = AsyncRequestFactory().post(
+            "/api/generate-resume/stream/", json.dumps({"resume_text": "resume", "job_posting_text": "posting"}),
+            content_type="application/json",
+        )
+        with mock.patch.object(async_views, "astream_rewritten_resume", rewritten_chunks):
+            response = await async_views.generate_resume_stream_api(request)
+            self.assertTrue(response.is_async)
+            events = (await read_body(response.streaming_content)).decode().strip().split("\n\n")
+
+        self.assertEqual(events[:3], [
+            "event: start\ndata: {}", 'event: chunk\ndata: "# Jane Doe"', 'event: chunk\ndata: "\\n\\nRewritten"',
+        ])
+        self.assertTrue(events[3].startswith("event: done\n"))
+        done = json.loads(events[3].split("data: ", 1)[1])
+        self.assertEqual(await sync_to_async(load_generated_resume)(done["handle"]), "# Jane Doe\n\nRewritten")
+
+
+class ValidateInputsApiTests(TestCase):
+    async def test_valid_inputs_are_kept_in_the_session(self):
+        request = upload_request("/api/validate/", {"url": "https://example.com/job", "text": "Remote"})
+        results = {
+            "job_posting": {"is_valid": True, "validated_data": "Posting text"},
+            "special_considerations": {"is_valid": False, "validated_data": ""},
+        }
+        with mock.patch.object(async_views, "avalidate_inputs", return_value=results):
+            response = await async_views.validate_inputs_api(request)
+
+        body = json.loads(response.content)
+        self.assertEqual(body["job_posting"], {"valid": True})
+        self.assertEqual(body["special_considerations"], {"valid": False})
+        session = await sync_to_async(load_session)(body["session_id"])
+        self.assertEqual(session.job_posting_text, "Posting text")
+        self.assertIsNone(session.considerations)
+
+
+class BatchGenerateResumeApiTests(SimpleTestCase):
+    async def test_archive_is_streamed_as_it_is_written(self):
+        request = upload_request("/api/generate-resume/batch/", {
+            "resume_file": SimpleUploadedFile("resume.txt", b"Jane Doe", content_type="text/plain"),
+            "url": ["https://example.com/a", "https://example.com/b"],
+        })
+        results = {"resume": {"is_valid": True, "validated_data": "Jane Doe"}}
+        archive = (chunk for chunk in [b"PK\x03\x04", b"rest"])
+        with mock.patch.object(async_views, "avalidate_inputs", return_value=results), \
+                mock.patch.object(async_views, "stream_batch_archive", return_value=archive) as stream_batch_archive:
+            response = await async_views.batch_generate_resume_api(request)
+            self.assertTrue(response.is_async)
+            self.assertEqual(await read_body(response.streaming_content), b"PK\x03\x04rest")
+        stream_batch_archive.assert_called_once_with("Jane Doe", ["https://example.com/a", "https://example.com/b"], "")
@@ -0,0 +1,114 @@
+import contextvars
+import io
+import json
+import threading
+import time
+import zipfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services import batch_service, openai_service
+
+URLS = ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+
+
+def valid_posting(url):
+    return {"is_valid": url != "https://example.com/c", "validated_data": f"Engineer at {url[-1].upper()}"}
+
+
+@override_settings(BATCH_GENERATION_CONCURRENCY=2, BATCH_GENERATION_RATE_LIMIT=0, STREAM_HEARTBEAT_INTERVAL=0.05)
+class StreamBatchArchiveTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(batch_service, "validate_job_posting", side_effect=valid_posting)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_first_bytes_are_sent_before_any_posting_finishes(self):
+        release = threading.Event()
+
+        def generate(resume_text, job_posting_text, considerations):
+            release.wait(5)
+            return b"docx"
+
+        with mock.patch.object(batch_service, "generate_rewritten_resume", side_effect=generate):
+            stream = batch_service.stream_batch_archive("resume", URLS, "")
+            chunks = [next(stream)]
+            self.assertTrue(chunks[0].startswith(b"PK\x03\x04"))
+            # A heartbeat while every posting is still running.
+            chunks.append(next(stream))
+            release.set()
+            chunks.extend(stream)
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        self.assertIn("Still working on 3 of 3 job postings.", archive.read("progress/001.txt").decode())
+
+    def test_each_resume_is_sent_as_soon_as_it_is_done(self):
+        release = threading.Event()
+
+        def generate(resume_text, job_posting_text, considerations):
+            if job_posting_text.endswith("B"):
+                release.wait(5)
+            return job_posting_text.encode()
+
+        with mock.patch.object(batch_service, "generate_rewritten_resume", side_effect=generate):
+            stream = batch_service.stream_batch_archive("resume", URLS, "")
+            sent = b""
+            while b"Engineer at A" not in sent:
+                sent += next(stream)
+            # Posting B is still running, A's resume is already a complete member.
+            self.assertIn(b"01_Engineer_at_A.docx", sent)
+            self.assertNotIn(b"02_Engineer_at_B.docx", sent)
+            release.set()
+            sent += b"".join(stream)
+
+        self.assertEqual(zipfile.ZipFile(io.BytesIO(sent)).read("02_Engineer_at_B.docx"), b"Engineer at B")
+
+    def test_archive_lists_every_posting(self):
+        with mock.patch.object(batch_service, "generate_rewritten_resume", return_value=b"docx"):
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(batch_service.stream_batch_archive("resume", URLS, ""))))
+
+        names = archive.namelist()
+        self.assertEqual(names[0], "progress/000.txt")
+        self.assertEqual(names[-1], "status.json")
+        self.assertCountEqual(names[1:-1], ["01_Engineer_at_A.docx", "02_Engineer_at_B.docx", "03_error.txt"])
+        self.assertEqual(archive.read("01_Engineer_at_A.docx"), b"docx")
+        self.assertIn("Tailoring the resume to 3 job postings.", archive.read("progress/000.txt").decode())
+        statuses = [item["status"] for item in json.loads(archive.read("status.json"))["items"]]
+        self.assertEqual(statuses, ["succeeded", "succeeded", "failed"])
+
+    def test_completions_are_capped_across_the_batch(self):
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def call_routed(call, kwargs, send):
+            with lock:
+                in_flight.append(call)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.remove(call)
+            return "model", SimpleNamespace(usage=None)
+
+        def generate(resume_text, job_posting_text, considerations):
+            # Each posting rewrites three jobs at once, like GENERATION_SECTION_CONCURRENCY.
+            threads = [
+                threading.Thread(target=contextvars.copy_context().run,
+                                 args=(openai_service._create_routed_completion, "generate_section", {}))
+                for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return b"docx"
+
+        with mock.patch.object(openai_service, "call_routed", side_effect=call_routed), \
+                mock.patch.object(openai_service, "record_token_usage"), \
+                mock.patch.object(batch_service, "generate_rewritten_resume", side_effect=generate):
+            b"".join(batch_service.stream_batch_archive("resume", URLS[:2] * 2, ""))
+
+        self.assertEqual(len(peak), 12)
+        self.assertLessEqual(max(peak), 2)
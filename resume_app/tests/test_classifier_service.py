@@ -0,0 +1,91 @@
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services import classifier_service
+from resume_app.services.classifier_service import classify_resume_text, preclassifier_stats, resume_score
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "classifier"
+
+
+def labelled_texts():
+    """
+    The labelled fixture: (name, is_resume, text) for every file under
+    fixtures/classifier/resume and fixtures/classifier/not_resume.
+    """
+    for label in ("resume", "not_resume"):
+        for path in sorted((FIXTURES_DIR / label).glob("*.txt")):
+            yield path.name, label == "resume", path.read_text(encoding="utf-8")
+
+
+@override_settings(
+    RESUME_PRECLASSIFIER_ENABLED=True,
+    RESUME_PRECLASSIFIER_MIN_CHARS=200,
+    RESUME_PRECLASSIFIER_MAX_CHARS=60000,
+    RESUME_PRECLASSIFIER_ACCEPT_SCORE=0.9,
+    RESUME_PRECLASSIFIER_REJECT_SCORE=0.05,
+)
+class ClassifyResumeTextTests(SimpleTestCase):
+    def test_confident_verdicts_match_the_labels(self):
+        for name, is_resume, text in labelled_texts():
+            with self.subTest(name):
+                self.assertIn(classify_resume_text(text), (is_resume, None))
+
+    def test_scores_separate_the_labels(self):
+        resume_scores = [resume_score(text) for _, is_resume, text in labelled_texts() if is_resume]
+        other_scores = [resume_score(text) for _, is_resume, text in labelled_texts() if not is_resume]
+        self.assertGreater(min(resume_scores), max(other_scores))
+
+    def test_most_of_the_fixture_is_decided_locally(self):
+        verdicts = [classify_resume_text(text) for _, _, text in labelled_texts()]
+        self.assertGreaterEqual(sum(verdict is not None for verdict in verdicts) / len(verdicts), 0.5)
+
+    def test_short_text_is_rejected(self):
+        self.assertIs(classify_resume_text("Experience\n2019 - 2021"), False)
+
+    def test_long_text_is_left_to_the_model(self):
+        _, _, text = next(labelled_texts())
+        self.assertIsNone(classify_resume_text(text * (60000 // len(text) + 1)))
+
+    @override_settings(RESUME_PRECLASSIFIER_ENABLED=False)
+    def test_disabled(self):
+        _, _, text = next(labelled_texts())
+        self.assertIsNone(classify_resume_text(text))
+
+
+@override_settings(
+    RESUME_PRECLASSIFIER_ENABLED=True,
+    RESUME_PRECLASSIFIER_MIN_CHARS=200,
+    RESUME_PRECLASSIFIER_MAX_CHARS=60000,
+    RESUME_PRECLASSIFIER_ACCEPT_SCORE=0.9,
+    RESUME_PRECLASSIFIER_REJECT_SCORE=0.05,
+)
+class ClassifierThresholdTests(SimpleTestCase):
+    def classify(self, score: float, length: int = 1000):
+        with mock.patch.object(classifier_service, "resume_score", return_value=score):
+            return classify_resume_text("x" * length)
+
+    def test_scores_at_or_past_a_threshold_are_decided(self):
+        for score, verdict in [(1.0, True), (0.9, True), (0.05, False), (0.0, False)]:
+            with self.subTest(score):
+                self.assertIs(self.classify(score), verdict)
+
+    def test_scores_between_the_thresholds_go_to_the_model(self):
+        for score in (0.89, 0.5, 0.051):
+            with self.subTest(score):
+                self.assertIsNone(self.classify(score))
+
+    def test_length_limits_apply_before_the_score(self):
+        self.assertIs(self.classify(1.0, length=199), False)
+        self.assertIs(self.classify(1.0, length=200), True)
+        self.assertIsNone(self.classify(1.0, length=60001))
+
+    def test_verdicts_are_counted(self):
+        before = preclassifier_stats.stats()
+        for score in (0.95, 0.01, 0.5):
+            self.classify(score)
+        after = preclassifier_stats.stats()
+        for verdict in ("accepted", "rejected", "ambiguous"):
+            with self.subTest(verdict):
+                self.assertEqual(after[verdict], before[verdict] + 1)
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services import cache_service, openai_service
+
+
+def completion(content: str):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=10, completion_tokens=1, total_tokens=11),
+    )
+
+
+@override_settings(OPENAI_CACHE_BACKEND="memory", OPENAI_CACHE_TTL=60, OPENAI_CACHE_MAX_ENTRIES=100)
+class CachedCompletionTests(SimpleTestCase):
+    def setUp(self):
+        cache_service._completion_cache = None
+        self.addCleanup(setattr, cache_service, "_completion_cache", None)
+
+    def ask(self, answering_model: str) -> str:
+        with mock.patch.object(openai_service, "preferred_model", return_value="validation-model"), \
+                mock.patch.object(openai_service, "call_routed",
+                                  return_value=(answering_model, completion(" Yes "))) as call_routed:
+            answer = openai_service._cached_yes_no_answer(openai_service.RESUME_VALIDATION_PROMPTS, "resume text")
+        self.calls += call_routed.call_count
+        return answer
+
+    def test_answers_are_cached_under_the_model_that_gave_them(self):
+        self.calls = 0
+        # Failed over: stored under the fallback model, so the preferred model is asked again.
+        self.assertEqual(self.ask("fallback-model"), "yes")
+        self.assertEqual(self.ask("validation-model"), "yes")
+        self.assertEqual(self.calls, 2)
+        # Now the preferred model's answer is cached.
+        self.assertEqual(self.ask("validation-model"), "yes")
+        self.assertEqual(self.calls, 2)
+
+    def test_keys_differ_by_model(self):
+        kwargs = {"messages": [{"role": "user", "content": "hi"}], "temperature": 0}
+        self.assertNotEqual(
+            openai_service.completion_cache_key("a", kwargs), openai_service.completion_cache_key("b", kwargs),
+        )
+
+
+class InMemoryCacheBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(cache_service.time, "monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = cache_service.InMemoryCacheBackend(max_entries=2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.backend.set("a", "1", ttl=60)
+        self.backend.set("b", "2", ttl=60)
+        # Reading "a" makes "b" the least recently used.
+        self.assertEqual(self.backend.get("a"), "1")
+        self.backend.set("c", "3", ttl=60)
+        self.assertIsNone(self.backend.get("b"))
+        self.assertEqual(self.backend.get("a"), "1")
+        self.assertEqual(self.backend.get("c"), "3")
+
+    def test_entries_expire_after_their_ttl(self):
+        self.backend.set("a", "1", ttl=60)
+        self.now += 60
+        self.assertEqual(self.backend.get("a"), "1")
+        self.now += 1
+        self.assertIsNone(self.backend.get("a"))
+        # The expired entry no longer takes a slot.
+        self.backend.set("b", "2", ttl=60)
+        self.backend.set("c", "3", ttl=60)
+        self.assertEqual((self.backend.get("b"), self.backend.get("c")), ("2", "3"))
+
+    def test_backend_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            cache_service.CacheBackend()
@@ -0,0 +1,97 @@
+import zipfile
+from io import BytesIO
+
+from django.test import SimpleTestCase
+
+from resume_app.services.docx_extraction_service import DocxDeadlineExceeded, DocxTable, read_docx_content
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+)
+
+
+def part(body: str, root: str = "w:document") -> str:
+    return f'<?xml version="1.0" encoding="UTF-8"?><{root} {NAMESPACES}>{body}</{root}>'
+
+
+def paragraph(*runs: str) -> str:
+    return "<w:p>" + "".join(f"<w:r>{run}</w:r>" for run in runs) + "</w:p>"
+
+
+def text(value: str) -> str:
+    return f"<w:t>{value}</w:t>"
+
+
+def cell(*paragraphs: str) -> str:
+    return "<w:tc>" + "".join(paragraphs) + "</w:tc>"
+
+
+BODY = part(
+    "<w:body>"
+    + paragraph(text("Jane Doe"), "<w:tab/>", text("jane@example.com"))
+    + paragraph(text("Line one"), "<w:br/>", text("line two"))
+    + "<w:tbl>"
+    + "<w:tr>" + cell(paragraph(text("Skills"))) + cell(paragraph(text("Python"))) + "</w:tr>"
+    + "<w:tr>" + cell(paragraph(text("Roles"))) + cell(paragraph(text("Lead")), paragraph(text("Mentor"))) + "</w:tr>"
+    + "</w:tbl>"
+    # A text box drawn twice, as mc:Choice and as the legacy mc:Fallback.
+    + paragraph(
+        text("Anchor"),
+        "<mc:AlternateContent><mc:Choice>"
+        + "<w:txbxContent>" + paragraph(text("Text box")) + "</w:txbxContent>"
+        + "</mc:Choice><mc:Fallback>"
+        + "<w:txbxContent>" + paragraph(text("Text box")) + "</w:txbxContent>"
+        + "</mc:Fallback></mc:AlternateContent>",
+    )
+    + "</w:body>"
+)
+
+
+def docx(parts: dict) -> BytesIO:
+    file = BytesIO()
+    with zipfile.ZipFile(file, "w") as archive:
+        for name, content in parts.items():
+            archive.writestr(name, content)
+    file.seek(0)
+    return file
+
+
+class ReadDocxContentTests(SimpleTestCase):
+    def read(self, **kwargs):
+        return read_docx_content(docx({
+            "word/document.xml": BODY,
+            "word/header1.xml": part(paragraph(text("Resume")), "w:hdr"),
+            # The first page header repeats the default one.
+            "word/header2.xml": part(paragraph(text("Resume")), "w:hdr"),
+            "word/footer1.xml": part(paragraph(text("Page 1")), "w:ftr"),
+        }), **kwargs)
+
+    def test_body_blocks_keep_their_order_and_structure(self):
+        blocks = self.read().body.blocks
+        self.assertEqual(blocks[:2], ["Jane Doe\tjane@example.com", "Line one\nline two"])
+        self.assertEqual(blocks[2], DocxTable(rows=[["Skills", "Python"], ["Roles", "Lead\nMentor"]]))
+        self.assertEqual(blocks[3:], ["Anchor", "Text box"])
+
+    def test_text_includes_headers_and_footers_once(self):
+        self.assertEqual(self.read().to_text(), "\n".join([
+            "Resume",
+            "Jane Doe\tjane@example.com",
+            "Line one\nline two",
+            "Skills | Python",
+            "Roles",
+            "Lead\nMentor",
+            "Anchor",
+            "Text box",
+            "Page 1",
+        ]))
+
+    def test_deadline_stops_parsing(self):
+        # The deadline is only checked every DEADLINE_CHECK_INTERVAL elements.
+        body = part("<w:body>" + paragraph(text("Experience")) * 2000 + "</w:body>")
+        with self.assertRaises(DocxDeadlineExceeded):
+            read_docx_content(docx({"word/document.xml": body}), deadline=0)
+
+    def test_file_without_a_document_part_is_refused(self):
+        with self.assertRaises(KeyError):
+            read_docx_content(docx({"word/styles.xml": part("", "w:styles")}))
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.benchmark.corpus import resume_text
+from resume_app.services import extraction_cache_service
+from resume_app.services.extraction_cache_service import ExtractionCache, get_extraction_cache
+from resume_app.services.extraction_service import extract_text_from_file, extractor_id
+from resume_app.services.rendering_service import render_resume_docx
+
+
+class ExtractionCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "extractions.sqlite3")
+        extraction_cache_service._extraction_cache = None
+        extraction_cache_service._extraction_cache_retry_at = 0.0
+        self.addCleanup(setattr, extraction_cache_service, "_extraction_cache", None)
+
+    def test_round_trip(self):
+        cache = ExtractionCache(self.path, max_bytes=1024 * 1024)
+        self.assertIsNone(cache.get("pdf", "pymupdf:v1", "abc"))
+        cache.set("pdf", "pymupdf:v1", "abc", "Resume text")
+        self.assertEqual(cache.get("pdf", "pymupdf:v1", "abc"), "Resume text")
+
+    def test_least_recently_used_texts_are_evicted(self):
+        cache = ExtractionCache(self.path, max_bytes=2500)
+        for index in range(5):
+            # Incompressible, so each entry takes about 1000 bytes.
+            cache.set("pdf", "pymupdf:v1", str(index), os.urandom(500).hex())
+        self.assertIsNone(cache.get("pdf", "pymupdf:v1", "0"))
+        self.assertIsNotNone(cache.get("pdf", "pymupdf:v1", "4"))
+
+    def test_corrupt_row_is_a_miss(self):
+        cache = ExtractionCache(self.path, max_bytes=1024 * 1024)
+        cache.set("pdf", "pymupdf:v1", "abc", "Resume text")
+        cache._connection().execute("UPDATE extractions SET text = ?", (b"not zlib",))
+        self.assertIsNone(cache.get("pdf", "pymupdf:v1", "abc"))
+
+    def test_unopenable_cache_is_skipped(self):
+        blocker = os.path.join(self.directory.name, "file")
+        open(blocker, "w").close()
+        with override_settings(EXTRACTION_CACHE_DB=os.path.join(blocker, "extractions.sqlite3"),
+                               EXTRACTION_CACHE_MAX_BYTES=1024 * 1024):
+            self.assertIsNone(get_extraction_cache())
+            with mock.patch.object(extraction_cache_service, "ExtractionCache") as cache_class:
+                self.assertIsNone(get_extraction_cache())
+            # Not retried until INIT_RETRY_INTERVAL has passed.
+            cache_class.assert_not_called()
+
+            text = resume_text(0)
+            extracted = extract_text_from_file(mock.Mock(data=render_resume_docx(text), sha256="abc"), "docx")
+            self.assertIn(text.splitlines()[0], extracted)
+
+    def test_texts_are_cached_per_docx_engine(self):
+        upload = mock.Mock(data=render_resume_docx(resume_text(0)), sha256="abc")
+        with override_settings(EXTRACTION_CACHE_DB=self.path, EXTRACTION_CACHE_MAX_BYTES=1024 * 1024):
+            for engine in ("stream", "python-docx"):
+                with self.subTest(engine), override_settings(DOCX_EXTRACTION_ENGINE=engine):
+                    self.assertIsNone(get_extraction_cache().get("docx", extractor_id("docx"), "abc"))
+                    extracted = extract_text_from_file(upload, "docx")
+                    self.assertEqual(get_extraction_cache().get("docx", extractor_id("docx"), "abc"), extracted)
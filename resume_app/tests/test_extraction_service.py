@@ -0,0 +1,57 @@
+from io import BytesIO
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services import extraction_service
+from resume_app.services.extraction_service import ExtractionLimitError, extract_pdf_text, extract_text_from_file
+
+
+def pdf(page_count: int) -> bytes:
+    import fitz  # PyMuPDF
+
+    with fitz.open() as document:
+        for page_number in range(page_count):
+            document.new_page().insert_text((72, 72), f"Page {page_number + 1}")
+        return document.tobytes()
+
+
+@override_settings(EXTRACTION_MAX_BYTES=1024 * 1024, EXTRACTION_MAX_PAGES=10, EXTRACTION_TIME_BUDGET=30,
+                   EXTRACTION_PARALLEL_MIN_PAGES=4, EXTRACTION_PROCESSES=2)
+class ExtractPdfTextTests(SimpleTestCase):
+    def pages(self, text: str):
+        return text.split()[1::2]
+
+    def test_small_pdf_is_extracted_in_process(self):
+        with mock.patch.object(extraction_service, "_get_process_pool") as get_process_pool:
+            self.assertEqual(self.pages(extract_pdf_text(pdf(3))), ["1", "2", "3"])
+        get_process_pool.assert_not_called()
+
+    def test_large_pdf_is_split_across_the_process_pool_in_order(self):
+        self.addCleanup(setattr, extraction_service, "_process_pool", None)
+        self.assertEqual(self.pages(extract_pdf_text(pdf(7))), ["1", "2", "3", "4", "5", "6", "7"])
+        self.assertIsNotNone(extraction_service._process_pool)
+        extraction_service._process_pool.shutdown()
+
+    @override_settings(EXTRACTION_MAX_PAGES=4)
+    def test_pdf_over_the_page_budget_is_refused(self):
+        with self.assertRaisesMessage(ExtractionLimitError, "more than 4 pages"):
+            extract_pdf_text(pdf(5))
+
+    @override_settings(EXTRACTION_TIME_BUDGET=-1)
+    def test_extraction_over_the_time_budget_is_stopped(self):
+        self.addCleanup(setattr, extraction_service, "_process_pool", None)
+        for page_count in (3, 7):
+            with self.subTest(page_count=page_count):
+                with self.assertRaisesMessage(ExtractionLimitError, "ran out of time"):
+                    extract_pdf_text(pdf(page_count))
+        extraction_service._process_pool.shutdown()
+
+    def test_file_over_the_byte_budget_is_refused(self):
+        data = pdf(1)
+        with override_settings(EXTRACTION_MAX_BYTES=len(data) - 1):
+            # Held by the upload handler, or read in chunks.
+            for file in (mock.Mock(data=data), BytesIO(data)):
+                with self.subTest(file=type(file).__name__):
+                    with self.assertRaisesMessage(ExtractionLimitError, f"larger than {len(data) - 1} bytes"):
+                        extract_text_from_file(file, "pdf")
@@ -0,0 +1,106 @@
+import os
+import socket
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services import job_posting_service
+from resume_app.services.job_posting_service import (
+    JobPosting,
+    JobPostingCache,
+    JobPostingFetchError,
+    canonicalize_url,
+    fetch_job_posting,
+)
+
+
+class CanonicalizeUrlTests(SimpleTestCase):
+    def test_links_to_the_same_posting_share_one_url(self):
+        canonical = "https://jobs.example.com/postings/42?a=1&b=2"
+        for url in [
+            canonical,
+            "  HTTPS://Jobs.Example.COM:443/postings/42?b=2&a=1  ",
+            "https://jobs.example.com/postings/42?utm_source=linkedin&a=1&UTM_Campaign=x&b=2&gclid=abc",
+            "https://jobs.example.com/postings/42?a=1&b=2&ref=newsletter#apply",
+        ]:
+            with self.subTest(url):
+                self.assertEqual(canonicalize_url(url), canonical)
+
+    def test_meaningful_differences_are_kept(self):
+        self.assertEqual(canonicalize_url("http://jobs.example.com:8080"), "http://jobs.example.com:8080/")
+        self.assertEqual(canonicalize_url("https://[2001:DB8::1]/jobs?q="), "https://[2001:db8::1]/jobs?q=")
+        self.assertNotEqual(canonicalize_url("https://example.com/Jobs"), canonicalize_url("https://example.com/jobs"))
+
+    def test_unsupported_urls_are_refused(self):
+        for url in ("ftp://example.com/job", "example.com/job", "https:///job"):
+            with self.subTest(url), self.assertRaises(JobPostingFetchError):
+                canonicalize_url(url)
+
+
+class FetchJobPostingErrorTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        cache = JobPostingCache(self.directory.name, max_age=3600, max_bytes=1024 * 1024)
+        patcher = mock.patch.object(job_posting_service, "get_job_posting_cache", return_value=cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = cache
+
+    @override_settings(JOB_POSTING_ALLOW_PRIVATE_HOSTS=False)
+    def test_scoped_ipv6_address_is_refused(self):
+        address = (socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("fe80::1%eth0", 443, 0, 2))
+        with mock.patch.object(socket, "getaddrinfo", return_value=[address]):
+            with self.assertRaises(JobPostingFetchError):
+                fetch_job_posting("https://jobs.example.com/1")
+
+    def test_invalid_url_is_a_fetch_error(self):
+        for url in ("https://[::1/jobs", "https://example.com:notaport/"):
+            with self.subTest(url), self.assertRaises(JobPostingFetchError):
+                fetch_job_posting(url)
+
+    def test_cache_write_failure_still_returns_the_posting(self):
+        posting = JobPosting(url="https://jobs.example.com/1", text="Backend Engineer", fetched_at=time.time())
+        with mock.patch.object(job_posting_service, "_download", return_value=posting), \
+                mock.patch.object(self.cache, "set", side_effect=OSError("read-only file system")):
+            self.assertEqual(fetch_job_posting("https://jobs.example.com/1").text, "Backend Engineer")
+
+
+class JobPostingCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def posting(self, index: int) -> JobPosting:
+        return JobPosting(url=f"https://jobs.example.com/{index}", text="x" * 500, fetched_at=time.time())
+
+    def test_prune_keeps_the_most_recently_used_entries_under_max_bytes(self):
+        cache = JobPostingCache(self.directory.name, max_age=3600, max_bytes=2000)
+        for index in range(6):
+            cache.set(f"https://jobs.example.com/{index}", self.posting(index))
+            path = cache._path(f"https://jobs.example.com/{index}")
+            os.utime(path, (time.time() - 600 + index, time.time() - 600 + index))
+        # Using the oldest entry makes it the most recently used.
+        self.assertIsNotNone(cache.get("https://jobs.example.com/0"))
+
+        cache.prune()
+        kept = [index for index in range(6) if cache.get(f"https://jobs.example.com/{index}") is not None]
+        self.assertIn(0, kept)
+        self.assertIn(5, kept)
+        self.assertNotIn(1, kept)
+        self.assertLessEqual(
+            sum(entry.stat().st_size for entry in os.scandir(self.directory.name)), 2000,
+        )
+
+    def test_prune_deletes_expired_entries(self):
+        cache = JobPostingCache(self.directory.name, max_age=60, max_bytes=1024 * 1024)
+        cache.set("https://jobs.example.com/old", self.posting(0))
+        cache.set("https://jobs.example.com/new", self.posting(1))
+        old_path = cache._path("https://jobs.example.com/old")
+        os.utime(old_path, (time.time() - 120, time.time() - 120))
+
+        self.assertEqual(cache.prune(), 1)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertIsNotNone(cache.get("https://jobs.example.com/new"))
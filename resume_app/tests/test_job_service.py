@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from resume_app.models import GenerationJob
+from resume_app.services import job_service
+from resume_app.services.job_service import (
+    QueueFullError,
+    claim_next_job,
+    requeue_stale_jobs,
+    run_job,
+    submit_generation_job,
+)
+
+
+@override_settings(GENERATION_WORKER_THREADS=0, GENERATION_JOB_TIMEOUT=0)
+class RunJobTests(TestCase):
+    def setUp(self):
+        GenerationJob.objects.create(resume_text="resume", job_posting_text="posting")
+
+    def test_result_is_saved(self):
+        job = claim_next_job()
+        with mock.patch.object(job_service, "generate_rewritten_text", return_value="rewritten"):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.SUCCEEDED)
+        self.assertEqual(job.result_text, "rewritten")
+
+    def test_stale_attempt_does_not_overwrite_a_later_one(self):
+        stale = claim_next_job()
+
+        def generate_slowly(*args):
+            # The job outlives GENERATION_JOB_TIMEOUT, is requeued and claimed again.
+            self.assertEqual(requeue_stale_jobs(), 1)
+            self.assertEqual(claim_next_job().pk, stale.pk)
+            raise TimeoutError("Timed out")
+
+        with mock.patch.object(job_service, "generate_rewritten_text", side_effect=generate_slowly):
+            run_job(stale)
+
+        job = GenerationJob.objects.get(pk=stale.pk)
+        self.assertEqual(job.status, GenerationJob.Status.RUNNING)
+        self.assertEqual(job.error, "")
+        self.assertNotEqual(job.started_at, stale.started_at)
+
+    @override_settings(GENERATION_JOB_MAX_ATTEMPTS=2)
+    def test_job_that_keeps_timing_out_fails(self):
+        self.assertEqual(claim_next_job().attempts, 1)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_next_job().attempts, 2)
+        self.assertEqual(requeue_stale_jobs(), 0)
+
+        job = GenerationJob.objects.get()
+        self.assertEqual(job.status, GenerationJob.Status.FAILED)
+        self.assertEqual(job.error, "Timed out after 2 attempts.")
+        self.assertIsNotNone(job.finished_at)
+
+
+@override_settings(GENERATION_WORKER_THREADS=0, GENERATION_QUEUE_MAX_DEPTH=2)
+class SubmitGenerationJobTests(TestCase):
+    def test_queue_is_filled_up_to_its_max_depth(self):
+        submit_generation_job("resume", "posting", "")
+        submit_generation_job("resume", "posting", None)
+        with self.assertRaises(QueueFullError):
+            submit_generation_job("resume", "posting", "")
+        # The refused job is rolled back with its transaction.
+        self.assertEqual(GenerationJob.objects.count(), 2)
@@ -0,0 +1,109 @@
+import os
+import tempfile
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from resume_app.middleware import RequestMetricsMiddleware
+from resume_app.services.metrics_service import MetricsRegistry, MetricsStore, request_duration, requests_in_flight
+
+# Well above the largest pid Linux hands out.
+EXITED_PID = 2 ** 30
+
+
+class SharedMetricsTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = MetricsStore(os.path.join(directory.name, "metrics.sqlite3"))
+
+    def worker(self, pid: int = None):
+        registry = MetricsRegistry()
+        if pid is not None:
+            registry._pid = pid
+        return registry, {
+            "requests": registry.counter("test_requests_total", "Requests."),
+            "in_flight": registry.gauge("test_in_flight", "In flight."),
+            "state": registry.gauge("test_state", "State.", aggregate="livemax"),
+            "duration": registry.histogram("test_duration_seconds", "Duration.", buckets=(1.0,)),
+        }
+
+    def test_counters_and_histograms_add_up_every_worker_that_flushed(self):
+        exited, exited_metrics = self.worker(EXITED_PID)
+        exited_metrics["requests"].inc(2)
+        exited_metrics["duration"].observe(0.5)
+        exited.flush(self.store)
+
+        scraped, metrics = self.worker()
+        metrics["requests"].inc()
+        metrics["duration"].observe(3.0)
+        rendered = scraped.render(self.store)
+
+        self.assertIn("resume_righter_test_requests_total 3.0", rendered)
+        self.assertIn('resume_righter_test_duration_seconds_bucket{le="1.0"} 1', rendered)
+        self.assertIn('resume_righter_test_duration_seconds_bucket{le="+Inf"} 2', rendered)
+        self.assertIn("resume_righter_test_duration_seconds_sum 3.5", rendered)
+
+    def test_gauges_only_count_running_workers(self):
+        exited, exited_metrics = self.worker(EXITED_PID)
+        exited_metrics["in_flight"].inc(5)
+        exited_metrics["state"].set(2)
+        exited.flush(self.store)
+
+        running, running_metrics = self.worker(os.getppid())
+        running_metrics["in_flight"].inc(2)
+        running_metrics["state"].set(1)
+        running.flush(self.store)
+
+        scraped, metrics = self.worker()
+        metrics["in_flight"].inc()
+        metrics["state"].set(0)
+        rendered = scraped.render(self.store)
+
+        self.assertIn("resume_righter_test_in_flight 3.0", rendered)
+        self.assertIn("resume_righter_test_state 1", rendered)
+
+    def test_a_reused_pid_does_not_revive_the_exited_worker(self):
+        exited, exited_metrics = self.worker(os.getppid())
+        exited_metrics["requests"].inc()
+        exited_metrics["in_flight"].inc(5)
+        exited.flush(self.store)
+
+        reused, reused_metrics = self.worker(os.getppid())
+        reused_metrics["in_flight"].inc()
+        reused.flush(self.store)
+
+        rendered = self.worker()[0].render(self.store)
+        self.assertIn("resume_righter_test_requests_total 1.0", rendered)
+        self.assertIn("resume_righter_test_in_flight 1.0", rendered)
+
+
+class RequestMetricsMiddlewareTests(SimpleTestCase):
+    def run_request(self, response):
+        request = RequestFactory().get("/stream/")
+        middleware = RequestMetricsMiddleware(lambda request: response)
+        middleware.process_request(request)
+        request.metrics_view = "stream"
+        requests_in_flight.inc(view="stream")
+        return middleware.process_response(request, response)
+
+    def count(self):
+        return request_duration.snapshot().get(
+            'resume_righter_http_request_duration_seconds_count{view="stream",method="GET",status="200"}', 0,
+        )
+
+    def test_streamed_response_is_timed_once_its_body_is_sent(self):
+        before, in_flight = self.count(), requests_in_flight.value(view="stream")
+        response = self.run_request(StreamingHttpResponse(iter([b"a", b"b"])))
+        self.assertEqual(self.count(), before)
+        self.assertEqual(requests_in_flight.value(view="stream"), in_flight + 1)
+
+        self.assertEqual(b"".join(response.streaming_content), b"ab")
+        response.close()
+        self.assertEqual(self.count(), before + 1)
+        self.assertEqual(requests_in_flight.value(view="stream"), in_flight)
+
+    def test_plain_response_is_timed_straight_away(self):
+        before = self.count()
+        self.run_request(HttpResponse(b"ab"))
+        self.assertEqual(self.count(), before + 1)
@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services import cache_service, openai_service, prompt_service
+from resume_app.services.openai_service import DeltaStripper
+from resume_app.services.section_service import ResumeSplit
+
+
+def stream_chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+
+
+class DeltaStripperTests(SimpleTestCase):
+    def test_streamed_text_is_stripped_like_the_whole(self):
+        for deltas in [["  \n", " Led", " the team ", " \n", "\n"], ["Led the", " team"], [" ", "\n"]]:
+            stripper = DeltaStripper()
+            self.assertEqual("".join(stripper.feed(delta) for delta in deltas), "".join(deltas).strip())
+
+
+@override_settings(OPENAI_CACHE_BACKEND="memory", OPENAI_CACHE_TTL=60, OPENAI_CACHE_MAX_ENTRIES=100,
+                   GENERATION_SECTION_CONCURRENCY=2)
+class RewrittenSectionChunksTests(SimpleTestCase):
+    def setUp(self):
+        cache_service._completion_cache = None
+        self.addCleanup(setattr, cache_service, "_completion_cache", None)
+        self.split = ResumeSplit(jobs=["Job A", "Job B"], context="Randy Hash")
+
+    def chunks(self):
+        return list(openai_service._rewritten_section_chunks(self.split, "Randy Hash", "posting", ""))
+
+    def test_first_job_is_streamed_and_cached(self):
+        def instrumented_stream(call, kwargs, on_route):
+            self.assertEqual(call, "generate_section_stream")
+            on_route("fallback-model")
+            return iter([stream_chunk(" Rewritten"), stream_chunk(" Job A\n")])
+
+        with mock.patch.object(openai_service, "_instrumented_stream", side_effect=instrumented_stream), \
+                mock.patch.object(openai_service, "_rewrite_section", return_value="Rewritten Job B"), \
+                mock.patch.object(openai_service, "preferred_model", return_value="fallback-model"):
+            self.assertEqual(self.chunks(), ["Rewritten", " Job A", "\n\nRewritten Job B"])
+            # The second generation reads the first job back from the cache under the model that wrote it.
+            self.assertEqual(self.chunks(), ["Rewritten Job A", "\n\nRewritten Job B"])
+
+
+class AssembleResumePromptTests(SimpleTestCase):
+    def setUp(self):
+        # Count tokens from the character estimate whether or not tiktoken is installed.
+        patcher = mock.patch.object(prompt_service, "tiktoken", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(EXTRA_DETAILS_FOR_RESUME_GENERATION="Keep it to one page. " * 200)
+    def test_extra_details_are_not_trimmed_below_their_floor(self):
+        budget = 1500 + openai_service.estimate_tokens(openai_service.RESUME_GENERATION_SYSTEM_PROMPT)
+        with mock.patch.object(openai_service, "context_budget", return_value=budget), \
+                self.assertLogs(openai_service.logger, "WARNING") as logs:
+            prompt_budget = openai_service.assemble_resume_prompt("r" * 4000, "p" * 4000, "")
+        self.assertIn("extra_details", prompt_budget.trimmed)
+        self.assertEqual(prompt_budget.section_tokens["extra_details"], openai_service.EXTRA_DETAILS_MIN_TOKENS)
+        self.assertIn("EXTRA_DETAILS_FOR_RESUME_GENERATION trimmed", logs.output[0])
+
+
+def completion(content: str):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=10, completion_tokens=1, total_tokens=11),
+    )
+
+
+@override_settings(OPENAI_CACHE_BACKEND="memory", OPENAI_CACHE_TTL=60, OPENAI_CACHE_MAX_ENTRIES=100)
+class ValidateInputsTests(SimpleTestCase):
+    def setUp(self):
+        cache_service._completion_cache = None
+        self.addCleanup(setattr, cache_service, "_completion_cache", None)
+        patchers = [
+            mock.patch.object(openai_service, "preferred_model", return_value="validation-model"),
+            # Leave the resume to the model rather than the local classifier.
+            mock.patch.object(openai_service, "classify_resume_text", return_value=None),
+            mock.patch.object(
+                openai_service, "job_posting_question",
+                side_effect=lambda url: (openai_service.JOB_POSTING_VALIDATION_PROMPTS, url, url),
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.calls = []
+
+    def validate(self, batch_answer: str):
+        def call_routed(call, kwargs, send):
+            self.calls.append(call)
+            if call == "validate_batch":
+                return "validation-model", completion(batch_answer)
+            # The per-field fallback: only the posting is refused.
+            answer = "No" if "https://example.com/job" in kwargs["messages"][1]["content"] else "Yes"
+            return "validation-model", completion(answer)
+
+        resume = mock.Mock(data=b"Jane Doe\nExperience\n- Led the billing rewrite.", sha256=None)
+        with mock.patch.object(openai_service, "call_routed", side_effect=call_routed):
+            return openai_service.validate_inputs(resume, "txt", "https://example.com/job", "Remote only")
+
+    def test_fields_are_validated_in_one_batched_call(self):
+        results = self.validate('{"resume": "Yes", "job_posting": "no", "special_considerations": "yes"}')
+        self.assertEqual(self.calls, ["validate_batch"])
+        self.assertEqual(results, {
+            "resume": {"is_valid": True, "validated_data": "Jane Doe\nExperience\n- Led the billing rewrite."},
+            "job_posting": {"is_valid": False, "validated_data": ""},
+            "special_considerations": {"is_valid": True, "validated_data": "Remote only"},
+        })
+
+    def test_malformed_batch_answer_falls_back_to_a_call_per_field(self):
+        for batch_answer in ["not json", '{"resume": "yes"}', '["yes", "no", "yes"]']:
+            with self.subTest(batch_answer):
+                cache_service._completion_cache = None
+                self.calls = []
+                results = self.validate(batch_answer)
+                self.assertEqual(self.calls[0], "validate_batch")
+                self.assertEqual(sorted(self.calls[1:]), ["validate"] * 3)
+                self.assertEqual({field: result["is_valid"] for field, result in results.items()}, {
+                    "resume": True, "job_posting": False, "special_considerations": True,
+                })
+
+    def test_malformed_batch_answer_is_not_cached(self):
+        self.validate("not json")
+        self.calls = []
+        self.validate('{"resume": "yes", "job_posting": "no", "special_considerations": "yes"}')
+        # The per-field answers are cached, the batch is asked again.
+        self.assertEqual(self.calls, ["validate_batch"])
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from resume_app.services import prompt_service
+from resume_app.services.prompt_service import (
+    TRUNCATION_MARKER,
+    PromptSection,
+    dedupe_lines,
+    estimate_tokens,
+    fit_prompt,
+    truncate_to_tokens,
+)
+
+
+def render(texts):
+    # 15 characters, 4 tokens, around the sections.
+    return f"Instructions.\n{texts['resume']}\n{texts['posting']}"
+
+
+def sections(posting_min_tokens: int = 0):
+    return [
+        PromptSection("resume", "r" * 400, priority=2),
+        PromptSection("posting", "p" * 400, priority=1, min_tokens=posting_min_tokens),
+    ]
+
+
+class FitPromptTests(SimpleTestCase):
+    def setUp(self):
+        # Count tokens from the character estimate whether or not tiktoken is installed.
+        patcher = mock.patch.object(prompt_service, "tiktoken", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_prompt_within_budget_is_untouched(self):
+        fitted = fit_prompt(render, sections(), budget=204)
+        self.assertEqual(fitted.prompt, render({"resume": "r" * 400, "posting": "p" * 400}))
+        self.assertEqual(fitted.trimmed, [])
+        self.assertEqual(fitted.total_tokens, 204)
+        self.assertEqual(fitted.section_tokens, {"resume": 100, "posting": 100, "instructions": 4})
+
+    def test_lowest_priority_section_is_trimmed_first(self):
+        fitted = fit_prompt(render, sections(), budget=180)
+        self.assertEqual(fitted.trimmed, ["posting"])
+        self.assertEqual(fitted.section_tokens["resume"], 100)
+        self.assertTrue(fitted.prompt.endswith(TRUNCATION_MARKER))
+        self.assertLessEqual(fitted.total_tokens, 180)
+
+    def test_sections_are_not_trimmed_below_min_tokens(self):
+        fitted = fit_prompt(render, sections(posting_min_tokens=90), budget=180)
+        self.assertEqual(fitted.trimmed, ["posting", "resume"])
+        self.assertEqual(fitted.section_tokens["posting"], 90)
+        self.assertLessEqual(fitted.total_tokens, 180)
+
+    def test_truncation_prefers_a_line_break(self):
+        text = "\n".join(["x" * 39] * 10)
+        truncated = truncate_to_tokens(text, 50)
+        self.assertEqual(truncated, "\n".join(["x" * 39] * 4) + TRUNCATION_MARKER)
+        self.assertLessEqual(estimate_tokens(truncated), 50)
+
+
+class DedupeLinesTests(SimpleTestCase):
+    def test_repeated_bullets_are_removed_whatever_their_marker(self):
+        text = "- Led the billing rewrite.\n* led the  billing rewrite.\n1. Led the billing rewrite.\n- Cut costs."
+        self.assertEqual(dedupe_lines(text), "- Led the billing rewrite.\n- Cut costs.")
+
+    def test_repeated_long_lines_are_removed(self):
+        line = "Responsible for the design of the payment platform."
+        self.assertEqual(dedupe_lines(f"{line}\nAcme Corp\n{line}"), f"{line}\nAcme Corp")
+
+    def test_short_lines_and_blank_lines_are_kept(self):
+        text = "Engineer\nRemote\n\n- Built things.\n\nEngineer\nRemote"
+        self.assertEqual(dedupe_lines(text), text)
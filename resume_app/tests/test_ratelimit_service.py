@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import openai
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services import ratelimit_service
+from resume_app.services.ratelimit_service import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitExceeded,
+    TokenBucketLimiter,
+    call_with_limits,
+)
+
+
+class NotRetryableError(openai.OpenAIError):
+    pass
+
+
+class TokenBucketLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.limiter = TokenBucketLimiter(
+            os.path.join(self.directory.name, "ratelimit.sqlite3"), {"small": (2, 1000)}, (100, 100000),
+        )
+
+    def test_reserve_waits_once_the_bucket_is_empty(self):
+        self.assertEqual(self.limiter.reserve("small", 100, max_wait=60), 0)
+        self.assertEqual(self.limiter.reserve("small", 100, max_wait=60), 0)
+        # Two requests a minute: the third waits about 30s for the next one.
+        self.assertAlmostEqual(self.limiter.reserve("small", 100, max_wait=60), 30, delta=1)
+
+    def test_reserve_over_max_wait_takes_nothing(self):
+        self.limiter.reserve("small", 900, max_wait=60)
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.reserve("small", 900, max_wait=1)
+        # The refused reservation left the buckets as they were.
+        self.assertEqual(self.limiter.reserve("small", 100, max_wait=60), 0)
+
+    def test_refund_returns_unused_tokens(self):
+        self.limiter.reserve("small", 1000, max_wait=60)
+        self.limiter.refund("small", 900)
+        self.assertEqual(self.limiter.reserve("small", 800, max_wait=60), 0)
+
+    def test_models_have_separate_buckets(self):
+        self.limiter.reserve("small", 1000, max_wait=60)
+        self.assertEqual(self.limiter.reserve("other", 1000, max_wait=60), 0)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_the_threshold_and_fails_fast(self):
+        breaker = CircuitBreaker("model", failure_threshold=2, reset_timeout=30)
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker("model", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        self.assertEqual(breaker.state, "half_open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("model", failure_threshold=5, reset_timeout=0)
+        for _ in range(5):
+            breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+
+@override_settings(OPENAI_MAX_RETRIES=0, OPENAI_RATE_LIMIT_MAX_WAIT=0)
+class CallWithLimitsTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.limiter = TokenBucketLimiter(os.path.join(self.directory.name, "ratelimit.sqlite3"), {}, (100, 100000))
+        self.breaker = CircuitBreaker("model", failure_threshold=1, reset_timeout=0)
+        patchers = [
+            mock.patch.object(ratelimit_service, "get_rate_limiter", return_value=self.limiter),
+            mock.patch.object(ratelimit_service, "get_circuit_breaker", return_value=self.breaker),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.kwargs = {"messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 1000}
+
+    def half_open(self):
+        self.breaker.record_failure()
+        self.breaker.opened_at = time.monotonic() - 1
+
+    def test_trial_slot_is_released_when_the_reservation_fails(self):
+        self.half_open()
+        with mock.patch.object(self.limiter, "reserve", side_effect=sqlite3.OperationalError("database is locked")):
+            with self.assertRaises(sqlite3.OperationalError):
+                call_with_limits("model", self.kwargs, mock.Mock())
+        self.assertFalse(self.breaker._trial_in_flight)
+        # The next call can be the trial.
+        self.assertEqual(call_with_limits("model", self.kwargs, lambda: SimpleNamespace(usage=None)).usage, None)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_non_retryable_error_leaves_the_breaker_alone(self):
+        self.half_open()
+        with self.assertRaises(NotRetryableError):
+            call_with_limits("model", self.kwargs, mock.Mock(side_effect=NotRetryableError("bad request")))
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertFalse(self.breaker._trial_in_flight)
+
+    def test_rate_limited_attempt_neither_resets_nor_adds_to_the_failure_count(self):
+        self.breaker.failure_threshold = 2
+        self.breaker.record_failure()
+        error = openai.RateLimitError("slow down", response=mock.Mock(headers={}), body=None)
+        with self.assertRaises(openai.RateLimitError):
+            call_with_limits("model", self.kwargs, mock.Mock(side_effect=error))
+        self.assertEqual(self.breaker.failures, 1)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_failed_attempt_refunds_its_reservation(self):
+        reserved = ratelimit_service.estimate_request_tokens(self.kwargs)
+        with mock.patch.object(self.limiter, "refund") as refund, self.assertRaises(NotRetryableError):
+            call_with_limits("model", self.kwargs, mock.Mock(side_effect=NotRetryableError("bad request")))
+        refund.assert_called_once_with("model", reserved)
+
+    def test_reported_latency_leaves_out_the_rate_limit_wait(self):
+        latencies = []
+        with mock.patch.object(self.limiter, "reserve", return_value=0.05):
+            call_with_limits("model", self.kwargs, lambda: SimpleNamespace(usage=None), latencies.append)
+        self.assertEqual(len(latencies), 1)
+        self.assertLess(latencies[0], 0.05)
+
+    def test_stream_reservation_is_reconciled_from_its_usage_chunk(self):
+        chunks = [SimpleNamespace(usage=None), SimpleNamespace(usage=SimpleNamespace(total_tokens=150))]
+        stream = mock.MagicMock(spec=openai.Stream)
+        stream.__enter__.return_value = stream
+        stream.__iter__.return_value = iter(chunks)
+        reserved = ratelimit_service.estimate_request_tokens(self.kwargs)
+
+        with mock.patch.object(self.limiter, "refund") as refund:
+            self.assertEqual(list(call_with_limits("model", self.kwargs, lambda: stream)), chunks)
+        refund.assert_called_once_with("model", reserved - 150)
+        stream.__exit__.assert_called_once()
@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase
+
+from resume_app.services.rendering_service import ResumeSection, parse_resume_sections
+
+
+class ParseResumeSectionsTests(SimpleTestCase):
+    def test_companies_roles_and_bullets_in_their_usual_forms(self):
+        text = """Jane Doe
+Backend engineer.
+
+## Acme Corp
+Senior Engineer
+- Led the billing rewrite.
+* Cut cloud costs by 30%.
+
+**Globex**
+**Staff Engineer**
+1. Built the data pipeline.
+
+Company: Initech
+Role: Developer
+- **Maintained the TPS reports.**
+References available on request.
+"""
+        self.assertEqual(parse_resume_sections(text), [
+            ResumeSection(paragraphs=["Jane Doe", "Backend engineer."]),
+            ResumeSection(
+                company="Acme Corp", role="Senior Engineer",
+                bullets=["Led the billing rewrite.", "Cut cloud costs by 30%."],
+            ),
+            ResumeSection(company="Globex", role="Staff Engineer", bullets=["Built the data pipeline."]),
+            ResumeSection(
+                company="Initech", role="Developer", bullets=["Maintained the TPS reports."],
+                paragraphs=["References available on request."],
+            ),
+        ])
+
+    def test_short_line_ending_in_a_colon_starts_a_section(self):
+        sections = parse_resume_sections("Acme Corp:\nEngineer\n- Shipped.\nSkills:\n- Python, Django.")
+        self.assertEqual([(section.company, section.role) for section in sections], [
+            ("Acme Corp", "Engineer"), ("Skills", ""),
+        ])
+
+    def test_text_without_structure_is_kept_as_paragraphs(self):
+        self.assertEqual(
+            parse_resume_sections("I could not rewrite this resume.\n\nPlease try again."),
+            [ResumeSection(paragraphs=["I could not rewrite this resume.", "Please try again."])],
+        )
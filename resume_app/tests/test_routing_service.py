@@ -0,0 +1,39 @@
+from unittest import mock
+
+import openai
+from django.test import SimpleTestCase
+
+from resume_app.services import routing_service
+from resume_app.services.routing_service import ModelRouter, Route, call_routed
+
+
+class CallRoutedTests(SimpleTestCase):
+    def setUp(self):
+        self.route = Route(name="generation", calls=("generate",), models=["primary", "fallback"], latency_slo=1.0)
+        self.router = ModelRouter([self.route], window=300, min_samples=1, max_error_rate=0.5)
+        patcher = mock.patch.object(routing_service, "get_model_router", return_value=self.router)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.kwargs = {"messages": [{"role": "user", "content": "Hello"}], "max_tokens": 10}
+
+    def test_latency_is_the_one_reported_for_the_successful_attempt(self):
+        def send(kwargs, on_success):
+            # Rate limit waits and retries before the answer are not the model's latency.
+            on_success(0.5)
+            return "answer"
+
+        self.assertEqual(call_routed("generate", self.kwargs, send), ("primary", "answer"))
+        snapshot = self.router.health(self.route, "primary").snapshot()
+        self.assertEqual((snapshot["count"], snapshot["p95"]), (1, 0.5))
+        self.assertTrue(self.router.is_healthy(self.route, "primary"))
+
+    def test_failed_model_fails_over_to_the_next(self):
+        def send(kwargs, on_success):
+            if kwargs["model"] == "primary":
+                raise openai.APIConnectionError(request=mock.Mock())
+            on_success(0.1)
+            return "answer"
+
+        self.assertEqual(call_routed("generate", self.kwargs, send), ("fallback", "answer"))
+        self.assertEqual(self.router.health(self.route, "primary").snapshot()["error_rate"], 1.0)
+        self.assertEqual(self.router.plan("generate", self.kwargs)[1], ["fallback", "primary"])
@@ -0,0 +1,57 @@
+from django.test import SimpleTestCase
+
+from resume_app.services.section_service import split_resume_jobs
+
+RESUME = """Jane Doe
+jane@example.com
+
+Summary
+Backend engineer.
+
+Professional Experience
+Senior Engineer
+Acme Corp
+Jan 2021 - Present
+- Led the billing rewrite.
+- Cut cloud costs by 30%.
+
+Engineer, Globex
+2018 - 2020
+Staff Engineer, Globex
+2020 - 2021
+- Built the data pipeline.
+
+Initech | Developer | 03/2015 to 12/2017
+- Maintained the TPS reports.
+
+Education
+BSc Computer Science, 2014 - 2018
+"""
+
+
+class SplitResumeJobsTests(SimpleTestCase):
+    def test_jobs_start_at_their_title_and_company_lines(self):
+        split = split_resume_jobs(RESUME)
+        self.assertEqual(split.jobs, [
+            "Senior Engineer\nAcme Corp\nJan 2021 - Present\n- Led the billing rewrite.\n- Cut cloud costs by 30%.",
+            "Engineer, Globex\n2018 - 2020\nStaff Engineer, Globex\n2020 - 2021\n- Built the data pipeline.",
+            "Initech | Developer | 03/2015 to 12/2017\n- Maintained the TPS reports.",
+        ])
+
+    def test_everything_outside_the_jobs_is_context(self):
+        context = split_resume_jobs(RESUME).context
+        self.assertTrue(context.startswith("Jane Doe\njane@example.com"))
+        self.assertIn("Professional Experience", context)
+        self.assertTrue(context.endswith("Education\nBSc Computer Science, 2014 - 2018"))
+        self.assertNotIn("Acme Corp", context)
+
+    def test_markdown_headings_are_recognised(self):
+        for heading in ("## Work History", "**Experience:**"):
+            with self.subTest(heading):
+                self.assertEqual(len(split_resume_jobs(RESUME.replace("Professional Experience", heading)).jobs), 3)
+
+    def test_resume_without_an_experience_section_is_not_split(self):
+        self.assertIsNone(split_resume_jobs(RESUME.replace("Professional Experience", "Background")))
+
+    def test_resume_with_a_single_job_is_not_split(self):
+        self.assertIsNone(split_resume_jobs("Experience\nAcme Corp\n2019 - 2021\n- Shipped things.\n"))
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from resume_app.models import ResumeSession
+from resume_app.services.session_service import delete_expired_sessions, load_session, save_session_inputs
+
+
+@override_settings(RESUME_SESSION_TTL=3600)
+class SessionServiceTests(TestCase):
+    def expire(self, session: ResumeSession) -> None:
+        # updated_at is auto_now, so it can only be moved back with an UPDATE.
+        ResumeSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - timedelta(seconds=3601))
+
+    def test_inputs_round_trip_compressed(self):
+        resume_text = "Jane Doe, Zürich\n" + "- Led the billing rewrite.\n" * 200
+        session = save_session_inputs(None, resume_text=resume_text, considerations="")
+        stored = ResumeSession.objects.get(pk=session.pk)
+        self.assertLess(len(stored.resume_data), len(resume_text.encode()))
+
+        loaded = load_session(str(session.pk))
+        self.assertEqual(loaded.resume_text, resume_text)
+        self.assertEqual(loaded.considerations, "")
+        self.assertIsNone(loaded.job_posting_text)
+
+    def test_fields_left_as_none_keep_their_value(self):
+        session = save_session_inputs(None, resume_text="resume", job_posting_text="posting")
+        save_session_inputs(str(session.pk), job_posting_text="new posting")
+        loaded = load_session(str(session.pk))
+        self.assertEqual((loaded.resume_text, loaded.job_posting_text), ("resume", "new posting"))
+
+    def test_malformed_or_unknown_id_is_no_session(self):
+        for session_id in [None, "", "not-a-uuid", "12345", "00000000-0000-0000-0000-000000000000"]:
+            with self.subTest(session_id):
+                self.assertIsNone(load_session(session_id))
+
+    def test_expired_session_is_not_loaded_or_updated(self):
+        session = save_session_inputs(None, resume_text="resume")
+        self.expire(session)
+        self.assertIsNone(load_session(str(session.pk)))
+
+        renewed = save_session_inputs(str(session.pk), job_posting_text="posting")
+        self.assertNotEqual(renewed.pk, session.pk)
+        self.assertIsNone(renewed.resume_text)
+
+    def test_expired_sessions_are_deleted(self):
+        expired = save_session_inputs(None, resume_text="old")
+        current = save_session_inputs(None, resume_text="new")
+        self.expire(expired)
+        self.assertEqual(delete_expired_sessions(), 1)
+        self.assertEqual(list(ResumeSession.objects.values_list("pk", flat=True)), [current.pk])
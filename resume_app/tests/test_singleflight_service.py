@@ -0,0 +1,52 @@
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from resume_app.services.singleflight_service import SingleFlight
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.lock_dir = directory.name
+        self.single_flight = SingleFlight(self.lock_dir, result_ttl=60, wait_timeout=1)
+
+    def test_result_is_shared_through_the_cache(self):
+        key = SingleFlight.make_key("resume", "posting")
+        self.assertEqual(self.single_flight.run(key, lambda: "rewritten"), "rewritten")
+        self.assertEqual(self.single_flight.run(key, lambda: self.fail("generated twice")), "rewritten")
+
+    def test_lock_files_are_removed_on_release(self):
+        for index in range(20):
+            self.single_flight.run(SingleFlight.make_key("resume", str(index)), lambda: "rewritten")
+        self.assertEqual(os.listdir(self.lock_dir), [])
+
+    def test_unrelated_keys_do_not_wait_for_each_other(self):
+        # Another worker, with its own in-process flights, on the same lock directory.
+        other_worker = SingleFlight(self.lock_dir, result_ttl=60, wait_timeout=5)
+        with self.single_flight.flight(SingleFlight.make_key("resume", "a")) as flight:
+            self.assertFalse(flight.shared)
+            self.assertEqual(other_worker.run(SingleFlight.make_key("resume", "b"), lambda: "b"), "b")
+            flight.publish("a")
+
+    def test_worker_waiting_on_the_lock_gets_the_leaders_result(self):
+        key = SingleFlight.make_key("resume", "posting")
+        other_worker = SingleFlight(self.lock_dir, result_ttl=60, wait_timeout=5)
+        results = []
+        with self.single_flight.flight(key) as flight:
+            follower = threading.Thread(
+                target=lambda: results.append(other_worker.run(key, lambda: "generated twice")),
+            )
+            follower.start()
+            follower.join(0.3)
+            self.assertTrue(follower.is_alive())
+            flight.publish("rewritten")
+        follower.join(5)
+        self.assertEqual(results, ["rewritten"])
+        self.assertEqual(os.listdir(self.lock_dir), [])
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from resume_app.services.stream_service import aiterate_with_heartbeats, iterate_with_heartbeats
+
+
+def slow_chunks(delay: float):
+    yield "first"
+    time.sleep(delay)
+    yield "second"
+
+
+async def aslow_chunks(delay: float):
+    yield "first"
+    await asyncio.sleep(delay)
+    yield "second"
+
+
+class IterateWithHeartbeatsTests(SimpleTestCase):
+    def test_heartbeats_fill_the_gaps(self):
+        items = list(iterate_with_heartbeats(slow_chunks(0.1), interval=0.02))
+        self.assertEqual(items[0], "first")
+        self.assertEqual(items[-1], "second")
+        self.assertIn(None, items)
+
+    def test_errors_are_raised_to_the_caller(self):
+        def failing():
+            yield "first"
+            raise ValueError("boom")
+
+        with self.assertRaisesMessage(ValueError, "boom"):
+            list(iterate_with_heartbeats(failing(), interval=1))
+
+    def test_stopping_early_closes_the_iterator(self):
+        closed = threading.Event()
+
+        def chunks():
+            try:
+                while True:
+                    yield "chunk"
+                    time.sleep(0.01)
+            finally:
+                closed.set()
+
+        stream = iterate_with_heartbeats(chunks(), interval=1)
+        self.assertEqual(next(stream), "chunk")
+        stream.close()
+        self.assertTrue(closed.wait(1))
+
+    async def test_async_heartbeats_fill_the_gaps(self):
+        items = [item async for item in aiterate_with_heartbeats(aslow_chunks(0.1), interval=0.02)]
+        self.assertEqual(items[0], "first")
+        self.assertEqual(items[-1], "second")
+        self.assertIn(None, items)
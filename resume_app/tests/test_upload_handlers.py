@@ -0,0 +1,101 @@
+import hashlib
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from resume_app.upload_handlers import (
+    HashedUploadedFile,
+    ResumeUploadHandler,
+    UploadSizeLimitMiddleware,
+    rejected_upload_response,
+)
+
+DOCX_CONTENT = b"PK\x03\x04" + b"\x00" * 2000
+
+
+def upload(name: str, content: bytes):
+    request = RequestFactory().post("/api/validate-resume/", {"resume_file": SimpleUploadedFile(name, content)})
+    request.upload_handlers = [ResumeUploadHandler(request)]
+    return request
+
+
+class ResumeUploadHandlerTests(SimpleTestCase):
+    def assertRejected(self, request, status: int, message: str):
+        response = rejected_upload_response(request)
+        self.assertIsNotNone(response)
+        self.assertEqual(response.status_code, status)
+        self.assertIn(message, json.loads(response.content)["error"])
+
+    def test_accepted_upload_is_hashed(self):
+        for name, content, file_type in [
+            ("resume.pdf", b"%PDF-1.7\n" + b"x" * 3000, "pdf"),
+            ("resume.docx", DOCX_CONTENT, "docx"),
+            ("resume.txt", "Jane Doe, Zürich".encode(), "txt"),
+        ]:
+            with self.subTest(name):
+                request = upload(name, content)
+                self.assertIsNone(rejected_upload_response(request))
+                uploaded = request.FILES["resume_file"]
+                self.assertIsInstance(uploaded, HashedUploadedFile)
+                self.assertEqual(uploaded.file_type, file_type)
+                self.assertEqual(uploaded.data, content)
+                self.assertEqual(uploaded.sha256, hashlib.sha256(content).hexdigest())
+
+    def test_pdf_header_may_follow_leading_bytes(self):
+        self.assertIsNone(rejected_upload_response(upload("resume.pdf", b"\r\n" * 100 + b"%PDF-1.4\n")))
+
+    def test_contents_that_do_not_match_the_extension_are_refused(self):
+        for name, content in [
+            ("resume.pdf", b"x" * 2000 + b"%PDF-1.7"),
+            ("resume.pdf", DOCX_CONTENT),
+            ("resume.docx", b"%PDF-1.7\n" + b"x" * 2000),
+            ("resume.txt", b"Jane\x00Doe"),
+        ]:
+            with self.subTest(name=name, content=content[:10]):
+                self.assertRejected(upload(name, content), 400, "is not a valid")
+
+    def test_text_that_is_not_utf8_is_refused(self):
+        self.assertRejected(upload("resume.txt", "Zürich".encode("latin-1")), 400, "not UTF-8")
+
+    def test_unsupported_extension_is_refused(self):
+        self.assertRejected(upload("resume.exe", b"MZ"), 400, "Unsupported file type: .exe")
+
+    @override_settings(EXTRACTION_MAX_BYTES=1000, DATA_UPLOAD_MAX_MEMORY_SIZE=10000)
+    def test_file_growing_over_the_limit_is_refused(self):
+        self.assertRejected(upload("resume.txt", b"x" * 1001), 413, "larger than 1000 bytes")
+
+    @override_settings(EXTRACTION_MAX_BYTES=1000, DATA_UPLOAD_MAX_MEMORY_SIZE=1000)
+    def test_request_over_the_limit_is_refused_before_it_is_read(self):
+        request = upload("resume.txt", b"x" * 3000)
+        self.assertRejected(request, 413, "larger than 1000 bytes")
+        self.assertNotIn("resume_file", request.FILES)
+
+
+@override_settings(EXTRACTION_MAX_BYTES=1000, DATA_UPLOAD_MAX_MEMORY_SIZE=1000)
+class UploadSizeLimitMiddlewareTests(SimpleTestCase):
+    def call(self, content_length: bytes):
+        app = mock.AsyncMock()
+        receive = mock.AsyncMock()
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "headers": [(b"content-length", content_length)]}
+        async_to_sync(UploadSizeLimitMiddleware(app))(scope, receive, send)
+        return app, receive, sent
+
+    def test_request_over_the_limit_is_refused_before_its_body_is_received(self):
+        app, receive, sent = self.call(b"2001")
+        app.assert_not_called()
+        receive.assert_not_called()
+        self.assertEqual(sent[0]["status"], 413)
+        self.assertIn("larger than 1000 bytes", json.loads(sent[1]["body"])["error"])
+
+    def test_request_within_the_limit_is_passed_on(self):
+        app, _, sent = self.call(b"2000")
+        app.assert_awaited_once()
+        self.assertEqual(sent, [])
@@ -0,0 +1,71 @@
+import json
+import time
+from unittest import mock
+
+from django.test import Client, RequestFactory, SimpleTestCase, override_settings
+
+from resume_app import views
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+# The hashed static file names need a manifest, which only collectstatic writes.
+UNHASHED_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def slow_rewrite(*args):
+    # Like a follower waiting for an identical generation in another worker.
+    time.sleep(0.1)
+    yield "Rewritten"
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GenerateResumeStreamApiTests(SimpleTestCase):
+    def test_heartbeats_are_sent_while_waiting(self):
+        request = RequestFactory().post(
+            "/api/generate-resume/stream/", json.dumps({"resume_text": "resume", "job_posting_text": "posting"}),
+            content_type="application/json",
+        )
+        with mock.patch.object(views, "stream_rewritten_resume", slow_rewrite), \
+                mock.patch.object(views.settings, "STREAM_HEARTBEAT_INTERVAL", 0.02):
+            response = views.generate_resume_stream_api(request)
+            events = b"".join(response.streaming_content).decode().split("\n\n")
+
+        self.assertEqual(events[0], "event: start\ndata: {}")
+        self.assertEqual(events[1], ": heartbeat")
+        self.assertIn('event: chunk\ndata: "Rewritten"', events)
+        self.assertTrue(events[-2].startswith("event: done\n"))
+
+
+@override_settings(STORAGES=UNHASHED_STORAGES)
+class IndexTests(SimpleTestCase):
+    def setUp(self):
+        views._index_page = None
+        self.addCleanup(setattr, views, "_index_page", None)
+
+    def test_page_is_sent_with_an_etag_and_a_csrf_cookie(self):
+        response = Client().get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], views.get_index_page().etag)
+        self.assertIn("no-cache", response["Cache-Control"])
+        # The page has no {% csrf_token %}; the scripts read the token from this cookie.
+        self.assertTrue(response.cookies["csrftoken"].value)
+        self.assertNotIn(b"csrfmiddlewaretoken", response.content)
+
+    def test_every_visitor_gets_the_same_page(self):
+        first, second = Client().get("/"), Client().get("/")
+        self.assertNotEqual(first.cookies["csrftoken"].value, second.cookies["csrftoken"].value)
+        self.assertEqual(first.content, second.content)
+
+    def test_unchanged_page_is_not_modified_and_still_sets_the_csrf_cookie(self):
+        etag = Client().get("/")["ETag"]
+        response = Client().get("/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertTrue(response.cookies["csrftoken"].value)
+
+    def test_stale_etag_gets_the_page(self):
+        response = Client().get("/", HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, views.get_index_page().content)
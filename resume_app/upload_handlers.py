@@ -0,0 +1,225 @@
+import codecs
+import hashlib
+import json
+import os
+from functools import wraps
+from io import BytesIO
+from typing import List, Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import JsonResponse, QueryDict
+from django.utils.datastructures import MultiValueDict
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from resume_app.services.extraction_service import FILE_TYPE_MAP
+
+# PDF readers accept the header anywhere in the first kilobyte.
+PDF_HEADER_WINDOW = 1024
+DOCX_SIGNATURE = b"PK\x03\x04"
+
+
+class UploadRejectedError(Exception):
+    """
+    Why ResumeUploadHandler stopped an upload, with the status code to respond with.
+    """
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class HashedUploadedFile(InMemoryUploadedFile):
+    """
+    An upload received by ResumeUploadHandler. `data` holds the contents, which the
+    extractors read directly, and `sha256` their hex digest.
+    """
+
+    def __init__(self, data: bytes, sha256: str, file_type: str, **kwargs):
+        # BytesIO shares the bytes object until it is written to, so this doesn't copy.
+        super().__init__(BytesIO(data), size=len(data), **kwargs)
+        self.data = data
+        self.sha256 = sha256
+        self.file_type = file_type
+
+
+def max_request_bytes() -> int:
+    """
+    :return: The largest request body an upload can need: a file of up to
+             EXTRACTION_MAX_BYTES, plus the other form fields, which are capped
+             separately by DATA_UPLOAD_MAX_MEMORY_SIZE.
+    """
+    return settings.EXTRACTION_MAX_BYTES + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+
+
+class ResumeUploadHandler(FileUploadHandler):
+    """
+    Receives resume uploads in memory while checking them as they stream in:
+    requests whose Content-Length is over EXTRACTION_MAX_BYTES are refused before
+    any of the body is read, and files with an unsupported extension, contents that
+    don't match it, or that grow past the limit are refused at the first offending
+    chunk. The content hash is computed along the way.
+
+    Only under WSGI does this happen as the body arrives. Django's ASGI handler
+    reads the whole body before any upload handler runs, so resume_righter/asgi.py
+    wraps the app in UploadSizeLimitMiddleware to refuse oversized requests first.
+
+    A refused upload leaves request.upload_rejection set to an UploadRejectedError,
+    see rejected_upload_response().
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.EXTRACTION_MAX_BYTES
+        self.file_type: Optional[str] = None
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._head = b""
+        self._sniffed = False
+        self._hash = None
+        self._text_decoder = None
+
+    def _reject(self, message: str, status: int) -> None:
+        self.request.upload_rejection = UploadRejectedError(message, status)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > max_request_bytes():
+            self._reject(f"File is larger than {self.max_bytes} bytes.", 413)
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        file_extension = os.path.splitext(self.file_name or "")[1].lower()
+        self.file_type = FILE_TYPE_MAP.get(file_extension)
+        if self.file_type is None:
+            self._reject(f"Unsupported file type: {file_extension}", 400)
+            raise StopUpload(connection_reset=True)
+        self._chunks = []
+        self._size = 0
+        self._head = b""
+        self._sniffed = False
+        self._hash = hashlib.sha256()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")() if self.file_type == "txt" else None
+
+    def receive_data_chunk(self, raw_data, start):
+        self._size += len(raw_data)
+        if self._size > self.max_bytes:
+            self._reject(f"File is larger than {self.max_bytes} bytes.", 413)
+            raise StopUpload(connection_reset=True)
+
+        if not self._sniffed:
+            self._head += raw_data[:PDF_HEADER_WINDOW - len(self._head)]
+            if len(self._head) >= PDF_HEADER_WINDOW:
+                self._sniff()
+        if self._text_decoder is not None:
+            self._check_text(raw_data, final=False)
+
+        self._hash.update(raw_data)
+        self._chunks.append(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self._sniffed:
+            self._sniff()
+        if self._text_decoder is not None:
+            self._check_text(b"", final=True)
+
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return HashedUploadedFile(
+            data,
+            self._hash.hexdigest(),
+            self.file_type,
+            field_name=self.field_name,
+            name=self.file_name,
+            content_type=self.content_type,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+    def _sniff(self) -> None:
+        """
+        Check that the start of the file matches the format its extension claims.
+        """
+        self._sniffed = True
+        if self.file_type == "pdf":
+            matches = b"%PDF-" in self._head
+        elif self.file_type == "docx":
+            matches = self._head.startswith(DOCX_SIGNATURE)
+        else:
+            matches = b"\x00" not in self._head
+        if not matches:
+            self._reject(f"The uploaded file is not a valid {self.file_type.upper()} file.", 400)
+            raise StopUpload(connection_reset=True)
+
+    def _check_text(self, raw_data: bytes, final: bool) -> None:
+        try:
+            self._text_decoder.decode(raw_data, final)
+        except UnicodeDecodeError:
+            self._reject("The uploaded text file is not UTF-8.", 400)
+            raise StopUpload(connection_reset=True)
+
+
+def resume_upload_handler(view):
+    """
+    Parse the view's uploads with ResumeUploadHandler. The handlers must be in
+    place before anything reads request.POST, CsrfViewMiddleware included, so the
+    view is exempted from the middleware and checked by csrf_protect instead.
+    """
+    protected_view = csrf_protect(view)
+
+    if iscoroutinefunction(view):
+        async def wrapper(request, *args, **kwargs):
+            request.upload_handlers = [ResumeUploadHandler(request)]
+            return await protected_view(request, *args, **kwargs)
+    else:
+        def wrapper(request, *args, **kwargs):
+            request.upload_handlers = [ResumeUploadHandler(request)]
+            return protected_view(request, *args, **kwargs)
+
+    return csrf_exempt(wraps(view)(wrapper))
+
+
+def rejected_upload_response(request):
+    """
+    :return: The error response for an upload ResumeUploadHandler refused, or None.
+    """
+    # The body is parsed on first access, which csrf_protect usually makes already.
+    request.FILES
+    rejection = getattr(request, "upload_rejection", None)
+    if rejection is None:
+        return None
+    return JsonResponse({"error": str(rejection)}, status=rejection.status)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that refuses requests whose Content-Length is over
+    max_request_bytes() before any of the body is received, with the same 413
+    response ResumeUploadHandler gives under WSGI.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = dict(scope.get("headers") or ())
+            content_length = headers.get(b"content-length", b"")
+            if content_length.isdigit() and int(content_length) > max_request_bytes():
+                body = json.dumps({"error": f"File is larger than {settings.EXTRACTION_MAX_BYTES} bytes."}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 413,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
@@ -1,52 +1,119 @@
+import hashlib
 import json
-import os
-from django.shortcuts import render
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.csrf import ensure_csrf_cookie
 from resume_app.services.openai_service import (
     validate_resume,
     validate_job_posting,
     validate_special_considerations,
-    generate_rewritten_resume,
+    generate_rewritten_text,
+    stream_rewritten_resume,
+    validate_inputs,
 )
+from resume_app.api_helpers import (
+    SERVER_SENT_HEARTBEAT,
+    batch_archive_response,
+    batch_postings,
+    batch_request_error,
+    batch_validation_error,
+    event_stream_response,
+    extraction_limit_response,
+    generated_resume_response,
+    generation_done_event,
+    generation_error_event,
+    generation_inputs,
+    rendered_resume_response,
+    resume_file_type,
+    save_validated_inputs,
+    server_sent_event,
+    unsupported_file_type_response,
+    unsupported_format_response,
+    validation_response_data,
+)
+from resume_app.models import GenerationJob
+from resume_app.services.batch_service import stream_batch_archive
+from resume_app.services.extraction_service import ExtractionLimitError
+from resume_app.services.job_service import QueueFullError, submit_generation_job
+from resume_app.services.metrics_service import registry, request_id_var
+from resume_app.services.rendering_service import OUTPUT_FORMATS
+from resume_app.services.result_service import get_rendered_resume, load_generated_resume, store_generated_resume
+from resume_app.services.stream_service import iterate_with_heartbeats
+from resume_app.upload_handlers import rejected_upload_response, resume_upload_handler
 from resume_righter import settings
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexPage:
+    content: bytes
+    etag: str
+
+
+_index_page: Optional[IndexPage] = None
+_index_page_lock = threading.Lock()
+
+
+def get_index_page() -> IndexPage:
+    """
+    Return the landing page, rendered the first time it is needed. It only depends
+    on settings and the static file names, and the CSRF token is read from the
+    csrftoken cookie, so every visitor gets the same bytes.
+    """
+    global _index_page
+    with _index_page_lock:
+        if _index_page is None:
+            content = render_to_string('resume_app/index.html',
+                                       {"extra_details": settings.EXTRA_DETAILS_FOR_RESUME_GENERATION}).encode("utf-8")
+            _index_page = IndexPage(content, f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+        return _index_page
+
 
 # Create your views here.
+@ensure_csrf_cookie
 def index(request):
     try:
-        return render(request, 'resume_app/index.html',
-                      {"extra_details": settings.EXTRA_DETAILS_FOR_RESUME_GENERATION})
+        page = get_index_page()
     except Exception as e:
         return HttpResponse(f"Error: {e}")
+    response = HttpResponse(page.content)
+    response["ETag"] = page.etag
+    # Revalidated on every visit, which costs a 304 while the page is unchanged.
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(request, etag=page.etag, response=response)
 
 
+@resume_upload_handler
 def validate_resume_api(request):
     if request.method == "POST":
+        rejected = rejected_upload_response(request)
+        if rejected:
+            return rejected
         # Retrieve the uploaded file
         uploaded_file = request.FILES.get("resume_file")
         if not uploaded_file:
             return JsonResponse({"error": "No file uploaded"}, status=400)
 
         # Determine the file type from the uploaded file
-        filename = uploaded_file.name
-        file_extension = os.path.splitext(filename)[1].lower()  # Get file extension
-
-        # Map extensions to file types
-        file_type_map = {
-            ".pdf": "pdf",
-            ".docx": "docx",
-            ".txt": "txt",
-        }
-        file_type = file_type_map.get(file_extension)
+        file_type = resume_file_type(uploaded_file)
         if not file_type:
-            return JsonResponse({"error": f"Unsupported file type: {file_extension}"}, status=400)
+            return unsupported_file_type_response(uploaded_file)
 
         # Validate the resume using the uploaded file and its type
-        result = validate_resume(uploaded_file, file_type)
-        return JsonResponse({
-            "valid": result["is_valid"],
-            "extracted_text": result["validated_data"],
-        })
+        try:
+            result = validate_resume(uploaded_file, file_type)
+        except ExtractionLimitError as e:
+            return extraction_limit_response(e)
+        return JsonResponse(
+            validation_response_data(result, "extracted_text", request.POST.get("session_id"), "resume_text")
+        )
 
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
@@ -60,10 +127,9 @@ def validate_job_posting_api(request):
 
         # Call the service to validate the job posting
         result = validate_job_posting(url)
-        return JsonResponse({
-            "valid": result["is_valid"],
-            "job_posting_text": result["validated_data"],
-        })
+        return JsonResponse(
+            validation_response_data(result, "job_posting_text", data.get("session_id"), "job_posting_text")
+        )
 
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
@@ -77,38 +143,217 @@ def validate_special_considerations_api(request):
 
         # Validate the special considerations using OpenAI
         result = validate_special_considerations(text)
-        return JsonResponse({
-            "valid": result["is_valid"],
-            "validated_data": result["validated_data"],
-        })
+        return JsonResponse(
+            validation_response_data(result, "validated_data", data.get("session_id"), "considerations")
+        )
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+@resume_upload_handler
+def validate_inputs_api(request):
+    if request.method == "POST":
+        rejected = rejected_upload_response(request)
+        if rejected:
+            return rejected
+        uploaded_file = request.FILES.get("resume_file")
+        url = request.POST.get("url")
+        text = request.POST.get("text")
+        if not uploaded_file and not url and not text:
+            return JsonResponse({"error": "No input provided."}, status=400)
+
+        file_type = None
+        if uploaded_file:
+            file_type = resume_file_type(uploaded_file)
+            if not file_type:
+                return unsupported_file_type_response(uploaded_file)
+
+        try:
+            results = validate_inputs(uploaded_file, file_type, url, text)
+        except ExtractionLimitError as e:
+            return extraction_limit_response(e)
+
+        return JsonResponse(save_validated_inputs(request.POST.get("session_id"), results, text))
 
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
 
 def generate_resume_api(request):
     if request.method == "POST":
-        data = json.loads(request.body)
-        resume_text = data.get("resume_text")
-        job_posting_text = data.get("job_posting_text")
-        considerations = data.get("considerations")
+        inputs = generation_inputs(json.loads(request.body))
+        if isinstance(inputs, HttpResponse):
+            return inputs
+        resume_text, job_posting_text, considerations = inputs
 
-        if not resume_text or not job_posting_text:
-            print("Missing required input.")
-            return JsonResponse({"error": "Missing required input."}, status=400)
+        output_format = request.GET.get("format", "docx")
+        if output_format not in OUTPUT_FORMATS:
+            return unsupported_format_response(output_format)
 
         try:
-            print("Generating rewritten resume in view...")
-            # Generate the rewritten resume
-            rewritten_resume = generate_rewritten_resume(resume_text, job_posting_text, considerations)
-
-            # Serve the .docx file as a response
-            response = HttpResponse(
-                rewritten_resume,
-                content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            )
-            response["Content-Disposition"] = 'attachment; filename="Rewritten_Resume.docx"'
-            return response
+            logger.info("Generating rewritten resume in view...")
+            # Generate the rewritten text once; other formats are rendered from it on request.
+            rewritten_text = generate_rewritten_text(resume_text, job_posting_text, considerations)
+            handle = store_generated_resume(rewritten_text)
+
+            content = get_rendered_resume(handle, output_format, lambda: rewritten_text)
+            return generated_resume_response(content, output_format, handle)
         except Exception as e:
             return JsonResponse({"error": f"Failed to generate resume: {str(e)}"}, status=500)
 
     return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+def generate_resume_stream_api(request):
+    if request.method == "POST":
+        inputs = generation_inputs(json.loads(request.body))
+        if isinstance(inputs, HttpResponse):
+            return inputs
+        resume_text, job_posting_text, considerations = inputs
+
+        request_id = getattr(request, "request_id", "-")
+
+        def event_stream():
+            # The body is produced after the middleware has finished with the request.
+            request_id_var.set(request_id)
+            # Sent before generation starts, so the client and the router see the
+            # response begin while the first job is still being written.
+            yield server_sent_event("start", {})
+            chunks = []
+            try:
+                # A request waiting on an identical generation gets nothing until it
+                # finishes, so heartbeats keep the connection open in the meantime.
+                for chunk in iterate_with_heartbeats(
+                        stream_rewritten_resume(resume_text, job_posting_text, considerations),
+                        settings.STREAM_HEARTBEAT_INTERVAL,
+                ):
+                    if chunk is None:
+                        yield SERVER_SENT_HEARTBEAT
+                        continue
+                    chunks.append(chunk)
+                    yield server_sent_event("chunk", chunk)
+
+                handle = store_generated_resume("".join(chunks).strip())
+                yield generation_done_event(handle)
+            except Exception as e:
+                yield generation_error_event(e)
+
+        return event_stream_response(event_stream())
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+@resume_upload_handler
+def batch_generate_resume_api(request):
+    if request.method == "POST":
+        rejected = rejected_upload_response(request)
+        if rejected:
+            return rejected
+        uploaded_file = request.FILES.get("resume_file")
+        urls = batch_postings(request)
+        text = request.POST.get("text")
+        error = batch_request_error(uploaded_file, urls, settings.BATCH_MAX_POSTINGS)
+        if error:
+            return error
+
+        # The resume and considerations are validated once for the whole batch.
+        try:
+            results = validate_inputs(uploaded_file, resume_file_type(uploaded_file), None, text)
+        except ExtractionLimitError as e:
+            return extraction_limit_response(e)
+        error = batch_validation_error(results, text)
+        if error:
+            return error
+
+        resume_text = results["resume"]["validated_data"]
+        considerations = text or ""
+        request_id = getattr(request, "request_id", "-")
+
+        def archive_stream():
+            request_id_var.set(request_id)
+            yield from stream_batch_archive(resume_text, urls, considerations)
+
+        return batch_archive_response(archive_stream())
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+def generated_resume_download_api(request, handle):
+    if request.method == "GET":
+        output_format = request.GET.get("format", "docx")
+        if output_format not in OUTPUT_FORMATS:
+            return unsupported_format_response(output_format)
+
+        content = get_rendered_resume(handle, output_format, lambda: load_generated_resume(handle))
+        if content is None:
+            return JsonResponse({"error": "Generated resume not found or expired."}, status=404)
+        return rendered_resume_response(content, output_format)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+def _generation_job_status(job):
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "error": job.error,
+        "status_url": reverse("generation_job_status", args=[job.id]),
+        "result_url": reverse("generation_job_result", args=[job.id]),
+    }
+
+
+def generation_jobs_api(request):
+    if request.method == "POST":
+        inputs = generation_inputs(json.loads(request.body))
+        if isinstance(inputs, HttpResponse):
+            return inputs
+        resume_text, job_posting_text, considerations = inputs
+
+        try:
+            job = submit_generation_job(resume_text, job_posting_text, considerations)
+        except QueueFullError as e:
+            response = JsonResponse({"error": str(e)}, status=429)
+            response["Retry-After"] = str(e.retry_after)
+            return response
+
+        return JsonResponse(_generation_job_status(job), status=202)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+def generation_job_status_api(request, job_id):
+    if request.method == "GET":
+        job = GenerationJob.objects.filter(pk=job_id).defer("result_text").first()
+        if job is None:
+            return JsonResponse({"error": "Job not found."}, status=404)
+        return JsonResponse(_generation_job_status(job))
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+def generation_job_result_api(request, job_id):
+    if request.method == "GET":
+        output_format = request.GET.get("format", "docx")
+        if output_format not in OUTPUT_FORMATS:
+            return unsupported_format_response(output_format)
+
+        job = GenerationJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return JsonResponse({"error": "Job not found."}, status=404)
+        if job.status == GenerationJob.Status.FAILED:
+            return JsonResponse({"error": f"Failed to generate resume: {job.error}"}, status=500)
+        if job.status != GenerationJob.Status.SUCCEEDED:
+            return JsonResponse(_generation_job_status(job), status=202)
+
+        content = get_rendered_resume(str(job.id), output_format, lambda: job.result_text)
+        return rendered_resume_response(content, output_format)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+def metrics_view(request):
+    if request.method == "GET":
+        if settings.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {settings.METRICS_TOKEN}":
+            return JsonResponse({"error": "Not authorized."}, status=403)
+        return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
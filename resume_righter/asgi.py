@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'resume_righter.settings')
 
 application = get_asgi_application()
+
+# Imported once Django is set up. Django's ASGI handler reads the whole request
+# body before the views' upload handlers see it, so oversized uploads are
+# refused here from their Content-Length instead.
+from resume_app.upload_handlers import UploadSizeLimitMiddleware  # noqa: E402
+
+application = UploadSizeLimitMiddleware(application)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -21,8 +22,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-zlf-ek9+@#j=$7d@b^+#0+7p4hzpcq#aqh#rb62(#xztke%r13'
 
+# The `DYNO` env var is also set on Heroku CI, which isn't a real Heroku app.
+IS_HEROKU_APP = "DYNO" in os.environ and "CI" not in os.environ
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Off by default on Heroku: with DEBUG on, {% static %} links the unhashed file
+# names, so the far-future cached, hashed static files are never used.
+DEBUG = os.environ.get("DJANGO_DEBUG", default="false" if IS_HEROKU_APP else "true").lower() == "true"
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -42,14 +48,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'resume_app.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves static files ahead of the rest of the stack.
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'resume_righter.urls'
@@ -78,10 +86,83 @@ WSGI_APPLICATION = 'resume_righter.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # DATABASE_PATH moves the file elsewhere, as the load test does.
+        'NAME': os.environ.get("DATABASE_PATH", default=BASE_DIR / 'db.sqlite3'),
+        # Web threads and generation workers write to the same file, so wait for
+        # the write lock instead of failing with "database is locked".
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# A file based cache is shared by every gunicorn worker on the dyno, so results
+# stored by one worker can be fetched through another. FileBasedCache culls a
+# random 1/CULL_FREQUENCY of its entries once it holds MAX_ENTRIES, so the many
+# small validation completions get their own "completions" cache and can't push
+# download handles, rendered files or single-flight results out of "default".
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            "CACHE_LOCATION",
+            default=os.path.join(tempfile.gettempdir(), "resume_righter_cache"),
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get("CACHE_MAX_ENTRIES", default=2000)),
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    'completions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            "COMPLETION_CACHE_LOCATION",
+            default=os.path.join(tempfile.gettempdir(), "resume_righter_completions"),
+        ),
+        'TIMEOUT': int(os.environ.get("OPENAI_CACHE_TTL", default=60 * 60 * 24)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get("COMPLETION_CACHE_MAX_ENTRIES", default=10000)),
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+# Heroku logfmt style lines, matching the gunicorn access log, tagged with the
+# router's X-Request-Id.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {
+            '()': 'resume_app.services.metrics_service.RequestIdFilter',
+        },
+    },
+    'formatters': {
+        'logfmt': {
+            'format': 'app level=%(levelname)s logger=%(name)s request_id=%(request_id)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'filters': ['request_id'],
+            'formatter': 'logfmt',
+        },
+    },
+    'loggers': {
+        'resume_app': {
+            'handlers': ['console'],
+            'level': os.environ.get("LOG_LEVEL", default="INFO"),
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -117,7 +198,17 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = []
-STATICFILES_STORAGE = 'whitenoise.django.GzipManifestStaticFilesStorage'
+# collectstatic writes each file under a content hashed name along with gzip and
+# brotli copies; WhiteNoise serves the hashed names with a far-future max-age and
+# picks the encoding the client accepts.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
 
 TEMPLATE_DIRS = (
     os.path.join(BASE_DIR,  'templates'),
@@ -135,6 +226,198 @@ EXTRA_DETAILS_FOR_RESUME_GENERATION = os.environ.get(
     default="Make the resume look nice and professional.",
 )
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", default="gpt-3.5-turbo")
+# Point the OpenAI clients at another OpenAI compatible server, such as the
+# stand-in started by `manage.py loadtest`. Empty for the real API.
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", default="")
+# Cache for the deterministic validation completions. "memory" keeps a per-worker
+# LRU, "django" shares entries between workers through OPENAI_CACHE_ALIAS.
+OPENAI_CACHE_BACKEND = os.environ.get("OPENAI_CACHE_BACKEND", default="django")
+OPENAI_CACHE_ALIAS = os.environ.get("OPENAI_CACHE_ALIAS", default="completions")
+OPENAI_CACHE_TTL = int(os.environ.get("OPENAI_CACHE_TTL", default=60 * 60 * 24))
+OPENAI_CACHE_MAX_ENTRIES = int(os.environ.get("OPENAI_CACHE_MAX_ENTRIES", default=1024))
+# Serve the API through the async views in resume_app/async_views.py. Only worth
+# enabling under an ASGI server, see gunicorn.asgi.conf.py.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", default="false").lower() == "true"
+# Connection pool and concurrency limits for the shared async OpenAI client.
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", default=60))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", default=100))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("OPENAI_MAX_KEEPALIVE_CONNECTIONS", default=20))
+OPENAI_MAX_CONCURRENT_REQUESTS = int(os.environ.get("OPENAI_MAX_CONCURRENT_REQUESTS", default=200))
+# Background generation jobs. Workers run as threads inside each web process
+# (GENERATION_WORKER_THREADS, 0 to disable), started as gunicorn boots each
+# worker, and/or as a separate `manage.py run_generation_workers` process.
+GENERATION_QUEUE_MAX_DEPTH = int(os.environ.get("GENERATION_QUEUE_MAX_DEPTH", default=50))
+GENERATION_QUEUE_RETRY_AFTER = int(os.environ.get("GENERATION_QUEUE_RETRY_AFTER", default=15))
+GENERATION_WORKER_THREADS = int(os.environ.get("GENERATION_WORKER_THREADS", default=2))
+GENERATION_WORKER_POLL_INTERVAL = float(os.environ.get("GENERATION_WORKER_POLL_INTERVAL", default=1))
+# Running jobs are requeued after GENERATION_JOB_TIMEOUT seconds, so it has to
+# outlast a slow generation: each OpenAI call can take OPENAI_MAX_RETRIES + 1
+# attempts of OPENAI_TIMEOUT plus the backoff and rate limit waits in between.
+GENERATION_JOB_TIMEOUT = int(os.environ.get("GENERATION_JOB_TIMEOUT", default=30 * 60))
+# A job still running after GENERATION_JOB_MAX_ATTEMPTS claims fails instead of
+# being requeued, so a job that kills its worker can't do so forever.
+GENERATION_JOB_MAX_ATTEMPTS = int(os.environ.get("GENERATION_JOB_MAX_ATTEMPTS", default=3))
+GENERATION_JOB_RESULT_TTL = int(os.environ.get("GENERATION_JOB_RESULT_TTL", default=60 * 60))
+# Budgets for extracting text from uploaded resumes. PDFs with at least
+# EXTRACTION_PARALLEL_MIN_PAGES pages are split across EXTRACTION_PROCESSES
+# processes by page range (set it below 2 to always extract in-process).
+EXTRACTION_MAX_BYTES = int(os.environ.get("EXTRACTION_MAX_BYTES", default=10 * 1024 * 1024))
+EXTRACTION_MAX_PAGES = int(os.environ.get("EXTRACTION_MAX_PAGES", default=50))
+EXTRACTION_TIME_BUDGET = float(os.environ.get("EXTRACTION_TIME_BUDGET", default=5))
+EXTRACTION_PARALLEL_MIN_PAGES = int(os.environ.get("EXTRACTION_PARALLEL_MIN_PAGES", default=20))
+EXTRACTION_PROCESSES = int(os.environ.get("EXTRACTION_PROCESSES", default=2))
+# "stream" parses .docx XML straight from the zip, including tables, text boxes,
+# headers and footers; "python-docx" only reads top level body paragraphs.
+DOCX_EXTRACTION_ENGINE = os.environ.get("DOCX_EXTRACTION_ENGINE", default="stream")
+# Extracted PDF and DOCX texts are cached by content hash in the SQLite file at
+# EXTRACTION_CACHE_DB, shared by every worker on the dyno. The least recently
+# used texts are evicted beyond EXTRACTION_CACHE_MAX_BYTES (compressed); 0
+# disables the cache.
+EXTRACTION_CACHE_DB = os.environ.get(
+    "EXTRACTION_CACHE_DB", default=os.path.join(tempfile.gettempdir(), "resume_righter_extractions.sqlite3")
+)
+EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get("EXTRACTION_CACHE_MAX_BYTES", default=64 * 1024 * 1024))
+# Local resume pre-classifier. Texts scoring at or beyond the accept/reject
+# thresholds are decided without calling OpenAI, and texts shorter than
+# RESUME_PRECLASSIFIER_MIN_CHARS are rejected. Texts longer than
+# RESUME_PRECLASSIFIER_MAX_CHARS are always left to the model.
+RESUME_PRECLASSIFIER_ENABLED = os.environ.get("RESUME_PRECLASSIFIER_ENABLED", default="true").lower() == "true"
+RESUME_PRECLASSIFIER_MIN_CHARS = int(os.environ.get("RESUME_PRECLASSIFIER_MIN_CHARS", default=200))
+RESUME_PRECLASSIFIER_MAX_CHARS = int(os.environ.get("RESUME_PRECLASSIFIER_MAX_CHARS", default=60000))
+RESUME_PRECLASSIFIER_ACCEPT_SCORE = float(os.environ.get("RESUME_PRECLASSIFIER_ACCEPT_SCORE", default=0.9))
+RESUME_PRECLASSIFIER_REJECT_SCORE = float(os.environ.get("RESUME_PRECLASSIFIER_REJECT_SCORE", default=0.05))
+# Job posting fetcher. Extracted postings are cached on disk by canonical URL and
+# revalidated with a conditional GET once they are older than the TTL. Entries
+# unused for JOB_POSTING_CACHE_MAX_AGE seconds are deleted, as are the least
+# recently used ones once the directory holds more than JOB_POSTING_CACHE_MAX_BYTES.
+JOB_POSTING_CACHE_DIR = os.environ.get(
+    "JOB_POSTING_CACHE_DIR",
+    default=os.path.join(tempfile.gettempdir(), "resume_righter_job_postings"),
+)
+JOB_POSTING_CACHE_TTL = int(os.environ.get("JOB_POSTING_CACHE_TTL", default=60 * 60 * 6))
+JOB_POSTING_CACHE_MAX_AGE = int(os.environ.get("JOB_POSTING_CACHE_MAX_AGE", default=60 * 60 * 24 * 7))
+JOB_POSTING_CACHE_MAX_BYTES = int(os.environ.get("JOB_POSTING_CACHE_MAX_BYTES", default=64 * 1024 * 1024))
+JOB_POSTING_FETCH_TIMEOUT = float(os.environ.get("JOB_POSTING_FETCH_TIMEOUT", default=10))
+JOB_POSTING_MAX_BYTES = int(os.environ.get("JOB_POSTING_MAX_BYTES", default=2 * 1024 * 1024))
+JOB_POSTING_VALIDATION_MAX_CHARS = int(os.environ.get("JOB_POSTING_VALIDATION_MAX_CHARS", default=4000))
+# Only enable to point the fetcher at a local stand-in server.
+JOB_POSTING_ALLOW_PRIVATE_HOSTS = os.environ.get("JOB_POSTING_ALLOW_PRIVATE_HOSTS", default="false").lower() == "true"
+# Context window sizes, in tokens, used to budget the generation prompt. Models
+# not listed use OPENAI_DEFAULT_CONTEXT_WINDOW. PROMPT_MAX_INPUT_TOKENS caps the
+# prompt below the context window to bound cost and latency (0 for no cap).
+OPENAI_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+OPENAI_DEFAULT_CONTEXT_WINDOW = int(os.environ.get("OPENAI_DEFAULT_CONTEXT_WINDOW", default=8192))
+PROMPT_MAX_INPUT_TOKENS = int(os.environ.get("PROMPT_MAX_INPUT_TOKENS", default=12000))
+# Price in US dollars per 1K (prompt, completion) tokens, for the cost metrics.
+OPENAI_PRICING = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+# When set, /metrics requires an "Authorization: Bearer <METRICS_TOKEN>" header.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", default="")
+# Every worker writes its metrics to the SQLite file at METRICS_DB each
+# METRICS_FLUSH_INTERVAL seconds, and /metrics reports all the workers on the
+# dyno whichever one answers. With METRICS_DB empty it reports only that worker.
+METRICS_DB = os.environ.get(
+    "METRICS_DB", default=os.path.join(tempfile.gettempdir(), "resume_righter_metrics.sqlite3")
+)
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", default=5))
+# Optional path to a .docx file used as the template for generated resumes. It
+# must define the Heading1, Heading2 and ListBullet paragraph styles.
+RESUME_DOCX_TEMPLATE = os.environ.get("RESUME_DOCX_TEMPLATE", default="")
+# Seconds a streamed resume stays downloadable after generation finishes.
+GENERATED_RESUME_HANDLE_TTL = int(os.environ.get("GENERATED_RESUME_HANDLE_TTL", default=600))
+# Identical generation requests that overlap share one completion. Workers on
+# the dyno coordinate through lock files in GENERATION_SINGLE_FLIGHT_DIR, and the
+# result stays in the default cache for GENERATION_SINGLE_FLIGHT_TTL seconds so
+# retries right after it finishes reuse it too. Callers wait at most
+# GENERATION_SINGLE_FLIGHT_TIMEOUT seconds before generating on their own.
+GENERATION_SINGLE_FLIGHT_DIR = os.environ.get(
+    "GENERATION_SINGLE_FLIGHT_DIR", default=os.path.join(tempfile.gettempdir(), "resume_righter_singleflight")
+)
+GENERATION_SINGLE_FLIGHT_TTL = int(os.environ.get("GENERATION_SINGLE_FLIGHT_TTL", default=120))
+GENERATION_SINGLE_FLIGHT_TIMEOUT = float(os.environ.get("GENERATION_SINGLE_FLIGHT_TIMEOUT", default=180))
+# Batch generation (/api/generate-resume/batch/) tailors one resume to up to
+# BATCH_MAX_POSTINGS postings, with at most BATCH_GENERATION_CONCURRENCY
+# completions in flight for the whole batch and starting at most
+# BATCH_GENERATION_RATE_LIMIT postings per minute (0 for no limit).
+BATCH_MAX_POSTINGS = int(os.environ.get("BATCH_MAX_POSTINGS", default=30))
+BATCH_GENERATION_CONCURRENCY = int(os.environ.get("BATCH_GENERATION_CONCURRENCY", default=4))
+BATCH_GENERATION_RATE_LIMIT = int(os.environ.get("BATCH_GENERATION_RATE_LIMIT", default=20))
+# Long streamed responses send something at least every STREAM_HEARTBEAT_INTERVAL
+# seconds. Heroku's router closes a response that sends nothing for 30 seconds
+# before its first byte, or for 55 seconds after it.
+STREAM_HEARTBEAT_INTERVAL = float(os.environ.get("STREAM_HEARTBEAT_INTERVAL", default=15))
+# Client side OpenAI rate limits, as (requests, tokens) per minute, shared by
+# every worker through the SQLite file at OPENAI_RATE_LIMIT_DB. Models not listed
+# use the OPENAI_DEFAULT_* limits; 0 disables a limit. A call that would wait
+# longer than OPENAI_RATE_LIMIT_MAX_WAIT seconds fails instead.
+OPENAI_RATE_LIMITS = {}
+OPENAI_DEFAULT_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_DEFAULT_REQUESTS_PER_MINUTE", default=500))
+OPENAI_DEFAULT_TOKENS_PER_MINUTE = int(os.environ.get("OPENAI_DEFAULT_TOKENS_PER_MINUTE", default=200000))
+OPENAI_RATE_LIMIT_DB = os.environ.get(
+    "OPENAI_RATE_LIMIT_DB", default=os.path.join(tempfile.gettempdir(), "resume_righter_ratelimit.sqlite3")
+)
+OPENAI_RATE_LIMIT_MAX_WAIT = float(os.environ.get("OPENAI_RATE_LIMIT_MAX_WAIT", default=30))
+# 429s, 5xx and connection errors are retried with jittered exponential backoff,
+# or after the server's Retry-After when it sends one.
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", default=3))
+OPENAI_RETRY_BASE_DELAY = float(os.environ.get("OPENAI_RETRY_BASE_DELAY", default=0.5))
+OPENAI_RETRY_MAX_DELAY = float(os.environ.get("OPENAI_RETRY_MAX_DELAY", default=20))
+# After OPENAI_CIRCUIT_FAILURE_THRESHOLD upstream failures in a row, calls to
+# that model fail fast for OPENAI_CIRCUIT_RESET_TIMEOUT seconds.
+OPENAI_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("OPENAI_CIRCUIT_FAILURE_THRESHOLD", default=5))
+OPENAI_CIRCUIT_RESET_TIMEOUT = float(os.environ.get("OPENAI_CIRCUIT_RESET_TIMEOUT", default=30))
+# Model routing. Each call goes to the first route listing its call type whose
+# max_input_tokens (estimated prompt tokens, None for no limit) fits, then to the
+# first healthy model of that route whose context window fits. A model is
+# unhealthy while its circuit is open, or once it has OPENAI_ROUTING_MIN_SAMPLES
+# calls in the last OPENAI_ROUTING_WINDOW seconds and either fails more than
+# OPENAI_ROUTING_MAX_ERROR_RATE of them or has a p95 latency over the route's
+# latency_slo seconds. Failed calls fail over to the route's next model.
+OPENAI_VALIDATION_MODEL = os.environ.get("OPENAI_VALIDATION_MODEL", default="gpt-4o-mini")
+OPENAI_FALLBACK_MODEL = os.environ.get("OPENAI_FALLBACK_MODEL", default="gpt-4o-mini")
+OPENAI_MODEL_ROUTES = [
+    {
+        "name": "validation",
+        "calls": ["validate", "validate_batch"],
+        "models": [OPENAI_VALIDATION_MODEL, OPENAI_MODEL],
+        "latency_slo": 5,
+    },
+    {
+        "name": "generation",
+        "calls": ["generate", "generate_stream", "generate_section", "generate_section_stream"],
+        "models": [OPENAI_MODEL, OPENAI_FALLBACK_MODEL],
+        "latency_slo": 60,
+    },
+]
+OPENAI_ROUTING_WINDOW = float(os.environ.get("OPENAI_ROUTING_WINDOW", default=300))
+OPENAI_ROUTING_MIN_SAMPLES = int(os.environ.get("OPENAI_ROUTING_MIN_SAMPLES", default=10))
+OPENAI_ROUTING_MAX_ERROR_RATE = float(os.environ.get("OPENAI_ROUTING_MAX_ERROR_RATE", default=0.25))
+# Validated inputs are kept server side in ResumeSession rows, so the browser
+# sends a session_id instead of the texts. Sessions expire RESUME_SESSION_TTL
+# seconds after they were last saved; run `manage.py delete_expired_sessions`
+# periodically (e.g. from Heroku Scheduler) to remove them.
+RESUME_SESSION_TTL = int(os.environ.get("RESUME_SESSION_TTL", default=60 * 60 * 24))
+# Resumes with a recognisable experience section of two or more jobs are
+# rewritten job by job, GENERATION_SECTION_CONCURRENCY completions at a time, and
+# each rewritten job is kept in the completion cache so a later generation only
+# redoes the jobs whose inputs changed. The first job is streamed.
+GENERATION_SECTION_PARALLEL = os.environ.get("GENERATION_SECTION_PARALLEL", default="true").lower() == "true"
+GENERATION_SECTION_CONCURRENCY = int(os.environ.get("GENERATION_SECTION_CONCURRENCY", default=4))
+# Import time budget for a worker boot, checked by `manage.py profile_startup`:
+# the URLconf, the views and services behind it, and the libraries they import
+# lazily, which gunicorn's when_ready hook loads before forking the workers.
+STARTUP_IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", default=2500))
 
 # Local settings
 # from decouple import config
@@ -14,16 +14,31 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from resume_app import views
 
+if settings.ASYNC_VIEWS:
+    from resume_app import async_views as api_views
+else:
+    api_views = views
+
 urlpatterns = [
     path('', views.index, name="index"),
-    path("api/validate-resume/", views.validate_resume_api, name="validate_resume_api"),
-    path("api/validate-job-posting/", views.validate_job_posting_api, name="validate_job_posting_api"),
-    path("api/validate-special-considerations/", views.validate_special_considerations_api,
+    path("api/validate-resume/", api_views.validate_resume_api, name="validate_resume_api"),
+    path("api/validate-job-posting/", api_views.validate_job_posting_api, name="validate_job_posting_api"),
+    path("api/validate-special-considerations/", api_views.validate_special_considerations_api,
          name="validate_special_considerations"),
-    path("api/generate-resume/", views.generate_resume_api, name="generate_resume"),
+    path("api/validate/", api_views.validate_inputs_api, name="validate_inputs"),
+    path("api/generate-resume/", api_views.generate_resume_api, name="generate_resume"),
+    path("api/generate-resume/stream/", api_views.generate_resume_stream_api, name="generate_resume_stream"),
+    path("api/generate-resume/batch/", api_views.batch_generate_resume_api, name="batch_generate_resume"),
+    path("api/generated-resume/<str:handle>/", views.generated_resume_download_api,
+         name="generated_resume_download"),
+    path("api/jobs/", views.generation_jobs_api, name="generation_jobs"),
+    path("api/jobs/<uuid:job_id>/", views.generation_job_status_api, name="generation_job_status"),
+    path("api/jobs/<uuid:job_id>/result/", views.generation_job_result_api, name="generation_job_result"),
+    path("metrics", views.metrics_view, name="metrics"),
     path('admin/', admin.site.urls),
 ]